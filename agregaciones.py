@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Motor de Agregación por Grupos - Análisis de Valoraciones Tech
+Claves (región, país, sector) factorizadas una sola vez y estadísticos por grupo en una
+pasada por columna, reutilizados por los CSV y por los gráficos
+"""
+
+import numpy as np
+import pandas as pd
+
+ESTADISTICOS = ('sum', 'mean', 'std', 'count')
+
+
+def indexar_grupos(df, clave):
+    """Índice reutilizable de una clave: códigos enteros, grupos ordenados y posiciones
+
+    Los grupos siguen el orden de groupby (valores ordenados, o el orden de las
+    categorías); las filas con clave nula quedan fuera (código -1).
+    """
+    codigos, grupos = pd.factorize(df[clave], sort=True)
+    validos = codigos >= 0
+    conteos = np.bincount(codigos[validos], minlength=len(grupos))
+
+    # Posiciones de las filas agrupadas (orden estable dentro de cada grupo)
+    orden = np.argsort(np.where(validos, codigos, len(grupos)), kind='stable')[:validos.sum()]
+    primera = np.full(len(grupos), len(codigos))
+    np.minimum.at(primera, codigos[validos], np.flatnonzero(validos))
+
+    return {
+        'clave': clave,
+        'codigos': codigos,
+        'grupos': pd.Index(grupos, name=clave),
+        'conteos': conteos,
+        'orden': orden,
+        'cortes': np.cumsum(conteos)[:-1],
+        'aparicion': np.argsort(primera, kind='stable')  # Grupos por primera aparición
+    }
+
+
+def _estadisticos_columna(indice, valores, pedidos):
+    """sum, mean, std (ddof=1) y count de una columna con bincount; NaN se ignoran"""
+    codigos = indice['codigos']
+    n_grupos = len(indice['grupos'])
+    entero = pd.api.types.is_integer_dtype(valores)
+    valores = np.asarray(valores, dtype=float)
+    validos = (codigos >= 0) & ~np.isnan(valores)
+    codigos, valores = codigos[validos], valores[validos]
+
+    conteo = np.bincount(codigos, minlength=n_grupos)
+    suma = np.bincount(codigos, weights=valores, minlength=n_grupos)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = suma / conteo
+        # Como en groupby, la suma de una columna entera se mantiene entera
+        resultado = {'sum': suma.round().astype(np.int64) if entero else suma,
+                     'mean': media, 'count': conteo}
+        if 'std' in pedidos:
+            # Desvíos respecto de la media del grupo: estable aunque los valores sean grandes
+            cuadrados = np.bincount(codigos, weights=(valores - media[codigos])**2,
+                                    minlength=n_grupos)
+            resultado['std'] = np.sqrt(cuadrados / (conteo - 1))
+    return {estadistico: resultado[estadistico] for estadistico in pedidos}
+
+
+def agregar(indice, df, especificacion):
+    """Equivalente a df.groupby(clave).agg(especificacion) con columnas aplanadas
+
+    especificacion es {columna: estadístico o lista de estadísticos} con estadísticos de
+    ESTADISTICOS. Si alguna columna pide una lista, todas se nombran columna_estadístico
+    (igual que el aplanado de un MultiIndex); si no, conservan el nombre de la columna.
+    """
+    pedidos = {columna: [e] if isinstance(e, str) else list(e)
+               for columna, e in especificacion.items()}
+    desconocidos = {e for lista in pedidos.values() for e in lista} - set(ESTADISTICOS)
+    if desconocidos:
+        raise ValueError(f"Estadísticos no soportados: {sorted(desconocidos)}")
+    con_sufijo = any(not isinstance(e, str) for e in especificacion.values())
+
+    columnas = {}
+    for columna, lista in pedidos.items():
+        for estadistico, valores in _estadisticos_columna(indice, df[columna], lista).items():
+            columnas[f'{columna}_{estadistico}' if con_sufijo else columna] = valores
+    return pd.DataFrame(columnas, index=indice['grupos'])
+
+
+def dividir(indice, valores):
+    """Valores de cada grupo (orden de grupos) sin máscaras booleanas por grupo"""
+    valores = np.asarray(valores)
+    return np.split(valores[indice['orden']], indice['cortes'])
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Almacén columnar (Parquet/Arrow) - Análisis de Valoraciones Tech
+Esquemas tipados, lectura con poda de columnas y carga mapeada en memoria
+"""
+
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional: sin él se sigue usando solo CSV
+    pa = pq = None
+
+DIRECTORIO_DATOS = 'datos'
+
+
+def _requerir_pyarrow():
+    """Error explícito cuando se pide el backend columnar sin pyarrow instalado"""
+    if pa is None:
+        raise ImportError("El almacén columnar requiere pyarrow (pip install pyarrow)")
+
+
+def pyarrow_disponible():
+    """Indica si el backend columnar puede usarse"""
+    return pa is not None
+
+
+def _campos(texto, flotantes, enteros=(), booleanos=()):
+    """Esquema: columnas de texto como diccionario (categóricas), luego numéricas"""
+    return ([pa.field(c, pa.dictionary(pa.int32(), pa.string())) for c in texto] +
+            [pa.field(c, pa.float64()) for c in flotantes] +
+            [pa.field(c, pa.int64()) for c in enteros] +
+            [pa.field(c, pa.bool_()) for c in booleanos])
+
+
+def _esquemas():
+    """Esquemas tipados de los datasets de proyecciones, WACC, regiones y sectores"""
+    return {
+        'proyecciones_dcf_2024': {
+            'esquema': pa.schema(_campos(
+                ['Empresa', 'Escenario'],
+                ['Enterprise_Value_M', 'WACC', 'Terminal_Value_M', 'PV_FCF_5Y_M',
+                 'Revenue_CAGR_%', 'Avg_EBITDA_Margin_%'],
+                booleanos=['Terminal_Valido'])),
+            'indice': None
+        },
+        'analisis_wacc_empresas': {
+            'esquema': pa.schema(_campos(
+                ['Empresa', 'Sector_Detail'],
+                ['FCF_Actual_2024_M', 'Revenue_2024_M', 'EBITDA_Margin_%', 'Revenue_Growth_3Y_%',
+                 'Beta', 'Debt_to_Equity', 'Risk_Free_Rate', 'Market_Risk_Premium',
+                 'Cost_of_Equity', 'Cost_of_Debt', 'Equity_Weight', 'Debt_Weight', 'WACC'])),
+            'indice': None
+        },
+        'analisis_regional': {
+            'esquema': pa.schema(_campos(
+                ['Region'],
+                ['Market_Cap_B_USD_sum', 'Market_Cap_B_USD_mean', 'Revenue_2024_M_USD_sum',
+                 'Revenue_2024_M_USD_mean', 'EV_Revenue_Multiple_mean', 'Revenue_Growth_3Y_%_mean',
+                 'EBITDA_Margin_%_mean', 'AI_Exposure_Score_mean', 'Innovation_Index',
+                 'Efficiency_Index'],
+                ['Market_Cap_B_USD_count'])),
+            'indice': 'Region'
+        },
+        'riesgo_sectorial_tech': {
+            'esquema': pa.schema(_campos(
+                ['Sector_Detail'],
+                ['Beta_mean', 'Beta_std', 'WACC_mean', 'WACC_std', 'Debt_to_Equity_mean',
+                 'EBITDA_Margin_%_mean', 'EBITDA_Margin_%_std', 'Revenue_Growth_3Y_%_mean',
+                 'Revenue_Growth_3Y_%_std', 'FCF_Actual_2024_M_sum', 'Risk_Score', 'Growth_Score'])),
+            'indice': 'Sector_Detail'
+        },
+        'analisis_sectorial_detallado': {
+            'esquema': pa.schema(_campos(
+                ['Sector'],
+                ['Market_Cap_B_USD', 'Revenue_2024_M_USD', 'EV_Revenue_Multiple',
+                 'Revenue_Growth_3Y_%', 'EBITDA_Margin_%', 'CAGR_2024_2030_%',
+                 'Market_Size_2030_B'])),
+            'indice': None
+        },
+    }
+
+
+def ruta_parquet(nombre, directorio=DIRECTORIO_DATOS):
+    """Ruta del archivo Parquet de un dataset (junto a su CSV)"""
+    return os.path.join(directorio, f'{nombre}.parquet')
+
+
+def _tabla(df, nombre):
+    """Tabla Arrow de un dataset con su esquema tipado (si lo tiene)"""
+    especificacion = _esquemas().get(nombre)
+
+    if especificacion is None:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    if especificacion['indice'] is not None:
+        df = df.reset_index()
+    esquema = especificacion['esquema']
+    return pa.Table.from_pandas(df[esquema.names], schema=esquema, preserve_index=False)
+
+
+def guardar_parquet(df, nombre, directorio=DIRECTORIO_DATOS):
+    """Escribir un dataset en Parquet con su esquema tipado (si lo tiene)"""
+    _requerir_pyarrow()
+    ruta = ruta_parquet(nombre, directorio)
+    pq.write_table(_tabla(df, nombre), ruta, compression='zstd')
+    return ruta
+
+
+def abrir_escritor_parquet(nombre, primer_bloque, directorio=DIRECTORIO_DATOS):
+    """Escritor incremental: cada bloque posterior se agrega como un row group"""
+    _requerir_pyarrow()
+    tabla = _tabla(primer_bloque, nombre)
+    escritor = pq.ParquetWriter(ruta_parquet(nombre, directorio), tabla.schema, compression='zstd')
+    escritor.write_table(tabla)
+    return escritor
+
+
+def escribir_bloque_parquet(escritor, df, nombre):
+    """Agregar un bloque de filas a un escritor abierto con abrir_escritor_parquet"""
+    escritor.write_table(_tabla(df, nombre).cast(escritor.schema))
+
+
+def iterar_parquet(nombre, tamano_bloque, columnas=None, directorio=DIRECTORIO_DATOS):
+    """Leer un dataset en bloques de filas sin cargarlo completo en memoria"""
+    _requerir_pyarrow()
+    archivo = pq.ParquetFile(ruta_parquet(nombre, directorio), memory_map=True)
+    for lote in archivo.iter_batches(batch_size=tamano_bloque, columns=columnas):
+        yield lote.to_pandas()
+
+
+def leer_parquet(nombre, columnas=None, directorio=DIRECTORIO_DATOS, memory_map=True,
+                 con_indice=True):
+    """Leer un dataset leyendo solo las columnas pedidas, con mmap del archivo"""
+    _requerir_pyarrow()
+    tabla = pq.read_table(ruta_parquet(nombre, directorio), columns=columnas,
+                          memory_map=memory_map)
+    df = tabla.to_pandas()
+
+    especificacion = _esquemas().get(nombre)
+    if con_indice and especificacion and especificacion['indice'] in df.columns:
+        df = df.set_index(especificacion['indice'])
+    return df
+
+
+def describir_parquet(nombre, directorio=DIRECTORIO_DATOS):
+    """Filas y columnas desde los metadatos, sin leer los datos"""
+    _requerir_pyarrow()
+    metadatos = pq.read_metadata(ruta_parquet(nombre, directorio))
+    return metadatos.num_rows, metadatos.schema.to_arrow_schema().names
+
+
+def exportar_dataset(df, nombre, formatos=('csv', 'parquet'), index=False,
+                     directorio=DIRECTORIO_DATOS):
+    """Exportar un dataset en CSV y/o Parquet; Parquet se omite si falta pyarrow"""
+    rutas = []
+    if 'csv' in formatos:
+        ruta = os.path.join(directorio, f'{nombre}.csv')
+        df.to_csv(ruta, index=index, encoding='utf-8')
+        rutas.append(ruta)
+    if 'parquet' in formatos and pyarrow_disponible():
+        rutas.append(guardar_parquet(df, nombre, directorio))
+    return rutas
@@ -4,6 +4,8 @@ Análisis DCF y Gestión de Riesgo - Empresas Tecnológicas 2024-2025
 Valoración por descuento de flujos de caja y análisis de sensibilidad con datos reales
 """
 
+import argparse
+import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -12,12 +14,23 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+from salida_figuras import guardar_figura, parsear_argumentos
+from motor_dcf import proyectar_dcf_batch, superficie_sensibilidad
+from montecarlo_dcf import simular_dcf_montecarlo
+from escenarios_dcf import normalizar_escenarios, parametros_batch
+from cache_datos import memoizar, PARAMETROS_MERCADO
+from almacen_columnar import (exportar_dataset, abrir_escritor_parquet, escribir_bloque_parquet,
+                               iterar_parquet)
+from registro_empresas import crear_registro, fila, valores, codificar_categoricas
+from agregaciones import indexar_grupos, agregar, dividir
+
 # Configuración de estilo
 plt.style.use('seaborn-v0_8')
 sns.set_palette("viridis")
 plt.rcParams['figure.figsize'] = (15, 10)
 plt.rcParams['font.size'] = 11
 
+@memoizar
 def crear_datos_dcf_empresas():
     """Datos reales para análisis DCF de empresas tech específicas"""
     # Datos basados en reportes financieros reales 2024
@@ -64,16 +77,20 @@ def crear_datos_dcf_empresas():
             'DevOps/Monitoring'
         ]
     }
-    return pd.DataFrame(dcf_data)
+    return codificar_categoricas(pd.DataFrame(dcf_data))
 
-def crear_datos_wacc():
+@memoizar
+def crear_datos_wacc(df_empresas=None):
     """Cálculo de WACC para cada empresa con datos de mercado reales"""
-    # Datos de mercado actuales (enero 2025)
-    risk_free_rate = 0.0435  # T-Bill 10Y US Treasury
-    market_risk_premium = 0.065  # Prima de riesgo histórica
-    tax_rate = 0.21  # Tasa corporativa US
+    # Datos de mercado actuales (ver cache_datos.configurar_parametros_mercado)
+    risk_free_rate = PARAMETROS_MERCADO['risk_free_rate']
+    market_risk_premium = PARAMETROS_MERCADO['market_risk_premium']
+    tax_rate = PARAMETROS_MERCADO['tax_rate']
     
-    df = crear_datos_dcf_empresas()
+    if df_empresas is None:
+        df = crear_datos_dcf_empresas()
+    else:
+        df = df_empresas.copy()
     
     # Cálculo WACC por empresa
     df['Risk_Free_Rate'] = risk_free_rate
@@ -92,113 +109,263 @@ def crear_datos_wacc():
     
     return df
 
-def crear_proyecciones_dcf():
-    """Proyecciones DCF a 5 años con escenarios"""
-    df = crear_datos_wacc()
-    
-    # Parámetros de proyección por escenario
-    escenarios = {
-        'Conservador': {'growth_factor': 0.7, 'margin_factor': 0.9},
-        'Base': {'growth_factor': 1.0, 'margin_factor': 1.0},
-        'Optimista': {'growth_factor': 1.3, 'margin_factor': 1.1}
+# Parámetros de proyección por escenario
+ESCENARIOS_DCF = {
+    'Conservador': {'growth_factor': 0.7, 'margin_factor': 0.9},
+    'Base': {'growth_factor': 1.0, 'margin_factor': 1.0},
+    'Optimista': {'growth_factor': 1.3, 'margin_factor': 1.1}
+}
+
+COLUMNAS_PROYECCION = ['Enterprise_Value_M', 'WACC', 'Terminal_Value_M', 'PV_FCF_5Y_M',
+                       'Revenue_CAGR_%', 'Avg_EBITDA_Margin_%', 'Terminal_Valido']
+
+def proyectar_escenarios(revenue, growth_pct, margin_pct, wacc, escenarios=None, griegas=False):
+    """Valoración vectorizada empresas × escenarios × años a partir de arreglos
+
+    Todos los escenarios se evalúan juntos como un eje del motor (ver escenarios_dcf).
+    """
+    params = parametros_batch(ESCENARIOS_DCF if escenarios is None else escenarios)
+    return proyectar_dcf_batch(
+        revenue, growth_pct, margin_pct, wacc,
+        params['growth_factor'], params['margin_factor'],
+        terminal_growth=params['terminal_growth'],
+        decaimiento=params['decaimiento'],
+        conversion_fcf=params['conversion_fcf'],
+        margen_maximo=params['margen_maximo'],
+        griegas=griegas
+    )
+
+# Derivadas del EV por empresa y escenario (tasas en decimales, ver motor_dcf._griegas_dcf)
+COLUMNAS_GRIEGAS = ['dEV_dWACC', 'dEV_dTerminal_Growth', 'dEV_dGrowth', 'dEV_dMargin',
+                    'd2EV_dWACC2', 'd2EV_dTerminal_Growth2', 'd2EV_dGrowth2',
+                    'd2EV_dWACC_dTerminal_Growth', 'd2EV_dGrowth_dMargin']
+
+def proyecciones_a_dataframe(empresas, resultado, escenarios=None, columnas=COLUMNAS_PROYECCION):
+    """Construir el DataFrame de proyecciones una sola vez (orden empresa, escenario)
+
+    escenarios es el dict {nombre: parámetros} ya normalizado que produjo resultado.
+    """
+    escenarios = ESCENARIOS_DCF if escenarios is None else escenarios
+    proyecciones = {
+        'Empresa': np.repeat(np.asarray(empresas), len(escenarios)),
+        'Escenario': pd.Categorical(np.tile(list(escenarios.keys()), len(empresas)))
     }
+    for columna in columnas:
+        proyecciones[columna] = resultado[columna].ravel()
     
-    proyecciones = []
+    return pd.DataFrame(proyecciones)
+
+@memoizar
+def crear_valoracion_dcf(df_wacc=None, escenarios=None):
+    """Proyecciones DCF a 5 años y sus griegas en una sola pasada vectorizada
+
+    Devuelve {'proyecciones', 'griegas'}: ambos DataFrames salen del mismo
+    resultado de proyectar_escenarios(..., griegas=True).
+    """
+    df = crear_datos_wacc() if df_wacc is None else df_wacc
+    escenarios = normalizar_escenarios(ESCENARIOS_DCF if escenarios is None else escenarios)
+    
+    resultado = proyectar_escenarios(
+        df['Revenue_2024_M'].to_numpy(),
+        df['Revenue_Growth_3Y_%'].to_numpy(),
+        df['EBITDA_Margin_%'].to_numpy(),
+        df['WACC'].to_numpy(),
+        escenarios,
+        griegas=True
+    )
     
-    for empresa in df['Empresa']:
-        empresa_data = df[df['Empresa'] == empresa].iloc[0]
-        
-        for scenario, params in escenarios.items():
-            # Proyección de crecimiento decreciente
-            growth_base = empresa_data['Revenue_Growth_3Y_%'] / 100 * params['growth_factor']
-            growth_rates = [growth_base * (0.8 ** i) for i in range(5)]  # Decrecimiento exponencial
-            
-            # Proyección de ingresos
-            revenue_proj = [empresa_data['Revenue_2024_M']]
-            for i in range(5):
-                next_revenue = revenue_proj[-1] * (1 + growth_rates[i])
-                revenue_proj.append(next_revenue)
-            
-            # Proyección de márgenes (mejora gradual)
-            margin_improvement = 0.5 if empresa_data['EBITDA_Margin_%'] < 0 else 0.1
-            margins = []
-            base_margin = max(empresa_data['EBITDA_Margin_%'], -50) / 100  # Floor en -50%
-            
-            for i in range(5):
-                if base_margin < 0:
-                    improved_margin = base_margin + (margin_improvement * (i + 1) * params['margin_factor'])
-                else:
-                    improved_margin = min(base_margin * (1 + margin_improvement * params['margin_factor']), 0.6)
-                margins.append(improved_margin)
-            
-            # Cálculo FCF proyectado
-            fcf_projections = []
-            for i in range(1, 6):  # Años 1-5
-                revenue = revenue_proj[i]
-                ebitda = revenue * margins[i-1]
-                # Asumimos FCF = 80% de EBITDA (simplificación)
-                fcf = ebitda * 0.8
-                fcf_projections.append(fcf)
-            
-            # Valor terminal (año 5, crecimiento perpetuo 3%)
-            terminal_growth = 0.03
-            terminal_fcf = fcf_projections[-1] * (1 + terminal_growth)
-            terminal_value = terminal_fcf / (empresa_data['WACC'] - terminal_growth)
+    empresas = df['Empresa'].to_numpy()
+    return {
+        'proyecciones': proyecciones_a_dataframe(empresas, resultado, escenarios),
+        'griegas': proyecciones_a_dataframe(empresas, resultado, escenarios,
+                                            ['Enterprise_Value_M'] + COLUMNAS_GRIEGAS)
+    }
+
+def crear_proyecciones_dcf(df_wacc=None, escenarios=None):
+    """Proyecciones DCF a 5 años con escenarios
+
+    escenarios: {nombre: parámetros} o lista de dicts con 'Escenario' (p.ej. de
+    escenarios_dcf.cargar_escenarios); por defecto ESCENARIOS_DCF.
+    """
+    return crear_valoracion_dcf(df_wacc, escenarios)['proyecciones']
+
+def crear_griegas_dcf(df_wacc=None, escenarios=None):
+    """Sensibilidades de primer y segundo orden del EV de crear_proyecciones_dcf
+
+    Derivadas cerradas respecto de WACC, crecimiento terminal, crecimiento base y
+    margen base, calculadas en la misma pasada vectorizada que la valoración
+    (ver crear_valoracion_dcf).
+    """
+    return crear_valoracion_dcf(df_wacc, escenarios)['griegas']
+
+# Empresas por bloque en el modo streaming de proyecciones
+TAMANO_BLOQUE_PROYECCIONES = 50_000
+
+def _bloques_fundamentales(fuente, tamano_bloque):
+    """Fundamentales por bloques desde un DataFrame, un CSV o un Parquet"""
+    if isinstance(fuente, pd.DataFrame):
+        for inicio in range(0, len(fuente), tamano_bloque):
+            yield fuente.iloc[inicio:inicio + tamano_bloque]
+    elif str(fuente).endswith('.parquet'):
+        directorio, archivo = os.path.split(fuente)
+        yield from iterar_parquet(os.path.splitext(archivo)[0], tamano_bloque,
+                                  directorio=directorio or '.')
+    else:
+        yield from pd.read_csv(fuente, chunksize=tamano_bloque)
+
+def exportar_proyecciones_dcf_por_bloques(fuente=None, nombre='proyecciones_dcf_2024', formato='csv',
+                                          tamano_bloque=TAMANO_BLOQUE_PROYECCIONES, directorio='datos',
+                                          escenarios=None):
+    """Proyecciones DCF en modo streaming: valuar y escribir bloque a bloque
+
+    fuente es un DataFrame, CSV o Parquet con el esquema de crear_datos_dcf_empresas
+    (o de crear_datos_wacc si ya trae WACC). La memoria pico depende de tamano_bloque,
+    no del tamaño del universo.
+    """
+    if formato not in ('csv', 'parquet'):
+        raise ValueError(f"Formato desconocido: {formato}")
+    fuente = crear_datos_dcf_empresas() if fuente is None else fuente
+    escenarios = normalizar_escenarios(ESCENARIOS_DCF if escenarios is None else escenarios)
+    
+    # Sin memoización: cada bloque se descarta apenas se escribe
+    calcular_wacc = crear_datos_wacc.__wrapped__
+    
+    ruta = os.path.join(directorio, f'{nombre}.{formato}')
+    archivo = open(ruta, 'w', encoding='utf-8', newline='') if formato == 'csv' else None
+    escritor = None
+    filas = bloques = 0
+    try:
+        for bloque in _bloques_fundamentales(fuente, tamano_bloque):
+            df_wacc = bloque if 'WACC' in bloque.columns else calcular_wacc(bloque)
+            resultado = proyectar_escenarios(
+                df_wacc['Revenue_2024_M'].to_numpy(),
+                df_wacc['Revenue_Growth_3Y_%'].to_numpy(),
+                df_wacc['EBITDA_Margin_%'].to_numpy(),
+                df_wacc['WACC'].to_numpy(),
+                escenarios
+            )
+            df_bloque = proyecciones_a_dataframe(df_wacc['Empresa'].to_numpy(), resultado,
+                                                 escenarios)
             
-            # Valor presente
-            wacc = empresa_data['WACC']
-            pv_fcf = sum([fcf / ((1 + wacc) ** (i+1)) for i, fcf in enumerate(fcf_projections)])
-            pv_terminal = terminal_value / ((1 + wacc) ** 5)
-            enterprise_value = pv_fcf + pv_terminal
+            if archivo is not None:
+                df_bloque.to_csv(archivo, header=bloques == 0, index=False)
+            elif escritor is None:
+                escritor = abrir_escritor_parquet(nombre, df_bloque, directorio)
+            else:
+                escribir_bloque_parquet(escritor, df_bloque, nombre)
             
-            proyecciones.append({
-                'Empresa': empresa,
-                'Escenario': scenario,
-                'Enterprise_Value_M': enterprise_value,
-                'WACC': wacc,
-                'Terminal_Value_M': terminal_value,
-                'PV_FCF_5Y_M': pv_fcf,
-                'Revenue_CAGR_%': np.mean(growth_rates) * 100,
-                'Avg_EBITDA_Margin_%': np.mean(margins) * 100
-            })
-    
-    return pd.DataFrame(proyecciones)
+            filas += len(df_bloque)
+            bloques += 1
+    finally:
+        if archivo is not None:
+            archivo.close()
+        if escritor is not None:
+            escritor.close()
+    
+    return {'ruta': ruta, 'filas': filas, 'bloques': bloques}
 
-def crear_analisis_sensibilidad():
-    """Análisis de sensibilidad WACC vs Growth Rate"""
-    df_base = crear_datos_wacc()
-    
-    # Empresas para análisis detallado
-    empresas_foco = ['Microsoft', 'NVIDIA', 'Tesla', 'Palantir', 'Snowflake']
-    
-    # Rangos de sensibilidad
-    wacc_range = np.arange(0.06, 0.16, 0.01)  # 6% to 15%
-    growth_range = np.arange(0.01, 0.06, 0.005)  # 1% to 5%
+# Empresas para análisis detallado
+EMPRESAS_FOCO = ['Microsoft', 'NVIDIA', 'Tesla', 'Palantir', 'Snowflake']
+
+# Rangos de sensibilidad por defecto
+WACC_RANGE = np.arange(0.06, 0.16, 0.01)  # 6% to 15%
+GROWTH_RANGE = np.arange(0.01, 0.06, 0.005)  # 1% to 5%
+
+def valuar_superficie(revenue, fcf, wacc_range, growth_range):
+    """EV, múltiplo EV/Revenue y máscara de validez sobre la grilla WACC × g
+
+    El FCF base es de al menos 10% del revenue; las celdas con WACC <= g no tienen
+    valor perpetuo definido, quedan en NaN y marcadas como inválidas.
+    """
+    base_fcf = np.maximum(fcf, revenue * 0.1)
+    
+    # DCF simplificado: FCF base / (WACC - g) sobre toda la grilla
+    ev, valido = superficie_sensibilidad(base_fcf, wacc_range, growth_range)
+    return ev, ev / revenue[:, None, None], valido
+
+@memoizar
+def crear_superficie_sensibilidad(empresas=None, wacc_range=None, growth_range=None, df_wacc=None):
+    """Superficie de sensibilidad WACC vs Growth como arreglo denso 3-D"""
+    df_base = crear_datos_wacc() if df_wacc is None else df_wacc
+    
+    empresas = list(EMPRESAS_FOCO if empresas is None else empresas)
+    wacc_range = np.asarray(WACC_RANGE if wacc_range is None else wacc_range, dtype=float)
+    growth_range = np.asarray(GROWTH_RANGE if growth_range is None else growth_range, dtype=float)
+    
+    registro = crear_registro(df_base)
+    revenue = valores(registro, empresas, 'Revenue_2024_M').astype(float)
+    fcf = valores(registro, empresas, 'FCF_Actual_2024_M').astype(float)
+    ev, multiplo, valido = valuar_superficie(revenue, fcf, wacc_range, growth_range)
+    
+    return {
+        'Empresa': np.array(empresas),
+        'WACC': wacc_range,
+        'Growth_Rate': growth_range,
+        'Enterprise_Value_M': ev,
+        'Multiple_Revenue': multiplo,
+        'Valido': valido
+    }
+
+def superficie_a_dataframe(superficie):
+    """Formato largo de una superficie: todas las celdas, con la columna Valido"""
+    ev = superficie['Enterprise_Value_M']
+    n_emp, n_wacc, n_growth = ev.shape
+    
+    return pd.DataFrame({
+        'Empresa': np.repeat(superficie['Empresa'], n_wacc * n_growth),
+        'WACC': np.tile(np.repeat(superficie['WACC'], n_growth), n_emp),
+        'Growth_Rate': np.tile(superficie['Growth_Rate'], n_emp * n_wacc),
+        'Enterprise_Value_M': ev.ravel(),
+        'Multiple_Revenue': superficie['Multiple_Revenue'].ravel(),
+        'Valido': np.tile(superficie['Valido'].ravel(), n_emp)
+    })
+
+def superficie_desde_dataframe(df):
+    """Superficie densa (empresas × WACC × growth) a partir del formato largo"""
+    i_emp, empresas = pd.factorize(df['Empresa'])
+    i_wacc, wacc = pd.factorize(df['WACC'], sort=True)
+    i_growth, growth = pd.factorize(df['Growth_Rate'], sort=True)
+    
+    superficie = {
+        'Empresa': np.asarray(empresas),
+        'WACC': np.asarray(wacc, dtype=float),
+        'Growth_Rate': np.asarray(growth, dtype=float)
+    }
+    for columna in ['Enterprise_Value_M', 'Multiple_Revenue']:
+        valores = np.full((len(empresas), len(wacc), len(growth)), np.nan)
+        valores[i_emp, i_wacc, i_growth] = df[columna].to_numpy(dtype=float)
+        superficie[columna] = valores
+    
+    # La validez depende solo de la celda WACC × g
+    valido = np.zeros((len(wacc), len(growth)), dtype=bool)
+    valido[i_wacc, i_growth] = (df['Valido'].to_numpy(dtype=bool) if 'Valido' in df.columns
+                                else ~np.isnan(df['Enterprise_Value_M'].to_numpy(dtype=float)))
+    superficie['Valido'] = valido
+    
+    return superficie
+
+def crear_analisis_sensibilidad(empresas=None, wacc_range=None, growth_range=None, formato='largo',
+                                df_wacc=None):
+    """Análisis de sensibilidad WACC vs Growth Rate
+
+    formato='largo' devuelve un DataFrame (una fila por celda, con la columna Valido);
+    formato='arreglo' devuelve la superficie densa de crear_superficie_sensibilidad.
+    """
+    superficie = crear_superficie_sensibilidad(empresas, wacc_range, growth_range, df_wacc)
     
-    sensibilidad_data = []
+    if formato == 'arreglo':
+        return superficie
+    if formato != 'largo':
+        raise ValueError(f"Formato desconocido: {formato}")
     
-    for empresa in empresas_foco:
-        empresa_data = df_base[df_base['Empresa'] == empresa].iloc[0]
-        base_fcf = max(empresa_data['FCF_Actual_2024_M'], empresa_data['Revenue_2024_M'] * 0.1)
-        
-        for wacc in wacc_range:
-            for growth in growth_range:
-                # DCF simplificado: FCF base / (WACC - g)
-                if wacc > growth:
-                    ev = base_fcf / (wacc - growth)
-                    sensibilidad_data.append({
-                        'Empresa': empresa,
-                        'WACC': wacc,
-                        'Growth_Rate': growth,
-                        'Enterprise_Value_M': ev,
-                        'Multiple_Revenue': ev / empresa_data['Revenue_2024_M']
-                    })
-    
-    return pd.DataFrame(sensibilidad_data)
-
-def generar_grafico_dcf_valoraciones():
+    return superficie_a_dataframe(superficie)
+
+def generar_grafico_dcf_valoraciones(df=None, df_wacc=None):
     """Gráfico de valoraciones DCF por escenario"""
-    df = crear_proyecciones_dcf()
+    if df is None:
+        df = crear_proyecciones_dcf()
+    if df_wacc is None:
+        df_wacc = crear_datos_wacc()
     
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(18, 14))
     
@@ -211,10 +378,10 @@ def generar_grafico_dcf_valoraciones():
     width = 0.25
     
     colors = ['#FF6B6B', '#4ECDC4', '#45B7D1']
+    registro = crear_registro(df_muestra, ('Empresa', 'Escenario'))
     for i, scenario in enumerate(scenarios):
-        data = df_muestra[df_muestra['Escenario'] == scenario]
-        values = [data[data['Empresa'] == emp]['Enterprise_Value_M'].values[0]/1000 
-                 for emp in empresas_muestra]
+        values = valores(registro, [(emp, scenario) for emp in empresas_muestra],
+                         'Enterprise_Value_M') / 1000
         
         ax1.bar(x + i*width, values, width, label=scenario, color=colors[i], alpha=0.8)
     
@@ -227,7 +394,6 @@ def generar_grafico_dcf_valoraciones():
     ax1.grid(axis='y', alpha=0.3)
     
     # Gráfico 2: WACC vs Expected Return
-    df_wacc = crear_datos_wacc()
     scatter = ax2.scatter(df_wacc['WACC']*100, df_wacc['Revenue_Growth_3Y_%'], 
                          s=df_wacc['Revenue_2024_M']/2000, 
                          c=df_wacc['Beta'], cmap='viridis', alpha=0.7)
@@ -244,8 +410,9 @@ def generar_grafico_dcf_valoraciones():
     
     # Empresas destacadas
     empresas_destacadas = ['NVIDIA', 'Tesla', 'Palantir']
+    registro_wacc = crear_registro(df_wacc)
     for empresa in empresas_destacadas:
-        row = df_wacc[df_wacc['Empresa'] == empresa].iloc[0]
+        row = fila(registro_wacc, empresa)
         ax2.annotate(empresa, (row['WACC']*100, row['Revenue_Growth_3Y_%']),
                     xytext=(5, 5), textcoords='offset points', fontsize=9,
                     bbox=dict(boxstyle="round,pad=0.3", facecolor='white', alpha=0.8))
@@ -292,44 +459,43 @@ def generar_grafico_dcf_valoraciones():
                         bbox=dict(boxstyle="round,pad=0.3", facecolor='white', alpha=0.8))
     
     plt.tight_layout()
-    plt.savefig('figuras/analisis_dcf_valoraciones.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    guardar_figura(fig, 'figuras/analisis_dcf_valoraciones.png')
     
     return df
 
-def generar_analisis_sensibilidad_visual():
-    """Heatmaps de análisis de sensibilidad"""
-    df = crear_analisis_sensibilidad()
+def generar_analisis_sensibilidad_visual(df=None, superficie=None):
+    """Heatmaps de análisis de sensibilidad
+
+    Consume la superficie densa (empresas × WACC × growth) directamente; un DataFrame
+    en formato largo se convierte una sola vez con superficie_desde_dataframe.
+    """
+    if superficie is None:
+        superficie = (crear_analisis_sensibilidad(formato='arreglo') if df is None
+                      else superficie_desde_dataframe(df))
     
     fig, axes = plt.subplots(2, 3, figsize=(20, 12))
     axes = axes.flatten()
     
-    empresas_foco = df['Empresa'].unique()
+    empresas_foco = superficie['Empresa']
+    wacc_vals = superficie['WACC']
+    growth_vals = superficie['Growth_Rate']
+    
+    # Cap en 50x para visualización; celdas inválidas (WACC <= g) en 0
+    heatmaps = np.where(superficie['Valido'], np.minimum(superficie['Multiple_Revenue'], 50), 0.0)
+    
+    # Etiquetas cada 2 valores en grillas chicas, ~10 por eje en grillas grandes
+    paso_wacc = max(2, len(wacc_vals) // 10)
+    paso_growth = max(2, len(growth_vals) // 10)
     
     for i, empresa in enumerate(empresas_foco):
-        data_empresa = df[df['Empresa'] == empresa]
-        
-        # Crear matriz para heatmap
-        wacc_vals = sorted(data_empresa['WACC'].unique())
-        growth_vals = sorted(data_empresa['Growth_Rate'].unique())
-        
-        heatmap_data = np.zeros((len(wacc_vals), len(growth_vals)))
-        
-        for j, wacc in enumerate(wacc_vals):
-            for k, growth in enumerate(growth_vals):
-                val = data_empresa[(data_empresa['WACC'] == wacc) & 
-                                 (data_empresa['Growth_Rate'] == growth)]['Multiple_Revenue'].values
-                if len(val) > 0:
-                    heatmap_data[j, k] = min(val[0], 50)  # Cap en 50x para visualización
-        
         # Crear heatmap
-        im = axes[i].imshow(heatmap_data, cmap='RdYlBu_r', aspect='auto')
+        im = axes[i].imshow(heatmaps[i], cmap='RdYlBu_r', aspect='auto')
         
         # Configurar ejes
-        axes[i].set_xticks(range(0, len(growth_vals), 2))
-        axes[i].set_xticklabels([f'{g:.1%}' for g in growth_vals[::2]])
-        axes[i].set_yticks(range(0, len(wacc_vals), 2))
-        axes[i].set_yticklabels([f'{w:.1%}' for w in wacc_vals[::2]])
+        axes[i].set_xticks(range(0, len(growth_vals), paso_growth))
+        axes[i].set_xticklabels([f'{g:.1%}' for g in growth_vals[::paso_growth]])
+        axes[i].set_yticks(range(0, len(wacc_vals), paso_wacc))
+        axes[i].set_yticklabels([f'{w:.1%}' for w in wacc_vals[::paso_wacc]])
         
         axes[i].set_xlabel('Growth Rate', fontweight='bold')
         axes[i].set_ylabel('WACC', fontweight='bold')
@@ -346,17 +512,17 @@ def generar_analisis_sensibilidad_visual():
     plt.suptitle('Análisis de Sensibilidad: WACC vs Growth Rate\nImpacto en Múltiplos EV/Revenue', 
                  fontsize=16, fontweight='bold')
     plt.tight_layout()
-    plt.savefig('figuras/sensibilidad_wacc_growth.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    guardar_figura(fig, 'figuras/sensibilidad_wacc_growth.png')
     
-    return df
+    return superficie if df is None else df
 
-def crear_analisis_riesgo_sectorial():
+@memoizar
+def crear_analisis_riesgo_sectorial(df_wacc=None):
     """Análisis de riesgo por sector tecnológico"""
-    df = crear_datos_wacc()
+    df = crear_datos_wacc() if df_wacc is None else df_wacc
     
-    # Agrupar por sector y calcular métricas de riesgo
-    sector_risk = df.groupby('Sector_Detail').agg({
+    # Agrupar por sector y calcular métricas de riesgo (columnas aplanadas: Beta_mean, ...)
+    sector_risk = agregar(indexar_grupos(df, 'Sector_Detail'), df, {
         'Beta': ['mean', 'std'],
         'WACC': ['mean', 'std'],
         'Debt_to_Equity': 'mean',
@@ -365,9 +531,6 @@ def crear_analisis_riesgo_sectorial():
         'FCF_Actual_2024_M': 'sum'
     }).round(3)
     
-    # Flatten column names
-    sector_risk.columns = [f"{col[0]}_{col[1]}" if col[1] != '' else col[0] for col in sector_risk.columns]
-    
     # Calcular score de riesgo compuesto
     sector_risk['Risk_Score'] = (
         sector_risk['Beta_mean'] * 0.3 +
@@ -384,10 +547,12 @@ def crear_analisis_riesgo_sectorial():
     
     return sector_risk
 
-def generar_dashboard_riesgo():
+def generar_dashboard_riesgo(df_riesgo=None, df_base=None):
     """Dashboard comprehensivo de análisis de riesgo"""
-    df_riesgo = crear_analisis_riesgo_sectorial()
-    df_base = crear_datos_wacc()
+    if df_riesgo is None:
+        df_riesgo = crear_analisis_riesgo_sectorial()
+    if df_base is None:
+        df_base = crear_datos_wacc()
     
     fig = plt.figure(figsize=(20, 12))
     gs = fig.add_gridspec(3, 3, hspace=0.3, wspace=0.3)
@@ -410,10 +575,10 @@ def generar_dashboard_riesgo():
     
     # 2. Distribución de Beta por sector
     ax2 = fig.add_subplot(gs[0, 1])
-    betas_por_sector = df_base.groupby('Sector_Detail')['Beta'].apply(list)
+    por_sector = indexar_grupos(df_base, 'Sector_Detail')
     
-    box_data = [betas_por_sector[sector] for sector in betas_por_sector.index]
-    bp = ax2.boxplot(box_data, labels=[s.split()[0] for s in betas_por_sector.index], patch_artist=True)
+    box_data = dividir(por_sector, df_base['Beta'])
+    bp = ax2.boxplot(box_data, labels=[s.split()[0] for s in por_sector['grupos']], patch_artist=True)
     
     colors = plt.cm.Set3(np.linspace(0, 1, len(bp['boxes'])))
     for patch, color in zip(bp['boxes'], colors):
@@ -504,16 +669,16 @@ def generar_dashboard_riesgo():
     ax6.grid(axis='x', alpha=0.3)
     
     plt.suptitle('Dashboard de Análisis de Riesgo - Empresas Tecnológicas', fontsize=16, fontweight='bold')
-    plt.savefig('figuras/dashboard_analisis_riesgo.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    guardar_figura(fig, 'figuras/dashboard_analisis_riesgo.png')
     
     return df_riesgo, df_base
 
-def crear_resumen_dcf():
+def crear_resumen_dcf(montecarlo=False, n_paths=1_000_000):
     """Crear resumen ejecutivo del análisis DCF"""
     df_proyecciones = crear_proyecciones_dcf()
     df_wacc = crear_datos_wacc()
     df_riesgo = crear_analisis_riesgo_sectorial()
+    df_griegas = crear_griegas_dcf()
     
     print("\n" + "="*100)
     print("ANÁLISIS DCF Y GESTIÓN DE RIESGO - EMPRESAS TECNOLÓGICAS")
@@ -547,6 +712,23 @@ def crear_resumen_dcf():
     for i, (empresa, std) in enumerate(variabilidad.head(5).items()):
         print(f"{i+1}. {empresa}: ±${std/1000:.1f}B")
     
+    # Sensibilidad del EV a +100 pb de WACC (aproximación de segundo orden)
+    print(f"\n📐 SENSIBILIDAD DEL EV A +100 PB DE WACC (ESCENARIO BASE):")
+    base = df_griegas[df_griegas['Escenario'] == 'Base'].copy()
+    base['Delta_EV_M'] = base['dEV_dWACC'] * 0.01 + 0.5 * base['d2EV_dWACC2'] * 0.01**2
+    base['Delta_EV_%'] = base['Delta_EV_M'] / base['Enterprise_Value_M'] * 100
+    for _, row in base.nsmallest(5, 'Delta_EV_%').iterrows():
+        print(f"  {row['Empresa']}: {row['Delta_EV_%']:+.1f}% (${row['Delta_EV_M']/1000:+.1f}B)")
+    
+    # Distribución Monte Carlo de valoraciones
+    df_montecarlo = None
+    if montecarlo:
+        df_montecarlo = simular_dcf_montecarlo(df_wacc, n_paths=n_paths)
+        print(f"\n🎲 DISTRIBUCIÓN MONTE CARLO ({n_paths:,} trayectorias por empresa):")
+        for _, row in df_montecarlo.nlargest(5, 'EV_P50_M').iterrows():
+            print(f"  {row['Empresa']}: P5 ${row['EV_P5_M']/1000:.1f}B | "
+                  f"P50 ${row['EV_P50_M']/1000:.1f}B | P95 ${row['EV_P95_M']/1000:.1f}B")
+    
     # Análisis de riesgo sectorial
     print(f"\n⚠️ ANÁLISIS DE RIESGO POR SECTOR:")
     riesgo_ranking = df_riesgo.sort_values('Risk_Score', ascending=False)
@@ -579,18 +761,27 @@ def crear_resumen_dcf():
     for empresa in balanceado['Empresa'].head(3):
         print(f"  • {empresa}")
     
-    # Guardar datos
-    df_proyecciones.to_csv('datos/proyecciones_dcf_2024.csv', index=False, encoding='utf-8')
-    df_wacc.to_csv('datos/analisis_wacc_empresas.csv', index=False, encoding='utf-8')
-    df_riesgo.to_csv('datos/riesgo_sectorial_tech.csv', index=True, encoding='utf-8')
+    # Guardar datos (CSV y, si pyarrow está disponible, Parquet tipado)
+    archivos = []
+    archivos += exportar_dataset(df_proyecciones, 'proyecciones_dcf_2024')
+    archivos += exportar_dataset(df_griegas, 'griegas_dcf_2024')
+    archivos += exportar_dataset(df_wacc, 'analisis_wacc_empresas')
+    archivos += exportar_dataset(df_riesgo, 'riesgo_sectorial_tech', index=True)
+    if df_montecarlo is not None:
+        archivos += exportar_dataset(df_montecarlo, 'montecarlo_dcf_2024', formatos=('csv',))
     
     print(f"\n💾 ARCHIVOS GUARDADOS:")
-    print(f"  • datos/proyecciones_dcf_2024.csv")
-    print(f"  • datos/analisis_wacc_empresas.csv")
-    print(f"  • datos/riesgo_sectorial_tech.csv")
+    for archivo in archivos:
+        print(f"  • {archivo}")
 
 def main():
     """Función principal del análisis DCF y riesgo"""
+    parser = argparse.ArgumentParser(description='Análisis DCF y gestión de riesgo')
+    parser.add_argument('--montecarlo', action='store_true',
+                        help='Agregar al resumen la distribución Monte Carlo del EV')
+    parser.add_argument('--paths', type=int, default=1_000_000,
+                        help='Trayectorias Monte Carlo por empresa')
+    args = parsear_argumentos('Análisis DCF y gestión de riesgo', parser)
     
     print("Iniciando análisis DCF y gestión de riesgo...")
     print("Datos: Reportes financieros 2024, tasas de mercado actuales\n")
@@ -606,7 +797,7 @@ def main():
     df_riesgo, df_empresas = generar_dashboard_riesgo()
     
     print("4. Compilando resumen ejecutivo...")
-    crear_resumen_dcf()
+    crear_resumen_dcf(montecarlo=args.montecarlo, n_paths=args.paths)
     
     print("\n" + "="*100)
     print("ANÁLISIS DCF Y RIESGO COMPLETADO")
@@ -616,8 +807,11 @@ def main():
     print("  - figuras/sensibilidad_wacc_growth.png")
     print("  - figuras/dashboard_analisis_riesgo.png")
     print("  - datos/proyecciones_dcf_2024.csv")
+    print("  - datos/griegas_dcf_2024.csv")
     print("  - datos/analisis_wacc_empresas.csv")
     print("  - datos/riesgo_sectorial_tech.csv")
+    if args.montecarlo:
+        print("  - datos/montecarlo_dcf_2024.csv")
     print("\nAnálisis basado en datos financieros reales y parámetros de mercado actuales.")
 
 if __name__ == "__main__":
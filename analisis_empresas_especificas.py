@@ -12,6 +12,11 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+from salida_figuras import guardar_figura, parsear_argumentos
+from indice_pares import crear_pares_empresas
+from registro_empresas import crear_frame_consolidado, crear_registro, contiene, fila, valor
+from regresiones import ajustar_tendencia
+
 # Configuración de estilo
 plt.style.use('seaborn-v0_8')
 sns.set_palette("Set2")
@@ -119,9 +124,10 @@ def crear_datos_ai_impact():
     df['Crecimiento_Valoracion_%'] = ((df['Valoracion_Post_AI_2024_B'] / df['Valoracion_Pre_AI_2022_B']) - 1) * 100
     return df
 
-def generar_grafico_empresas_lideres():
+def generar_grafico_empresas_lideres(df=None):
     """Gráfico de análisis de empresas tech líderes"""
-    df = crear_datos_empresas_lideres()
+    if df is None:
+        df = crear_datos_empresas_lideres()
     
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(18, 14))
     
@@ -142,9 +148,10 @@ def generar_grafico_empresas_lideres():
     
     # Añadir etiquetas para empresas destacadas
     empresas_destacadas = ['NVIDIA', 'Microsoft', 'Apple', 'Amazon', 'Palantir']
+    registro = crear_registro(df)
     for empresa in empresas_destacadas:
-        if empresa in df['Empresa'].values:
-            row = df[df['Empresa'] == empresa].iloc[0]
+        if contiene(registro, empresa):
+            row = fila(registro, empresa)
             ax1.annotate(empresa, (row['EV_Revenue_Multiple'], row['Market_Cap_B']),
                         xytext=(5, 5), textcoords='offset points', fontsize=9,
                         bbox=dict(boxstyle="round,pad=0.3", facecolor='white', alpha=0.8))
@@ -160,9 +167,8 @@ def generar_grafico_empresas_lideres():
     ax2.grid(True, alpha=0.3)
     
     # Línea de tendencia
-    z = np.polyfit(df['EV_Revenue_Multiple'], df['EV_EBITDA_Multiple'], 1)
-    p = np.poly1d(z)
-    ax2.plot(df['EV_Revenue_Multiple'], p(df['EV_Revenue_Multiple']), 
+    tendencia = ajustar_tendencia(df['EV_Revenue_Multiple'], df['EV_EBITDA_Multiple'])
+    ax2.plot(df['EV_Revenue_Multiple'], tendencia['ajustados'], 
              "r--", alpha=0.8, linewidth=2)
     
     # Gráfico 3: Análisis por Sector
@@ -198,19 +204,19 @@ def generar_grafico_empresas_lideres():
     ax4.grid(True, alpha=0.3)
     
     # Correlación
-    corr = np.corrcoef(df['Revenue_Growth_%'], df['EV_Revenue_Multiple'])[0,1]
+    corr = ajustar_tendencia(df['Revenue_Growth_%'], df['EV_Revenue_Multiple'])['correlacion']
     ax4.text(0.05, 0.95, f'Correlación: {corr:.3f}', transform=ax4.transAxes,
              bbox=dict(boxstyle="round", facecolor='wheat', alpha=0.8))
     
     plt.tight_layout()
-    plt.savefig('figuras/analisis_empresas_lideres.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    guardar_figura(fig, 'figuras/analisis_empresas_lideres.png')
     
     return df
 
-def generar_grafico_ai_impact():
+def generar_grafico_ai_impact(df=None):
     """Gráfico del impacto de AI en valoraciones"""
-    df = crear_datos_ai_impact()
+    if df is None:
+        df = crear_datos_ai_impact()
     
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
     
@@ -251,13 +257,12 @@ def generar_grafico_ai_impact():
     ax2.grid(True, alpha=0.3)
     
     # Línea de tendencia
-    z = np.polyfit(df['AI_Exposure_Score'], df['Crecimiento_Valoracion_%'], 1)
-    p = np.poly1d(z)
-    ax2.plot(df['AI_Exposure_Score'], p(df['AI_Exposure_Score']), 
+    tendencia = ajustar_tendencia(df['AI_Exposure_Score'], df['Crecimiento_Valoracion_%'])
+    ax2.plot(df['AI_Exposure_Score'], tendencia['ajustados'], 
              "r--", alpha=0.8, linewidth=2)
     
     # Correlación
-    corr = np.corrcoef(df['AI_Exposure_Score'], df['Crecimiento_Valoracion_%'])[0,1]
+    corr = tendencia['correlacion']
     ax2.text(0.05, 0.95, f'Correlación: {corr:.3f}', transform=ax2.transAxes,
              bbox=dict(boxstyle="round", facecolor='wheat', alpha=0.8))
     
@@ -270,14 +275,14 @@ def generar_grafico_ai_impact():
                         bbox=dict(boxstyle="round,pad=0.3", facecolor='white', alpha=0.8))
     
     plt.tight_layout()
-    plt.savefig('figuras/impacto_ai_valoraciones.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    guardar_figura(fig, 'figuras/impacto_ai_valoraciones.png')
     
     return df
 
-def generar_grafico_modelos_negocio():
+def generar_grafico_modelos_negocio(df=None):
     """Comparación de modelos de negocio"""
-    df = crear_datos_saas_vs_tradicional()
+    if df is None:
+        df = crear_datos_saas_vs_tradicional()
     
     fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 6))
     
@@ -331,8 +336,7 @@ def generar_grafico_modelos_negocio():
                 f'{height:.2f}', ha='center', va='bottom', fontweight='bold')
     
     plt.tight_layout()
-    plt.savefig('figuras/comparacion_modelos_negocio.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    guardar_figura(fig, 'figuras/comparacion_modelos_negocio.png')
     
     return df
 
@@ -343,6 +347,7 @@ def crear_tabla_resumen():
     df_empresas = crear_datos_empresas_lideres()
     df_ai = crear_datos_ai_impact()
     df_modelos = crear_datos_saas_vs_tradicional()
+    registro_ai = crear_registro(df_ai)
     
     print("\n" + "="*90)
     print("RESUMEN EJECUTIVO - ANÁLISIS DE EMPRESAS TECNOLÓGICAS ESPECÍFICAS")
@@ -365,9 +370,21 @@ def crear_tabla_resumen():
     mayor_crecimiento = df_modelos.loc[df_modelos['Crecimiento_Revenue_%'].idxmax()]
     print(f"Modelo con mayor crecimiento: {mayor_crecimiento['Modelo_Negocio']} ({mayor_crecimiento['Crecimiento_Revenue_%']:.0f}%)")
     
+    # NVIDIA frente a sus pares más similares del índice KD (indice_pares)
+    consolidado = crear_frame_consolidado()
+    multiplos = (consolidado['EV_Revenue_Multiple_lideres']
+                 .combine_first(consolidado['EV_Revenue_Multiple_global'])
+                 .set_axis(consolidado['Empresa']))
+    pares = crear_pares_empresas(consolidado)
+    multiplos_pares = multiplos.reindex(pares.loc[pares['Empresa'] == 'NVIDIA', 'Par']).dropna()
+    if len(multiplos_pares):
+        comparacion = f"vs {multiplos_pares.mean():.1f}x de sus {len(multiplos_pares)} pares más similares"
+    else:
+        comparacion = "sin pares comparables"
+
     print(f"\n🎯 HALLAZGOS CLAVE:")
-    print(f"  • Los semiconductores dominan en múltiplos (promedio {df_empresas[df_empresas['Sector'] == 'Semiconductors']['EV_Revenue_Multiple'].mean():.1f}x)")
-    print(f"  • NVIDIA lidera el crecimiento impulsado por AI (+{df_ai[df_ai['Empresa'] == 'NVIDIA']['Crecimiento_Valoracion_%'].values[0]:.0f}%)")
+    print(f"  • Los semiconductores dominan en múltiplos (NVIDIA {multiplos['NVIDIA']:.1f}x {comparacion})")
+    print(f"  • NVIDIA lidera el crecimiento impulsado por AI (+{valor(registro_ai, 'NVIDIA', 'Crecimiento_Valoracion_%'):.0f}%)")
     print(f"  • SaaS mantiene múltiplos premium vs modelos tradicionales")
     print(f"  • Correlación positiva entre exposición AI y crecimiento de valoración")
     
@@ -383,6 +400,7 @@ def crear_tabla_resumen():
 
 def main():
     """Función principal del análisis de empresas específicas"""
+    parsear_argumentos('Análisis de empresas tecnológicas específicas')
     
     print("Iniciando análisis de empresas tecnológicas específicas...")
     print("Datos basados en fuentes verificables: multiples.vc, Damodaran, mercados públicos\n")
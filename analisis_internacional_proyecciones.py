@@ -12,6 +12,12 @@ from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+from salida_figuras import guardar_figura, parsear_argumentos
+from almacen_columnar import exportar_dataset
+from registro_empresas import crear_registro, contiene, fila, codificar_categoricas
+from agregaciones import indexar_grupos, agregar, dividir
+from regresiones import regresion_por_grupo
+
 # Configuración de estilo
 plt.style.use('seaborn-v0_8')
 sns.set_palette("tab10")
@@ -87,7 +93,7 @@ def crear_datos_empresas_globales():
             5, 3, 3, 3, 2, 3
         ]
     }
-    return pd.DataFrame(global_data)
+    return codificar_categoricas(pd.DataFrame(global_data))
 
 def crear_proyecciones_mercado_2025_2030():
     """Proyecciones de mercado por sector y región 2025-2030"""
@@ -117,12 +123,13 @@ def crear_proyecciones_mercado_2025_2030():
     }
     return pd.DataFrame(proyecciones)
 
-def crear_analisis_regional():
+def crear_analisis_regional(df_global=None):
     """Análisis comparativo por región"""
-    df_global = crear_datos_empresas_globales()
+    if df_global is None:
+        df_global = crear_datos_empresas_globales()
     
-    # Análisis por región
-    regional_analysis = df_global.groupby('Region').agg({
+    # Análisis por región (columnas aplanadas: Market_Cap_B_USD_sum, ...)
+    regional_analysis = agregar(indexar_grupos(df_global, 'Region'), df_global, {
         'Market_Cap_B_USD': ['sum', 'mean', 'count'],
         'Revenue_2024_M_USD': ['sum', 'mean'],
         'EV_Revenue_Multiple': 'mean',
@@ -131,9 +138,6 @@ def crear_analisis_regional():
         'AI_Exposure_Score': 'mean'
     }).round(2)
     
-    # Flatten column names
-    regional_analysis.columns = [f"{col[0]}_{col[1]}" if col[1] != '' else col[0] for col in regional_analysis.columns]
-    
     # Calcular índices compuestos
     regional_analysis['Innovation_Index'] = (
         regional_analysis['AI_Exposure_Score_mean'] * 0.4 +
@@ -148,10 +152,23 @@ def crear_analisis_regional():
     
     return regional_analysis
 
-def crear_analisis_sectorial_detallado():
+def crear_regresion_multiplos_regional(df_global=None):
+    """Modelo transversal EV/Revenue ~ crecimiento ajustado por región (coeficientes y R²)"""
+    if df_global is None:
+        df_global = crear_datos_empresas_globales()
+    
+    coeficientes, _ = regresion_por_grupo(df_global, 'Region', 'Revenue_Growth_3Y_%',
+                                          'EV_Revenue_Multiple')
+    return coeficientes.round(4)
+
+def crear_analisis_sectorial_detallado(df_proyecciones=None, df_global=None):
     """Análisis sectorial con proyecciones específicas"""
-    df_proyecciones = crear_proyecciones_mercado_2025_2030()
-    df_global = crear_datos_empresas_globales()
+    if df_proyecciones is None:
+        df_proyecciones = crear_proyecciones_mercado_2025_2030()
+    if df_global is None:
+        df_global = crear_datos_empresas_globales()
+    else:
+        df_global = df_global.copy()
     
     # Mapear empresas a sectores principales
     sector_mapping = {
@@ -174,7 +191,7 @@ def crear_analisis_sectorial_detallado():
     )
     
     # Análisis de participación de mercado
-    sector_analysis = df_global.groupby('Sector_Principal').agg({
+    sector_analysis = agregar(indexar_grupos(df_global, 'Sector_Principal'), df_global, {
         'Market_Cap_B_USD': 'sum',
         'Revenue_2024_M_USD': 'sum',
         'EV_Revenue_Multiple': 'mean',
@@ -190,18 +207,28 @@ def crear_analisis_sectorial_detallado():
     
     return sector_analysis, df_global
 
-def generar_dashboard_internacional():
+def generar_dashboard_internacional(df_global=None, df_regional=None, df_proyecciones=None):
     """Dashboard de análisis internacional comprehensivo"""
-    df_global = crear_datos_empresas_globales()
-    df_regional = crear_analisis_regional()
-    df_proyecciones = crear_proyecciones_mercado_2025_2030()
+    if df_global is None:
+        df_global = crear_datos_empresas_globales()
+    if df_regional is None:
+        df_regional = crear_analisis_regional()
+    if df_proyecciones is None:
+        df_proyecciones = crear_proyecciones_mercado_2025_2030()
+    
+    # Región y país se factorizan una sola vez para todos los paneles
+    por_region = indexar_grupos(df_global, 'Region')
+    por_pais = indexar_grupos(df_global, 'Pais')
+    estadisticas_region = agregar(por_region, df_global, {'Market_Cap_B_USD': 'sum',
+                                                          'AI_Exposure_Score': 'mean'})
+    regiones = por_region['grupos'][por_region['aparicion']]  # Orden de aparición
     
     fig = plt.figure(figsize=(20, 16))
     gs = fig.add_gridspec(4, 3, hspace=0.35, wspace=0.3)
     
     # 1. Market Cap por región
     ax1 = fig.add_subplot(gs[0, 0])
-    regional_mcap = df_global.groupby('Region')['Market_Cap_B_USD'].sum().sort_values(ascending=False)
+    regional_mcap = estadisticas_region['Market_Cap_B_USD'].sort_values(ascending=False)
     
     colors = plt.cm.Set2(np.linspace(0, 1, len(regional_mcap)))
     bars = ax1.bar(range(len(regional_mcap)), regional_mcap.values, color=colors)
@@ -220,9 +247,9 @@ def generar_dashboard_internacional():
     # 2. Distribución de múltiplos EV/Revenue por región
     ax2 = fig.add_subplot(gs[0, 1])
     
-    box_data = [df_global[df_global['Region'] == region]['EV_Revenue_Multiple'].values 
-                for region in df_global['Region'].unique()]
-    bp = ax2.boxplot(box_data, labels=df_global['Region'].unique(), patch_artist=True)
+    multiplos_region = dividir(por_region, df_global['EV_Revenue_Multiple'])
+    box_data = [multiplos_region[i] for i in por_region['aparicion']]
+    bp = ax2.boxplot(box_data, labels=regiones, patch_artist=True)
     
     for patch, color in zip(bp['boxes'], colors):
         patch.set_facecolor(color)
@@ -236,10 +263,12 @@ def generar_dashboard_internacional():
     # 3. Crecimiento vs Rentabilidad por región
     ax3 = fig.add_subplot(gs[0, 2])
     
-    for region in df_global['Region'].unique():
-        data_region = df_global[df_global['Region'] == region]
-        ax3.scatter(data_region['Revenue_Growth_3Y_%'], data_region['EBITDA_Margin_%'],
-                   s=data_region['Market_Cap_B_USD']/20, alpha=0.7, label=region)
+    growth_region = dividir(por_region, df_global['Revenue_Growth_3Y_%'])
+    margen_region = dividir(por_region, df_global['EBITDA_Margin_%'])
+    mcap_region = dividir(por_region, df_global['Market_Cap_B_USD'])
+    for i, region in zip(por_region['aparicion'], regiones):
+        ax3.scatter(growth_region[i], margen_region[i],
+                   s=mcap_region[i]/20, alpha=0.7, label=region)
     
     ax3.set_xlabel('Crecimiento Revenue 3Y (%)', fontweight='bold')
     ax3.set_ylabel('Margen EBITDA (%)', fontweight='bold')
@@ -297,7 +326,7 @@ def generar_dashboard_internacional():
     # 7. AI Exposure Score por región
     ax7 = fig.add_subplot(gs[2, 2])
     
-    ai_exposure = df_global.groupby('Region')['AI_Exposure_Score'].mean().sort_values(ascending=True)
+    ai_exposure = estadisticas_region['AI_Exposure_Score'].sort_values(ascending=True)
     
     bars = ax7.barh(range(len(ai_exposure)), ai_exposure.values,
                    color=plt.cm.viridis(np.linspace(0.2, 0.8, len(ai_exposure))))
@@ -316,7 +345,7 @@ def generar_dashboard_internacional():
     ax8 = fig.add_subplot(gs[3, :])
     
     # Preparar datos por país
-    country_performance = df_global.groupby('Pais').agg({
+    country_performance = agregar(por_pais, df_global, {
         'Market_Cap_B_USD': 'sum',
         'Revenue_Growth_3Y_%': 'mean',
         'EBITDA_Margin_%': 'mean',
@@ -343,14 +372,16 @@ def generar_dashboard_internacional():
     plt.suptitle('Dashboard Internacional - Análisis Comparativo Global de Empresas Tech 2024-2030', 
                  fontsize=18, fontweight='bold', y=0.98)
     
-    plt.savefig('figuras/dashboard_internacional.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    guardar_figura(fig, 'figuras/dashboard_internacional.png')
     
     return df_global, df_regional
 
-def crear_analisis_tendencias_futuras():
+def crear_analisis_tendencias_futuras(df_proyecciones=None):
     """Análisis de tendencias futuras y proyecciones específicas"""
-    df_proyecciones = crear_proyecciones_mercado_2025_2030()
+    if df_proyecciones is None:
+        df_proyecciones = crear_proyecciones_mercado_2025_2030()
+    else:
+        df_proyecciones = df_proyecciones.copy()
     
     # Calcular métricas adicionales
     df_proyecciones['Growth_Factor'] = df_proyecciones['Market_Size_2030_B'] / df_proyecciones['Market_Size_2024_B']
@@ -365,9 +396,10 @@ def crear_analisis_tendencias_futuras():
     
     return df_proyecciones
 
-def generar_proyecciones_visuales():
+def generar_proyecciones_visuales(df_tendencias=None):
     """Gráficos de proyecciones futuras"""
-    df_tendencias = crear_analisis_tendencias_futuras()
+    if df_tendencias is None:
+        df_tendencias = crear_analisis_tendencias_futuras()
     
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(18, 14))
     
@@ -390,9 +422,10 @@ def generar_proyecciones_visuales():
     
     # Etiquetas para sectores destacados
     destacados = ['Inteligencia Artificial', 'Quantum Computing', 'Blockchain', 'AR/VR']
+    registro_sectores = crear_registro(df_tendencias, 'Sector')
     for sector in destacados:
-        if sector in df_tendencias['Sector'].values:
-            row = df_tendencias[df_tendencias['Sector'] == sector].iloc[0]
+        if contiene(registro_sectores, sector):
+            row = fila(registro_sectores, sector)
             ax1.annotate(sector, (row['CAGR_2024_2030_%'], row['Market_Size_2030_B']),
                         xytext=(5, 5), textcoords='offset points', fontsize=9,
                         bbox=dict(boxstyle="round,pad=0.3", facecolor='white', alpha=0.8))
@@ -439,8 +472,7 @@ def generar_proyecciones_visuales():
         ax4.text(value + 5, i, f'{value:.1f}x', va='center', fontweight='bold')
     
     plt.tight_layout()
-    plt.savefig('figuras/proyecciones_futuras.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    guardar_figura(fig, 'figuras/proyecciones_futuras.png')
     
     return df_tendencias
 
@@ -513,20 +545,20 @@ def crear_resumen_internacional():
         innovation_score = df_regional.loc[region, 'Innovation_Index']
         print(f"  • {region}: Innovation Index {innovation_score:.2f}")
     
-    # Guardar archivos
-    df_global.to_csv('datos/empresas_globales_2024.csv', index=False, encoding='utf-8')
-    df_regional.to_csv('datos/analisis_regional.csv', index=True, encoding='utf-8')
-    df_tendencias.to_csv('datos/proyecciones_sectores_2030.csv', index=False, encoding='utf-8')
-    sector_analysis.to_csv('datos/analisis_sectorial_detallado.csv', index=False, encoding='utf-8')
+    # Guardar archivos (CSV y, si pyarrow está disponible, Parquet tipado)
+    archivos = []
+    archivos += exportar_dataset(df_global, 'empresas_globales_2024', formatos=('csv',))
+    archivos += exportar_dataset(df_regional, 'analisis_regional', index=True)
+    archivos += exportar_dataset(df_tendencias, 'proyecciones_sectores_2030', formatos=('csv',))
+    archivos += exportar_dataset(sector_analysis, 'analisis_sectorial_detallado')
     
     print(f"\n💾 ARCHIVOS GUARDADOS:")
-    print(f"  • datos/empresas_globales_2024.csv")
-    print(f"  • datos/analisis_regional.csv")
-    print(f"  • datos/proyecciones_sectores_2030.csv")
-    print(f"  • datos/analisis_sectorial_detallado.csv")
+    for archivo in archivos:
+        print(f"  • {archivo}")
 
 def main():
     """Función principal del análisis internacional"""
+    parsear_argumentos('Análisis internacional y proyecciones sectoriales')
     
     print("Iniciando análisis internacional y proyecciones sectoriales...")
     print("Datos: Empresas globales 2024, proyecciones PwC/McKinsey/Gartner\n")
@@ -12,6 +12,11 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+from salida_figuras import guardar_figura, parsear_argumentos
+from historico_multiplos import historico_desde_dataframe, remuestrear
+from ventanas_multiplos import VENTANA, calcular_metricas_ventana
+from regresiones import ajustar_tendencia
+
 # Configuración de estilo
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
@@ -85,17 +90,8 @@ def crear_datos_multiplos_revenue():
 def crear_datos_historicos_saas():
     """Datos históricos de múltiplos SaaS basados en fuentes reales"""
     # Basado en datos de SEG (Software Equity Group) y otras fuentes
-    años = list(range(2020, 2025))
-    quarters = ['Q1', 'Q2', 'Q3', 'Q4']
-    
     historico_data = {
-        'Periodo': [
-            '2020 Q1', '2020 Q2', '2020 Q3', '2020 Q4',
-            '2021 Q1', '2021 Q2', '2021 Q3', '2021 Q4', 
-            '2022 Q1', '2022 Q2', '2022 Q3', '2022 Q4',
-            '2023 Q1', '2023 Q2', '2023 Q3', '2023 Q4',
-            '2024 Q1', '2024 Q2', '2024 Q3', '2024 Q4'
-        ],
+        'Periodo': pd.period_range('2020Q1', '2024Q4', freq='Q'),  # Trimestres 2020 Q1 - 2024 Q4
         'SaaS_Revenue_Multiple': [
             8.5,   # 2020 Q1 - pre-pandemia
             12.0,  # 2020 Q2 - inicio pandemia, múltiplos suben
@@ -166,9 +162,10 @@ def crear_datos_intangibles():
     }
     return pd.DataFrame(intangibles_data)
 
-def generar_grafico_multiplos_sector():
+def generar_grafico_multiplos_sector(df=None):
     """Gráfico de múltiplos por sector tecnológico"""
-    df = crear_datos_multiplos_revenue()
+    if df is None:
+        df = crear_datos_multiplos_revenue()
     
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
     
@@ -203,35 +200,35 @@ def generar_grafico_multiplos_sector():
     ax2.grid(True, alpha=0.3)
     
     # Añadir línea de tendencia
-    z = np.polyfit(df['Crecimiento_Revenue_%'], df['EV_Revenue_Multiple'], 1)
-    p = np.poly1d(z)
-    ax2.plot(df['Crecimiento_Revenue_%'], p(df['Crecimiento_Revenue_%']), 
+    tendencia = ajustar_tendencia(df['Crecimiento_Revenue_%'], df['EV_Revenue_Multiple'])
+    ax2.plot(df['Crecimiento_Revenue_%'], tendencia['ajustados'], 
              "r--", alpha=0.8, linewidth=2)
     
     # Correlación
-    corr = np.corrcoef(df['Crecimiento_Revenue_%'], df['EV_Revenue_Multiple'])[0,1]
+    corr = tendencia['correlacion']
     ax2.text(0.05, 0.95, f'Correlación: {corr:.3f}', transform=ax2.transAxes, 
              bbox=dict(boxstyle="round", facecolor='wheat', alpha=0.8))
     
     plt.tight_layout()
-    plt.savefig('figuras/multiplos_por_sector.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    guardar_figura(fig, 'figuras/multiplos_por_sector.png')
     
     return df
 
-def generar_grafico_historico_saas():
-    """Gráfico histórico de múltiplos SaaS"""
-    df = crear_datos_historicos_saas()
+def generar_grafico_historico_saas(df=None, historico=None):
+    """Gráfico histórico de múltiplos SaaS (vista trimestral del histórico)"""
+    if historico is None:
+        historico = historico_desde_dataframe(crear_datos_historicos_saas() if df is None else df)
     
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 12))
     
-    # Convertir periodo a datetime para mejor visualización
-    df['Fecha'] = pd.to_datetime(df['Periodo'].str.replace(' ', '-'))
+    # Vista trimestral fechada al inicio de cada trimestre
+    vista = remuestrear(historico, 'Q', series=['SaaS_Revenue_Multiple', 'EBITDA_Multiple'])
+    fechas = vista.index.to_timestamp()
     
     # Gráfico 1: Múltiplos Revenue
-    ax1.plot(df['Fecha'], df['SaaS_Revenue_Multiple'], 
+    ax1.plot(fechas, vista['SaaS_Revenue_Multiple'], 
              linewidth=3, marker='o', markersize=6, color='#2E86AB')
-    ax1.fill_between(df['Fecha'], df['SaaS_Revenue_Multiple'], alpha=0.3, color='#2E86AB')
+    ax1.fill_between(fechas, vista['SaaS_Revenue_Multiple'], alpha=0.3, color='#2E86AB')
     
     ax1.set_title('Evolución Histórica: Múltiplos Revenue SaaS\n2020-2024', 
                   fontweight='bold', fontsize=16)
@@ -255,9 +252,9 @@ def generar_grafico_historico_saas():
                     arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0'))
     
     # Gráfico 2: Múltiplos EBITDA
-    ax2.plot(df['Fecha'], df['EBITDA_Multiple'], 
+    ax2.plot(fechas, vista['EBITDA_Multiple'], 
              linewidth=3, marker='s', markersize=6, color='#A23B72')
-    ax2.fill_between(df['Fecha'], df['EBITDA_Multiple'], alpha=0.3, color='#A23B72')
+    ax2.fill_between(fechas, vista['EBITDA_Multiple'], alpha=0.3, color='#A23B72')
     
     ax2.set_title('Evolución Histórica: Múltiplos EBITDA SaaS\n2020-2024', 
                   fontweight='bold', fontsize=16)
@@ -266,14 +263,14 @@ def generar_grafico_historico_saas():
     ax2.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig('figuras/evolucion_multiplos_saas.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    guardar_figura(fig, 'figuras/evolucion_multiplos_saas.png')
     
-    return df
+    return historico if df is None else df
 
-def generar_grafico_venture_capital():
+def generar_grafico_venture_capital(df=None):
     """Gráfico de financiamiento VC y AI"""
-    df = crear_datos_venture_capital()
+    if df is None:
+        df = crear_datos_venture_capital()
     
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
     
@@ -330,14 +327,14 @@ def generar_grafico_venture_capital():
     ax2.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig('figuras/venture_capital_ai.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    guardar_figura(fig, 'figuras/venture_capital_ai.png')
     
     return df
 
-def generar_grafico_intangibles():
+def generar_grafico_intangibles(df=None):
     """Gráfico de crecimiento de activos intangibles"""
-    df = crear_datos_intangibles()
+    if df is None:
+        df = crear_datos_intangibles()
     
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
     
@@ -382,20 +379,31 @@ def generar_grafico_intangibles():
                 f'{height:.0f}%', ha='center', va='bottom', fontweight='bold')
     
     plt.tight_layout()
-    plt.savefig('figuras/activos_intangibles.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    guardar_figura(fig, 'figuras/activos_intangibles.png')
     
     return df
 
-def crear_tabla_comparativa():
-    """Crear tabla comparativa de múltiplos por sector"""
-    df = crear_datos_multiplos_revenue()
+# Columnas exportadas en datos/multiplos_valoracion_tech_2024.csv
+COLUMNAS_TABLA_COMPARATIVA = ['Sector', 'EV_Revenue_Multiple', 'Crecimiento_Revenue_%', 'Categoria_Valoracion']
+
+def crear_datos_tabla_comparativa(df=None):
+    """Múltiplos por sector con categoría de valoración"""
+    if df is None:
+        df = crear_datos_multiplos_revenue()
+    else:
+        df = df.copy()
     
     # Añadir categorías de valoración
     df['Categoria_Valoracion'] = pd.cut(df['EV_Revenue_Multiple'], 
                                        bins=[0, 3, 6, 10, float('inf')],
                                        labels=['Conservadora', 'Moderada', 'Alta', 'Premium'])
     
+    return df
+
+def crear_tabla_comparativa():
+    """Crear tabla comparativa de múltiplos por sector"""
+    df = crear_datos_tabla_comparativa()
+    
     # Estadísticas descriptivas
     print("\n" + "="*80)
     print("ANÁLISIS DE MÚLTIPLOS DE VALORACIÓN - SECTOR TECNOLÓGICO 2024-2025")
@@ -419,14 +427,37 @@ def crear_tabla_comparativa():
         print(f"  {cat}: {count} sectores ({pct:.1f}%)")
     
     # Guardar tabla en CSV
-    df_export = df[['Sector', 'EV_Revenue_Multiple', 'Crecimiento_Revenue_%', 'Categoria_Valoracion']]
+    df_export = df[COLUMNAS_TABLA_COMPARATIVA]
     df_export.to_csv('datos/multiplos_valoracion_tech_2024.csv', index=False, encoding='utf-8')
     print(f"\nTabla guardada en: datos/multiplos_valoracion_tech_2024.csv")
     
     return df
 
+def crear_analisis_ventanas_saas(df=None, ventana=VENTANA):
+    """Media móvil, volatilidad, drawdown y z-score de cada múltiplo histórico SaaS"""
+    if df is None:
+        df = crear_datos_historicos_saas()
+    return calcular_metricas_ventana(df, ventana=ventana)
+
+def analizar_ventanas_saas():
+    """Resumen de drawdown y z-score actual de los múltiplos SaaS"""
+    df = crear_analisis_ventanas_saas()
+    
+    print(f"\nMÉTRICAS POR VENTANA ({VENTANA} trimestres):")
+    for serie in ['SaaS_Revenue_Multiple', 'EBITDA_Multiple']:
+        peor = df[f'{serie}_Drawdown'].idxmin()
+        print(f"  {serie}: máxima caída {df.loc[peor, f'{serie}_Drawdown']:.1%} "
+              f"({df.loc[peor, 'Periodo']}), z-score actual "
+              f"{df[f'{serie}_Z_Score'].iloc[-1]:+.2f}")
+    
+    df.to_csv('datos/metricas_historicas_saas.csv', index=False, encoding='utf-8')
+    print(f"Métricas guardadas en: datos/metricas_historicas_saas.csv")
+    
+    return df
+
 def main():
     """Función principal del análisis"""
+    parsear_argumentos('Análisis de valoraciones de empresas tecnológicas')
     # Crear directorios si no existen
     import os
     os.makedirs('figuras', exist_ok=True)
@@ -451,6 +482,9 @@ def main():
     print("5. Creando tabla comparativa...")
     df_comparativa = crear_tabla_comparativa()
     
+    print("6. Calculando métricas por ventana de los múltiplos SaaS...")
+    df_ventanas = analizar_ventanas_saas()
+    
     print("\n" + "="*80)
     print("ANÁLISIS COMPLETADO")
     print("="*80)
@@ -460,6 +494,7 @@ def main():
     print("  - figuras/venture_capital_ai.png")
     print("  - figuras/activos_intangibles.png")
     print("  - datos/multiplos_valoracion_tech_2024.csv")
+    print("  - datos/metricas_historicas_saas.csv")
     print("\nTodos los datos utilizados son verificables y basados en fuentes académicas/profesionales.")
 
 if __name__ == "__main__":
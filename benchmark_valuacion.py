@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Valuación - Análisis de Valoraciones Tech
+Universos sintéticos de 10 a 100k empresas, tiempo y memoria pico por etapa,
+comparación contra una línea base guardada con umbral de regresión
+"""
+
+import os
+os.environ['MPLBACKEND'] = 'Agg'  # Las figuras se miden sin abrir ventanas
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from cache_datos import limpiar_cache
+
+TAMANOS = (10, 1_000, 10_000, 100_000)
+RUTA_BASELINE = 'baseline_benchmark.json'
+UMBRAL_REGRESION = 0.25  # Falla si una etapa es 25% más lenta o más pesada que la base
+TOLERANCIA_MINIMA_S = 0.005  # Diferencias menores se consideran ruido de medición
+TOLERANCIA_MINIMA_MB = 1.0
+
+SECTORES_DCF = [
+    'Enterprise Software', 'Consumer Hardware', 'AI/Semiconductors', 'E-commerce/Cloud',
+    'Internet/Search', 'Social Media', 'Electric Vehicles', 'SaaS/CRM', 'Creative Software',
+    'Streaming Media', 'Data Analytics', 'Cloud Analytics', 'Communications', 'IT Automation',
+    'DevOps/Monitoring'
+]
+
+PAISES_POR_REGION = {
+    'Norte América': ['Estados Unidos', 'Canadá'],
+    'Europa': ['Países Bajos', 'Alemania', 'Suecia'],
+    'Asia-Pacífico': ['Taiwán', 'Corea del Sur', 'China', 'Japón']
+}
+
+SECTORES_GLOBALES = [
+    'Cloud/Software', 'Consumer Tech', 'AI/Semiconductors', 'E-commerce/Cloud', 'Internet/AI',
+    'Social Media', 'EV/Energy', 'Enterprise SaaS', 'Creative Software', 'Streaming',
+    'Semiconductor Equipment', 'FinTech Payments', 'Semiconductor Manufacturing', 'Automotive'
+]
+
+
+def _nombres(n):
+    """Nombres únicos de empresas sintéticas"""
+    return np.char.add('Empresa_', np.char.zfill(np.arange(n).astype(str), 6))
+
+
+def generar_universo_dcf(n, semilla=0):
+    """Universo sintético con el esquema de crear_datos_dcf_empresas"""
+    rng = np.random.default_rng(semilla)
+    revenue = np.round(rng.lognormal(np.log(20_000), 1.5, n), 0)
+    margen = np.round(np.clip(rng.normal(25, 18, n), -40, 65), 1)
+
+    return pd.DataFrame({
+        'Empresa': _nombres(n),
+        'FCF_Actual_2024_M': np.round(revenue * margen / 100 * rng.uniform(0.4, 0.9, n), 0),
+        'Revenue_2024_M': revenue,
+        'EBITDA_Margin_%': margen,
+        'Revenue_Growth_3Y_%': np.round(np.clip(rng.normal(20, 16, n), -15, 80), 1),
+        'Beta': np.round(np.clip(rng.normal(1.3, 0.4, n), 0.5, 2.6), 2),
+        'Debt_to_Equity': np.round(rng.gamma(1.2, 0.25, n), 2),
+        'Sector_Detail': rng.choice(SECTORES_DCF, n)
+    })
+
+
+def generar_universo_global(n, semilla=0):
+    """Universo sintético con el esquema de crear_datos_empresas_globales"""
+    rng = np.random.default_rng(semilla)
+    regiones = rng.choice(list(PAISES_POR_REGION), n, p=[0.55, 0.2, 0.25])
+    paises = np.empty(n, dtype=object)
+    for region, opciones in PAISES_POR_REGION.items():
+        mascara = regiones == region
+        paises[mascara] = rng.choice(opciones, mascara.sum())
+
+    revenue = np.round(rng.lognormal(np.log(40_000), 1.4, n), 0)
+    multiplo = np.round(rng.lognormal(np.log(6), 0.8, n), 1)
+
+    return pd.DataFrame({
+        'Empresa': _nombres(n),
+        'Region': regiones,
+        'Pais': paises,
+        'Market_Cap_B_USD': np.round(revenue * multiplo / 1000, 0),
+        'Revenue_2024_M_USD': revenue,
+        'EV_Revenue_Multiple': multiplo,
+        'Revenue_Growth_3Y_%': np.round(np.clip(rng.normal(15, 15, n), -10, 70), 1),
+        'EBITDA_Margin_%': np.round(np.clip(rng.normal(26, 14, n), -20, 70), 1),
+        'Sector_Specific': rng.choice(SECTORES_GLOBALES, n),
+        'AI_Exposure_Score': rng.integers(1, 6, n)
+    })
+
+
+def etapas_valuacion(n, semilla=0):
+    """Etapas medidas para un universo de n empresas: (nombre, función sin argumentos)"""
+    import analisis_dcf_riesgo_tech as dcf
+    import analisis_internacional_proyecciones as internacional
+
+    df_empresas = generar_universo_dcf(n, semilla)
+    df_global = generar_universo_global(n, semilla)
+    df_wacc = dcf.crear_datos_wacc(df_empresas)
+    empresas = df_wacc['Empresa'].tolist()
+
+    return [
+        ('datos_wacc', lambda: dcf.crear_datos_wacc(df_empresas)),
+        ('proyecciones_dcf', lambda: dcf.crear_proyecciones_dcf(df_wacc)),
+        ('sensibilidad', lambda: dcf.crear_analisis_sensibilidad(
+            empresas, formato='arreglo', df_wacc=df_wacc)),
+        ('riesgo_sectorial', lambda: dcf.crear_analisis_riesgo_sectorial(df_wacc)),
+        ('regional', lambda: internacional.crear_analisis_regional(df_global)),
+    ]
+
+
+def medir(funcion, repeticiones=3):
+    """Mejor tiempo de varias repeticiones (sin caché) y memoria pico de una corrida aparte"""
+    tiempos = []
+    for _ in range(repeticiones):
+        limpiar_cache()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    # tracemalloc distorsiona los tiempos: la memoria se mide en una corrida separada
+    limpiar_cache()
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    limpiar_cache()
+
+    return {'segundos': min(tiempos), 'pico_mb': pico / 2**20}
+
+
+def medir_figuras(repeticiones=1):
+    """Tiempo de render de cada figura sobre los datos del repositorio (directorio temporal)"""
+    from orquestador import NODOS
+    from pipeline_figuras import TRABAJOS_FIGURAS, preparar_datos, _argumentos, _dibujar
+
+    resultados = {}
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        os.chdir(directorio)
+        try:
+            os.makedirs('figuras', exist_ok=True)
+            datos, _ = preparar_datos(TRABAJOS_FIGURAS)
+            for nombre in TRABAJOS_FIGURAS:
+                kwargs = _argumentos(nombre, datos, NODOS)
+                figura = os.path.splitext(os.path.basename(NODOS[nombre]['salida']))[0]
+                resultados[f'figuras/{figura}'] = medir(
+                    lambda: _dibujar(nombre, NODOS[nombre], kwargs), repeticiones)
+        finally:
+            os.chdir(directorio_original)
+    return resultados
+
+
+def ejecutar_benchmark(tamanos=TAMANOS, repeticiones=3, figuras=True, semilla=0):
+    """Medir todas las etapas para cada tamaño de universo"""
+    resultados = {}
+    for n in tamanos:
+        for etapa, funcion in etapas_valuacion(n, semilla):
+            resultados[f'n={n}/{etapa}'] = medir(funcion, repeticiones)
+            r = resultados[f'n={n}/{etapa}']
+            print(f"  n={n:<8,} {etapa:<27} {r['segundos']:9.4f}s {r['pico_mb']:10.1f} MB")
+    if figuras:
+        for nombre, r in medir_figuras().items():
+            resultados[nombre] = r
+            print(f"  {nombre:<38} {r['segundos']:9.4f}s {r['pico_mb']:10.1f} MB")
+    return resultados
+
+
+def _entorno():
+    """Metadatos para saber si una línea base es comparable"""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'fecha': datetime.now().isoformat(timespec='seconds')
+    }
+
+
+def guardar_baseline(resultados, ruta=RUTA_BASELINE):
+    """Guardar los resultados actuales como línea base"""
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({'entorno': _entorno(), 'resultados': resultados}, f, indent=2, sort_keys=True)
+
+
+def cargar_baseline(ruta=RUTA_BASELINE):
+    """Línea base guardada (None si no existe)"""
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def comparar_con_baseline(resultados, baseline, umbral=UMBRAL_REGRESION):
+    """Etapas cuyo tiempo o memoria pico supera la línea base por encima del umbral"""
+    regresiones = []
+    for nombre, actual in sorted(resultados.items()):
+        base = baseline['resultados'].get(nombre)
+        if base is None:
+            continue
+        for metrica, tolerancia in (('segundos', TOLERANCIA_MINIMA_S), ('pico_mb', TOLERANCIA_MINIMA_MB)):
+            limite = max(base[metrica] * (1 + umbral), base[metrica] + tolerancia)
+            if actual[metrica] > limite:
+                regresiones.append({'Etapa': nombre, 'Metrica': metrica,
+                                    'Base': base[metrica], 'Actual': actual[metrica],
+                                    'Cambio_%': (actual[metrica] / base[metrica] - 1) * 100})
+    return regresiones
+
+
+def main():
+    """Correr el benchmark y comparar (o guardar) la línea base"""
+    parser = argparse.ArgumentParser(description='Benchmark de etapas de valuación')
+    parser.add_argument('--tamanos', type=int, nargs='*', default=list(TAMANOS),
+                        help='Cantidad de empresas de cada universo sintético')
+    parser.add_argument('--repeticiones', type=int, default=3, help='Repeticiones por etapa')
+    parser.add_argument('--sin-figuras', action='store_true', help='No medir el render de figuras')
+    parser.add_argument('--baseline', default=RUTA_BASELINE, help='Archivo de línea base')
+    parser.add_argument('--guardar-baseline', action='store_true',
+                        help='Guardar los resultados como nueva línea base')
+    parser.add_argument('--umbral', type=float, default=UMBRAL_REGRESION,
+                        help='Regresión relativa tolerada (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    print("="*80)
+    print("BENCHMARK DE VALUACIÓN")
+    print("="*80)
+    resultados = ejecutar_benchmark(args.tamanos, args.repeticiones, figuras=not args.sin_figuras)
+
+    if args.guardar_baseline:
+        guardar_baseline(resultados, args.baseline)
+        print(f"\n✅ Línea base guardada en {args.baseline}")
+        return
+
+    baseline = cargar_baseline(args.baseline)
+    if baseline is None:
+        print(f"\n⚠️  Sin línea base en {args.baseline} (usar --guardar-baseline)")
+        return
+
+    regresiones = comparar_con_baseline(resultados, baseline, args.umbral)
+    if not regresiones:
+        print(f"\n✅ Sin regresiones respecto de la línea base ({baseline['entorno']['fecha']})")
+        return
+
+    print(f"\n❌ {len(regresiones)} regresiones (umbral {args.umbral:.0%}):")
+    for r in regresiones:
+        print(f"  {r['Etapa']:<35} {r['Metrica']:<9} {r['Base']:10.4f} -> {r['Actual']:10.4f} "
+              f"({r['Cambio_%']:+.1f}%)")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Caché de construcción incremental - Análisis de Valoraciones Tech
+Huellas de contenido por nodo del orquestador y manifiesto de salidas generadas
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import types
+from datetime import datetime
+
+import numpy as np
+
+RUTA_MANIFEST = 'manifest_build.json'
+RAIZ_REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+def _es_del_repo(objeto):
+    """Funciones definidas en los módulos de este repositorio"""
+    archivo = getattr(inspect.getmodule(objeto), '__file__', None)
+    return archivo is not None and os.path.dirname(os.path.abspath(archivo)) == RAIZ_REPO
+
+
+def _nombres_globales(codigo):
+    """Nombres globales referenciados por una función, incluidas funciones anidadas"""
+    nombres = set(codigo.co_names)
+    for constante in codigo.co_consts:
+        if isinstance(constante, types.CodeType):
+            nombres |= _nombres_globales(constante)
+    return nombres
+
+
+def _hash_valor(valor, h):
+    """Agregar al hash el contenido de una constante de módulo"""
+    if isinstance(valor, np.ndarray):
+        h.update(valor.dtype.str.encode())
+        h.update(valor.tobytes())
+    else:
+        h.update(repr(valor).encode())
+
+
+def huella_funcion(funcion, h=None, visitadas=None):
+    """Hash del código fuente de la función, de las funciones del repo que invoca
+    y de las constantes globales que lee (escenarios, rangos, parámetros de mercado)"""
+    h = h or hashlib.sha256()
+    visitadas = set() if visitadas is None else visitadas
+    funcion = inspect.unwrap(funcion)
+    if funcion in visitadas:
+        return h
+    visitadas.add(funcion)
+
+    h.update(inspect.getsource(funcion).encode())
+    for valor in (funcion.__defaults__ or ()) + tuple((funcion.__kwdefaults__ or {}).values()):
+        _hash_valor(valor, h)
+    for nombre in sorted(_nombres_globales(funcion.__code__)):
+        if nombre not in funcion.__globals__:
+            continue
+        valor = funcion.__globals__[nombre]
+        if isinstance(valor, types.ModuleType):
+            continue
+        if callable(valor):
+            if inspect.isfunction(inspect.unwrap(valor)) and _es_del_repo(valor):
+                huella_funcion(valor, h, visitadas)
+            continue
+        h.update(nombre.encode())
+        _hash_valor(valor, h)
+    return h
+
+
+def calcular_huellas(nodos):
+    """Huella de cada nodo: su función, sus parámetros, el valor de las constantes de
+    módulo que recibe y las huellas de sus dependencias"""
+    huellas = {}
+
+    def huella(nombre):
+        if nombre not in huellas:
+            nodo = nodos[nombre]
+            modulo, nombre_funcion = nodo['funcion']
+            funcion = getattr(importlib.import_module(modulo), nombre_funcion)
+            h = huella_funcion(funcion)
+            h.update(json.dumps(nodo.get('params', {}), sort_keys=True).encode())
+            for arg, (modulo_constante, constante) in sorted(nodo.get('constantes', {}).items()):
+                h.update(f'{arg}={modulo_constante}.{constante}'.encode())
+                _hash_valor(getattr(importlib.import_module(modulo_constante), constante), h)
+            h.update(nodo.get('salida', '').encode())
+            for arg, dep in sorted(nodo.get('deps', {}).items()):
+                h.update(f'{arg}={huella(dep)}'.encode())
+            huellas[nombre] = h.hexdigest()
+        return huellas[nombre]
+
+    for nombre in nodos:
+        huella(nombre)
+    return huellas
+
+
+def hash_archivo(ruta):
+    """SHA-256 del contenido de un archivo generado"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def cargar_manifest(ruta=RUTA_MANIFEST):
+    """Manifiesto de la última construcción (vacío si no existe)"""
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def guardar_manifest(manifest, ruta=RUTA_MANIFEST):
+    """Persistir el manifiesto con huellas, hashes de salida y tiempos"""
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True, ensure_ascii=False)
+
+
+def esta_actualizado(nombre, nodo, huellas, manifest):
+    """Una salida está vigente si su huella no cambió y el archivo sigue intacto"""
+    entrada = manifest.get(nombre)
+    salida = nodo.get('salida')
+    return (entrada is not None and salida is not None and os.path.exists(salida) and
+            entrada.get('huella') == huellas[nombre] and
+            entrada.get('hash_salida') == hash_archivo(salida))
+
+
+def filtrar_obsoletos(objetivos, nodos, huellas, manifest):
+    """Objetivos cuya salida debe regenerarse"""
+    return [n for n in objetivos if not esta_actualizado(n, nodos[n], huellas, manifest)]
+
+
+def registrar_salidas(manifest, nodos, huellas, tiempos):
+    """Actualizar el manifiesto con las salidas recién generadas"""
+    fecha = datetime.now().isoformat(timespec='seconds')
+    for nombre, segundos in tiempos.items():
+        salida = nodos[nombre].get('salida')
+        if salida is None or not os.path.exists(salida):
+            continue
+        manifest[nombre] = {
+            'salida': salida,
+            'huella': huellas[nombre],
+            'hash_salida': hash_archivo(salida),
+            'segundos': round(segundos, 4),
+            'fecha': fecha
+        }
+    return manifest
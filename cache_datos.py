@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Capa de datos con memoización - Análisis de Valoraciones Tech
+Cada dataset se calcula una vez por combinación de argumentos y parámetros de mercado
+"""
+
+import functools
+import sys
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Parámetros de mercado actuales (enero 2025)
+PARAMETROS_MERCADO = {
+    'risk_free_rate': 0.0435,  # T-Bill 10Y US Treasury
+    'market_risk_premium': 0.065,  # Prima de riesgo histórica
+    'tax_rate': 0.21  # Tasa corporativa US
+}
+
+# Con copy-on-write (pandas >= 3) una copia superficial ya aísla al llamador
+_COPY_ON_WRITE = (int(pd.__version__.split('.')[0]) >= 3 or
+                  bool(getattr(pd.options.mode, 'copy_on_write', False)))
+
+# Límites de la caché LRU: cantidad de resultados y bytes estimados (ver _tamano).
+# Un resultado que supera por sí solo el presupuesto de bytes no se memoiza.
+LIMITES_CACHE = {
+    'entradas': 128,
+    'bytes': 512 * 2**20
+}
+
+# clave -> (resultado, bytes), del menos al más usado recientemente
+_CACHE = OrderedDict()
+ESTADISTICAS = {'aciertos': 0, 'calculos': 0, 'desalojos': 0, 'bytes': 0}
+
+
+def configurar_parametros_mercado(**cambios):
+    """Actualizar parámetros de mercado e invalidar los datos derivados"""
+    desconocidos = set(cambios) - set(PARAMETROS_MERCADO)
+    if desconocidos:
+        raise KeyError(f"Parámetros desconocidos: {sorted(desconocidos)}")
+
+    if any(PARAMETROS_MERCADO[k] != v for k, v in cambios.items()):
+        PARAMETROS_MERCADO.update(cambios)
+        limpiar_cache()
+
+
+def limpiar_cache():
+    """Descartar todos los resultados memoizados"""
+    _CACHE.clear()
+    ESTADISTICAS['bytes'] = 0
+
+
+def _clave(valor):
+    """Representación hashable de un argumento"""
+    if isinstance(valor, np.ndarray):
+        return ('ndarray', valor.dtype.str, valor.shape, valor.tobytes())
+    if isinstance(valor, (pd.Series, pd.Index)):
+        return ('serie', tuple(valor.tolist()))
+    if isinstance(valor, pd.DataFrame):
+        return ('frame', tuple(valor.columns), pd.util.hash_pandas_object(valor).values.tobytes())
+    if isinstance(valor, dict):
+        return ('dict', tuple((k, _clave(v)) for k, v in sorted(valor.items())))
+    if isinstance(valor, (list, tuple)):
+        return ('seq', tuple(_clave(v) for v in valor))
+    return valor
+
+
+def _solo_lectura(valor):
+    """Entregar resultados sin exponer el objeto cacheado a mutaciones"""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return valor.copy(deep=not _COPY_ON_WRITE)
+    if isinstance(valor, np.ndarray):
+        vista = valor.view()
+        vista.setflags(write=False)
+        return vista
+    if isinstance(valor, dict):
+        return {k: _solo_lectura(v) for k, v in valor.items()}
+    if isinstance(valor, tuple):
+        return tuple(_solo_lectura(v) for v in valor)
+    return valor
+
+
+def _tamano(valor):
+    """Bytes aproximados de un resultado (buffers de datos, sin objetos referenciados)"""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(index=True))
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, dict):
+        return sum(_tamano(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sum(_tamano(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+def _guardar(clave, resultado):
+    """Cachear un resultado y desalojar los menos usados hasta respetar LIMITES_CACHE"""
+    tamano = _tamano(resultado)
+    if tamano > LIMITES_CACHE['bytes']:
+        return
+    _CACHE[clave] = (resultado, tamano)
+    ESTADISTICAS['bytes'] += tamano
+    while (len(_CACHE) > LIMITES_CACHE['entradas'] or
+           ESTADISTICAS['bytes'] > LIMITES_CACHE['bytes']):
+        _, (_, liberado) = _CACHE.popitem(last=False)
+        ESTADISTICAS['bytes'] -= liberado
+        ESTADISTICAS['desalojos'] += 1
+
+
+def memoizar(funcion):
+    """Cachear el resultado de una función crear_* por argumentos y parámetros de mercado
+
+    La caché es LRU y acotada por LIMITES_CACHE (entradas y bytes estimados).
+    """
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        clave = (funcion.__module__, funcion.__qualname__, _clave(args),
+                 _clave(kwargs), tuple(sorted(PARAMETROS_MERCADO.items())))
+        if clave in _CACHE:
+            ESTADISTICAS['aciertos'] += 1
+            _CACHE.move_to_end(clave)
+            return _solo_lectura(_CACHE[clave][0])
+
+        ESTADISTICAS['calculos'] += 1
+        resultado = funcion(*args, **kwargs)
+        if isinstance(resultado, np.ndarray):
+            resultado.setflags(write=False)
+        _guardar(clave, resultado)
+        return _solo_lectura(resultado)
+
+    return envoltura
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Valuación por Comparables - Análisis de Valoraciones Tech
+Pares por sector o similitud y múltiplos de pares (mediana, media recortada o ajustados
+por regresión) aplicados a todo el universo en operaciones por lotes
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from indice_pares import crear_indice_pares, consultar_pares
+from registro_empresas import crear_frame_consolidado, nombre_canonico, sector_canonico
+from regresiones import minimos_cuadrados, predecir
+
+K_PARES = 5  # Pares por similitud
+MINIMO_PARES = 3  # Pares de sector mínimos antes de recurrir a la similitud
+RECORTE = 0.2  # Fracción recortada en cada extremo de la media recortada
+CUANTILES_RANGO = (0.25, 0.75)  # Rango de EV implícito (cuartiles de los múltiplos)
+
+METODOS = ('mediana', 'media_recortada', 'regresion')
+MODOS = ('sector', 'similitud')
+
+# Variables de similitud: columna de la tabla de pares -> columna de crear_datos_wacc
+CARACTERISTICAS = {
+    'Revenue_Growth_%': 'Revenue_Growth_3Y_%',
+    'EBITDA_Margin_%': 'EBITDA_Margin_%'
+}
+
+# Múltiplo -> columna de la tabla de pares (la métrica del objetivo sale de valuar_comparables)
+MULTIPLOS = {
+    'Revenue': 'EV_Revenue_Multiple',
+    'EBITDA': 'EV_EBITDA_Multiple'
+}
+
+COLUMNAS_PARES = ['Par', 'Sector', 'Fuente', 'EV_Revenue_Multiple', 'EV_EBITDA_Multiple',
+                  'Revenue_Growth_%', 'EBITDA_Margin_%']
+
+
+def crear_tabla_pares(df_multiplos, consolidado, df_modelos):
+    """Tabla única de pares con múltiplos, crecimiento y margen
+
+    Une las empresas líderes del frame consolidado (registro_empresas, nombre
+    canónico; margen EBITDA implícito = EV/Revenue ÷ EV/EBITDA),
+    crear_datos_saas_vs_tradicional y crear_datos_multiplos_revenue (solo EV/Revenue).
+    Los datos que una fuente no publica quedan en NaN.
+    """
+    empresas = consolidado[consolidado['EV_Revenue_Multiple_lideres'].notna()]
+    lideres = pd.DataFrame({
+        'Par': empresas['Empresa'],
+        'Sector': empresas['Sector_lideres'],
+        'Fuente': 'Empresa',
+        'EV_Revenue_Multiple': empresas['EV_Revenue_Multiple_lideres'],
+        'EV_EBITDA_Multiple': empresas['EV_EBITDA_Multiple_lideres'],
+        'Revenue_Growth_%': empresas['Revenue_Growth_%_lideres'],
+        'EBITDA_Margin_%': (empresas['EV_Revenue_Multiple_lideres'] /
+                            empresas['EV_EBITDA_Multiple_lideres'] * 100)
+    })
+    modelos = pd.DataFrame({
+        'Par': df_modelos['Modelo_Negocio'],
+        'Sector': df_modelos['Modelo_Negocio'],
+        'Fuente': 'Modelo de negocio',
+        'EV_Revenue_Multiple': df_modelos['Revenue_Multiple_Promedio'],
+        'EV_EBITDA_Multiple': df_modelos['EBITDA_Multiple_Promedio'],
+        'Revenue_Growth_%': df_modelos['Crecimiento_Revenue_%'],
+        'EBITDA_Margin_%': df_modelos['Margen_EBITDA_%']
+    })
+    sectores = pd.DataFrame({
+        'Par': df_multiplos['Sector'],
+        'Sector': df_multiplos['Sector'],
+        'Fuente': 'Sector',
+        'EV_Revenue_Multiple': df_multiplos['EV_Revenue_Multiple'],
+        'EV_EBITDA_Multiple': np.nan,
+        'Revenue_Growth_%': df_multiplos['Crecimiento_Revenue_%'],
+        'EBITDA_Margin_%': np.nan
+    })
+    tabla = pd.concat([lideres, modelos, sectores], ignore_index=True)
+    return tabla[COLUMNAS_PARES].astype({c: float for c in COLUMNAS_PARES[3:]})
+
+
+def pares_sector(sectores_pares, sectores_objetivo, validos=None, nombres_pares=None,
+                 nombres_objetivo=None):
+    """Índices (objetivos × máximo) de los pares con el mismo sector canónico que el objetivo
+
+    Los sectores se comparan por su clave en registro_empresas.SECTORES_CANONICOS
+    ('AI/Semiconductors' y 'Semiconductors' son el mismo sector) y la máscara se arma
+    una vez por sector distinto. validos restringe los pares elegibles; con nombres,
+    la propia empresa no es su par. Las posiciones sin par quedan en -1.
+    """
+    n_pares = len(sectores_pares)
+    codigos, _ = pd.factorize(pd.Series(np.concatenate([sector_canonico(sectores_pares),
+                                                        sector_canonico(sectores_objetivo)])))
+    codigos_par, codigos_obj = codigos[:n_pares], codigos[n_pares:]
+    unicos_obj, inverso = np.unique(codigos_obj, return_inverse=True)
+
+    # Sectores objetivo × pares (un sector faltante, código -1, no tiene pares)
+    mascara = (unicos_obj[:, None] == codigos_par) & (codigos_par >= 0)
+    if validos is not None:
+        mascara &= validos
+    indices = _mascara_a_indices(mascara)[inverso.ravel()]
+
+    if nombres_objetivo is not None:
+        codigos, _ = pd.factorize(pd.concat([pd.Series(nombres_pares), pd.Series(nombres_objetivo)],
+                                            ignore_index=True))
+        codigos_nombre_par, codigos_nombre_obj = codigos[:n_pares], codigos[n_pares:]
+        propios = codigos_nombre_par[np.maximum(indices, 0)] == codigos_nombre_obj[:, None]
+        indices = np.where(propios, -1, indices)
+        # Volver a alinear a izquierda tras quitar a la propia empresa
+        indices = np.take_along_axis(indices, np.argsort(indices < 0, axis=1, kind='stable'), axis=1)
+    return indices
+
+
+def _mascara_a_indices(mascara):
+    """Pasar una máscara filas × pares a índices alineados a izquierda con relleno -1"""
+    cantidad = mascara.sum(axis=1)
+    ancho = max(int(cantidad.max(initial=0)), 1)
+    # Los pares marcados primero, en su orden original
+    orden = np.argsort(~mascara, axis=1, kind='stable')[:, :ancho]
+    return np.where(np.arange(ancho) < cantidad[:, None], orden, -1)
+
+
+def _reunir(valores, indices):
+    """Valores de los pares por objetivo (objetivos × ancho) con NaN en el relleno"""
+    return np.where(indices >= 0, np.asarray(valores, dtype=float)[np.maximum(indices, 0)], np.nan)
+
+
+def _cuantil_filas(ordenados, n, q):
+    """Cuantil q (interpolación lineal) de filas ordenadas con n valores válidos cada una"""
+    posicion = q * np.maximum(n - 1, 0)
+    abajo = np.floor(posicion).astype(int)
+    arriba = np.minimum(abajo + 1, np.maximum(n - 1, 0))
+    bajo = np.take_along_axis(ordenados, abajo[:, None], axis=1)[:, 0]
+    alto = np.take_along_axis(ordenados, arriba[:, None], axis=1)[:, 0]
+    return np.where(n > 0, bajo + (posicion - abajo) * (alto - bajo), np.nan)
+
+
+def estadisticos_pares(multiplos, regresor=None, regresor_objetivo=None, recorte=RECORTE,
+                       cuantiles=CUANTILES_RANGO):
+    """Mediana, media recortada, múltiplo por regresión y cuantiles por fila
+
+    multiplos es objetivos × pares con NaN donde no hay par o dato. La regresión
+    ajusta múltiplo ~ a + b·regresor dentro de cada conjunto de pares, la evalúa en el
+    regresor del objetivo y la acota al rango de múltiplos de los pares; con menos de
+    tres pares o sin dispersión del regresor usa la mediana.
+    """
+    multiplos = np.asarray(multiplos, dtype=float)
+    ordenados = np.sort(multiplos, axis=1)  # NaN al final
+    n = (~np.isnan(multiplos)).sum(axis=1)
+
+    # Media recortada con sumas acumuladas: filas [t, n - t) de cada fila ordenada
+    recortados = np.floor(recorte * n).astype(int)
+    acumulado = np.concatenate([np.zeros((len(n), 1)), np.cumsum(np.nan_to_num(ordenados), axis=1)],
+                               axis=1)
+    suma = (np.take_along_axis(acumulado, (n - recortados)[:, None], axis=1)
+            - np.take_along_axis(acumulado, recortados[:, None], axis=1))[:, 0]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resultado = {
+            'n': n,
+            'mediana': _cuantil_filas(ordenados, n, 0.5),
+            'media_recortada': suma / (n - 2 * recortados),
+            'bajo': _cuantil_filas(ordenados, n, cuantiles[0]),
+            'alto': _cuantil_filas(ordenados, n, cuantiles[1])
+        }
+
+        resultado['regresion'] = resultado['mediana']
+        if regresor is not None:
+            regresor = np.asarray(regresor, dtype=float)
+            ajuste = minimos_cuadrados(regresor, multiplos)
+            observados = ~np.isnan(multiplos) & ~np.isnan(regresor)
+            ajustado = np.clip(predecir(ajuste, regresor_objetivo),
+                               np.where(observados, multiplos, np.inf).min(axis=1),
+                               np.where(observados, multiplos, -np.inf).max(axis=1))
+            resultado['regresion'] = np.where((ajuste['n'] >= 3) & ajuste['valido'], ajustado,
+                                              resultado['mediana'])
+    return resultado
+
+
+def seleccionar_pares(tabla_pares, nombres, sectores, caracteristicas, validos, modo='sector',
+                      k=K_PARES, minimo_pares=MINIMO_PARES):
+    """Índices de pares por objetivo (relleno -1) y si provienen del sector del objetivo
+
+    Solo las empresas válidas son pares: los agregados de sector y modelo de negocio
+    no entran ni en la selección por sector ni en el índice KD de los k más
+    similares (ver indice_pares). Los nombres de pares y objetivos se comparan por su
+    nombre canónico (registro_empresas), así un alias de la propia empresa tampoco
+    es su par.
+    """
+    nombres = pd.Series(nombres).map(nombre_canonico).to_numpy()
+    nombres_pares = tabla_pares['Par'].map(nombre_canonico).to_numpy()
+    empresas = validos & (tabla_pares['Fuente'] == 'Empresa').to_numpy()
+    elegibles = np.flatnonzero(empresas)
+    indice = crear_indice_pares(tabla_pares[list(CARACTERISTICAS)].to_numpy()[elegibles],
+                                nombres_pares[elegibles])
+    cercanos, _ = consultar_pares(indice, caracteristicas, k, nombres)
+    similares = np.where(cercanos >= 0, elegibles[np.maximum(cercanos, 0)], -1)
+    if modo == 'similitud':
+        return similares, np.zeros(len(similares), dtype=bool)
+
+    indices = pares_sector(tabla_pares['Sector'].to_numpy(), sectores, empresas, nombres_pares,
+                           nombres)
+    por_sector = (indices >= 0).sum(axis=1) >= minimo_pares
+    ancho = max(indices.shape[1], similares.shape[1])
+    return (np.where(por_sector[:, None], _rellenar(indices, ancho), _rellenar(similares, ancho)),
+            por_sector)
+
+
+def valuar_comparables(tabla_pares, nombres, sectores, revenue, margen_pct, crecimiento_pct,
+                       metodo='mediana', modo='sector', k=K_PARES, minimo_pares=MINIMO_PARES):
+    """EV implícito por comparables de todos los objetivos en una pasada por lotes
+
+    modo 'sector' toma las empresas del sector canónico del objetivo y recurre a las k
+    empresas más similares (crecimiento y margen) cuando hay menos de minimo_pares;
+    'similitud' usa siempre las k más similares. Cada múltiplo elige sus pares entre
+    los que lo publican y la propia empresa nunca es su par. Devuelve arreglos por
+    objetivo: pares usados, múltiplo aplicado y EV bajo/central/alto por múltiplo
+    (EV/EBITDA solo con EBITDA positivo).
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método desconocido: {metodo}")
+    if modo not in MODOS:
+        raise ValueError(f"Modo de pares desconocido: {modo}")
+
+    revenue = np.asarray(revenue, dtype=float)
+    crecimiento_pct = np.asarray(crecimiento_pct, dtype=float)
+    margen_pct = np.asarray(margen_pct, dtype=float)
+    ebitda = revenue * margen_pct / 100
+    metricas = {'Revenue': revenue, 'EBITDA': np.where(ebitda > 0, ebitda, np.nan)}
+    caracteristicas = np.column_stack([crecimiento_pct, margen_pct])
+
+    resultado = {}
+    for multiplo, columna in MULTIPLOS.items():
+        valores = tabla_pares[columna].to_numpy(dtype=float)
+        indices, por_sector = seleccionar_pares(tabla_pares, np.asarray(nombres), np.asarray(sectores),
+                                                caracteristicas, ~np.isnan(valores), modo, k,
+                                                minimo_pares)
+        estadisticos = estadisticos_pares(_reunir(valores, indices),
+                                          _reunir(tabla_pares['Revenue_Growth_%'], indices),
+                                          crecimiento_pct)
+        metrica = metricas[multiplo]
+        resultado[f'Pares_{multiplo}'] = estadisticos['n']
+        resultado[f'Sector_{multiplo}'] = por_sector
+        resultado[f'Multiplo_{multiplo}'] = estadisticos[metodo]
+        resultado[f'EV_{multiplo}_Bajo_M'] = estadisticos['bajo'] * metrica
+        resultado[f'EV_{multiplo}_M'] = estadisticos[metodo] * metrica
+        resultado[f'EV_{multiplo}_Alto_M'] = estadisticos['alto'] * metrica
+    return resultado
+
+
+def _rellenar(indices, ancho):
+    """Completar con -1 una matriz de índices hasta el ancho pedido"""
+    return np.pad(indices, ((0, 0), (0, ancho - indices.shape[1])), constant_values=-1)
+
+
+def crear_valuacion_comparables(df_wacc=None, df_pares=None, metodo='mediana', modo='sector',
+                                k=K_PARES):
+    """Valuación por comparables del universo de crear_datos_wacc
+
+    Segundo método de valuación junto al DCF: un registro por empresa con, por
+    múltiplo, los pares usados, si vienen de su sector, el múltiplo aplicado y el rango
+    de EV implícito.
+    """
+    if df_wacc is None:
+        from analisis_dcf_riesgo_tech import crear_datos_wacc
+        df_wacc = crear_datos_wacc()
+    if df_pares is None:
+        from analisis_valoraciones_tech import crear_datos_multiplos_revenue
+        from analisis_empresas_especificas import crear_datos_saas_vs_tradicional
+        df_pares = crear_tabla_pares(crear_datos_multiplos_revenue(), crear_frame_consolidado(),
+                                     crear_datos_saas_vs_tradicional())
+
+    resultado = valuar_comparables(
+        df_pares, df_wacc['Empresa'].to_numpy(), df_wacc['Sector_Detail'].astype(str).to_numpy(),
+        df_wacc['Revenue_2024_M'].to_numpy(), df_wacc['EBITDA_Margin_%'].to_numpy(),
+        df_wacc['Revenue_Growth_3Y_%'].to_numpy(), metodo, modo, k)
+
+    df = pd.DataFrame({'Empresa': df_wacc['Empresa'].to_numpy(), **resultado})
+    df['EV_Comps_M'] = df[['EV_Revenue_M', 'EV_EBITDA_M']].mean(axis=1)
+    return df
+
+
+def main():
+    """Valuar por comparables un universo de fundamentales"""
+    parser = argparse.ArgumentParser(description='Valuación por comparables')
+    parser.add_argument('--fuente', default=None,
+                        help='CSV de fundamentales (esquema de crear_datos_dcf_empresas)')
+    parser.add_argument('--metodo', choices=METODOS, default='mediana',
+                        help='Múltiplo de los pares a aplicar')
+    parser.add_argument('--modo', choices=MODOS, default='sector', help='Selección de pares')
+    parser.add_argument('--k', type=int, default=K_PARES, help='Pares por similitud')
+    parser.add_argument('--salida', default=None, help='CSV de salida')
+    args = parser.parse_args()
+
+    import analisis_dcf_riesgo_tech as dcf
+
+    df_empresas = None if args.fuente is None else pd.read_csv(args.fuente)
+    df_wacc = dcf.crear_datos_wacc(df_empresas)
+
+    inicio = time.perf_counter()
+    df = crear_valuacion_comparables(df_wacc, metodo=args.metodo, modo=args.modo, k=args.k)
+    print(f"{len(df):,} empresas valuadas por comparables en {time.perf_counter() - inicio:.2f}s")
+    print(df.head(15).to_string(index=False, float_format=lambda x: f'{x:,.1f}'))
+
+    if args.salida:
+        df.to_csv(args.salida, index=False, encoding='utf-8')
+        print(f"\nValuación guardada en: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
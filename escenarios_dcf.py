@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Especificación de Escenarios DCF - Empresas Tecnológicas
+Escenarios como datos (dict, JSON o CSV) evaluados juntos como eje del motor vectorizado
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from motor_dcf import DECAIMIENTO_CRECIMIENTO, CONVERSION_FCF, MARGEN_MAXIMO, TERMINAL_GROWTH
+
+# Parámetros de un escenario y su valor por defecto (supuestos del motor DCF)
+PARAMETROS_ESCENARIO = {
+    'growth_factor': 1.0,  # Multiplicador del crecimiento histórico
+    'margin_factor': 1.0,  # Multiplicador de la mejora de márgenes
+    'decaimiento': DECAIMIENTO_CRECIMIENTO,
+    'conversion_fcf': CONVERSION_FCF,
+    'margen_maximo': MARGEN_MAXIMO,
+    'terminal_growth': TERMINAL_GROWTH
+}
+
+
+def normalizar_escenarios(escenarios):
+    """Completar cada escenario con los valores por defecto y validar sus parámetros
+
+    Acepta {nombre: {parámetro: valor}} o una lista de dicts con la clave 'Escenario'.
+    """
+    if isinstance(escenarios, (list, tuple)):
+        escenarios = {e['Escenario']: {k: v for k, v in e.items() if k != 'Escenario'}
+                      for e in escenarios}
+    if not escenarios:
+        raise ValueError("Se requiere al menos un escenario")
+
+    normalizados = {}
+    for nombre, parametros in escenarios.items():
+        desconocidos = set(parametros) - set(PARAMETROS_ESCENARIO)
+        if desconocidos:
+            raise KeyError(f"Escenario {nombre!r}: parámetros desconocidos {sorted(desconocidos)}")
+        normalizados[nombre] = {**PARAMETROS_ESCENARIO,
+                                **{k: float(v) for k, v in parametros.items()
+                                   if not pd.isna(v)}}
+    return normalizados
+
+
+def cargar_escenarios(ruta):
+    """Leer escenarios desde JSON ({nombre: parámetros} o lista) o CSV (una fila por escenario)"""
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.json':
+        with open(ruta, encoding='utf-8') as f:
+            return normalizar_escenarios(json.load(f))
+    if extension == '.csv':
+        return normalizar_escenarios(pd.read_csv(ruta).to_dict('records'))
+    raise ValueError(f"Formato de escenarios no soportado: {ruta}")
+
+
+def parametros_batch(escenarios):
+    """Parámetros de todos los escenarios como vectores (S,) para el motor DCF"""
+    escenarios = normalizar_escenarios(escenarios)
+    return {parametro: np.array([e[parametro] for e in escenarios.values()])
+            for parametro in PARAMETROS_ESCENARIO}
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Histórico de Múltiplos - Análisis de Valoraciones Tech
+Series temporales de múltiplos (SaaS, sectores) con ingesta solo-agregar, consultas por
+rango en O(log n) y vistas mensuales, trimestrales o anuales al leer
+"""
+
+import numpy as np
+import pandas as pd
+
+CAPACIDAD_INICIAL = 1024  # Observaciones reservadas al crear un histórico
+
+# Frecuencia de las vistas -> unidad datetime64 del período y divisor de meses
+FRECUENCIAS = {
+    'M': ('M', 1),
+    'Q': ('M', 3),
+    'Y': ('Y', 1)
+}
+
+AGREGACIONES = ('last', 'mean', 'max', 'min')
+
+
+def crear_historico(series, capacidad=CAPACIDAD_INICIAL):
+    """Histórico vacío con una columna por serie (p.ej. un sector o un tipo de múltiplo)
+
+    Las fechas se guardan como datetime64[D] ordenadas; los valores en una matriz
+    (observaciones × series) con capacidad que se duplica al crecer.
+    """
+    series = list(series)
+    return {
+        'series': series,
+        'posicion': {serie: j for j, serie in enumerate(series)},
+        'fechas': np.empty(capacidad, dtype='datetime64[D]'),
+        'valores': np.full((capacidad, len(series)), np.nan),
+        'n': 0
+    }
+
+
+def _reservar(historico, n_total):
+    """Duplicar la capacidad de los buffers si no alcanza para n_total observaciones"""
+    capacidad = len(historico['fechas'])
+    if n_total <= capacidad:
+        return
+    nueva = max(2 * capacidad, n_total)
+    fechas = np.empty(nueva, dtype='datetime64[D]')
+    valores = np.full((nueva, len(historico['series'])), np.nan)
+    fechas[:historico['n']] = historico['fechas'][:historico['n']]
+    valores[:historico['n']] = historico['valores'][:historico['n']]
+    historico['fechas'], historico['valores'] = fechas, valores
+
+
+def agregar_observaciones(historico, fechas, valores):
+    """Agregar observaciones al final del histórico (solo-agregar)
+
+    fechas debe ser estrictamente creciente y posterior a la última fecha guardada;
+    valores es {serie: arreglo}. Las series nuevas se agregan como columnas (NaN en
+    el pasado) y las series omitidas quedan en NaN para estas fechas.
+    """
+    fechas = np.asarray(fechas, dtype='datetime64[D]')
+    if len(fechas) == 0:
+        return historico
+    if np.any(np.diff(fechas) <= np.timedelta64(0, 'D')):
+        raise ValueError("Las fechas deben ser estrictamente crecientes")
+    n = historico['n']
+    if n and fechas[0] <= historico['fechas'][n - 1]:
+        raise ValueError(f"El histórico es solo-agregar: {fechas[0]} no es posterior a "
+                         f"{historico['fechas'][n - 1]}")
+
+    nuevas = [serie for serie in valores if serie not in historico['posicion']]
+    if nuevas:
+        historico['valores'] = np.hstack([historico['valores'],
+                                          np.full((len(historico['fechas']), len(nuevas)), np.nan)])
+        for serie in nuevas:
+            historico['posicion'][serie] = len(historico['series'])
+            historico['series'].append(serie)
+
+    _reservar(historico, n + len(fechas))
+    historico['fechas'][n:n + len(fechas)] = fechas
+    for serie, serie_valores in valores.items():
+        historico['valores'][n:n + len(fechas), historico['posicion'][serie]] = serie_valores
+    historico['n'] = n + len(fechas)
+    return historico
+
+
+def historico_desde_dataframe(df, columna_fecha='Periodo'):
+    """Histórico a partir de un DataFrame con una columna de fechas o períodos
+
+    Los períodos (p.ej. trimestres) se fechan al inicio del período.
+    """
+    fechas = df[columna_fecha]
+    if isinstance(fechas.dtype, pd.PeriodDtype):
+        fechas = fechas.dt.start_time
+    orden = np.argsort(fechas.to_numpy(dtype='datetime64[D]'), kind='stable')
+
+    series = [c for c in df.columns if c != columna_fecha]
+    historico = crear_historico(series, capacidad=max(len(df), 1))
+    return agregar_observaciones(
+        historico, fechas.to_numpy(dtype='datetime64[D]')[orden],
+        {serie: df[serie].to_numpy(dtype=float)[orden] for serie in series})
+
+
+def _limites(historico, desde, hasta):
+    """Posiciones [inicio, fin) de las fechas dentro de [desde, hasta] por búsqueda binaria"""
+    fechas = historico['fechas'][:historico['n']]
+    inicio = 0 if desde is None else np.searchsorted(fechas, np.datetime64(desde, 'D'), 'left')
+    fin = len(fechas) if hasta is None else np.searchsorted(fechas, np.datetime64(hasta, 'D'), 'right')
+    return inicio, fin
+
+
+def rango(historico, desde=None, hasta=None, series=None):
+    """Observaciones entre desde y hasta (inclusive) como DataFrame indexado por fecha"""
+    inicio, fin = _limites(historico, desde, hasta)
+    series = historico['series'] if series is None else list(series)
+    columnas = [historico['posicion'][serie] for serie in series]
+
+    return pd.DataFrame(historico['valores'][inicio:fin][:, columnas], columns=series,
+                        index=pd.DatetimeIndex(historico['fechas'][inicio:fin], name='Fecha'))
+
+
+def remuestrear(historico, frecuencia='Q', agregacion='last', desde=None, hasta=None,
+                series=None):
+    """Vista mensual ('M'), trimestral ('Q') o anual ('Y') indexada por período
+
+    Como las fechas están ordenadas, cada período es un tramo contiguo y se reduce
+    con reduceat sin agrupar. last toma la última observación del período; mean,
+    max y min ignoran los NaN.
+    """
+    if frecuencia not in FRECUENCIAS:
+        raise ValueError(f"Frecuencia desconocida: {frecuencia}")
+    if agregacion not in AGREGACIONES:
+        raise ValueError(f"Agregación desconocida: {agregacion}")
+
+    observaciones = rango(historico, desde, hasta, series)
+    unidad, divisor = FRECUENCIAS[frecuencia]
+    ordinales = (observaciones.index.to_numpy().astype(f'datetime64[{unidad}]')
+                 .astype(np.int64) // divisor)
+    # Sin observaciones no hay períodos (ni siquiera el primero)
+    inicios = np.flatnonzero(np.r_[True, np.diff(ordinales) != 0][:len(ordinales)])
+    indice = pd.PeriodIndex.from_ordinals(ordinales[inicios], freq=frecuencia)
+    indice.name = 'Periodo'
+
+    valores = observaciones.to_numpy()
+    if len(valores) == 0:
+        reducidos = valores
+    elif agregacion == 'last':
+        reducidos = valores[np.r_[inicios[1:], len(valores)] - 1]
+    elif agregacion == 'mean':
+        conteos = np.add.reduceat(~np.isnan(valores), inicios, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            reducidos = np.add.reduceat(np.nan_to_num(valores), inicios, axis=0) / conteos
+    else:
+        funcion = np.fmax if agregacion == 'max' else np.fmin
+        reducidos = funcion.reduceat(valores, inicios, axis=0)
+
+    return pd.DataFrame(reducidos, columns=observaciones.columns, index=indice)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Índice de Pares por Similitud - Análisis de Valoraciones Tech
+Árboles KD sobre crecimiento, margen, tamaño, beta y exposición a IA estandarizados,
+con consultas de los k pares más cercanos para todo el universo a la vez
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from registro_empresas import crear_frame_consolidado
+
+K_PARES = 5  # Pares por empresa
+
+# Características de similitud de las empresas (ver caracteristicas_empresas)
+CARACTERISTICAS = ['Revenue_Growth_%', 'EBITDA_Margin_%', 'Log_Revenue_M', 'Beta',
+                   'AI_Exposure_Score']
+
+
+def crear_indice_pares(caracteristicas, nombres=None):
+    """Índice de vecinos más cercanos sobre características estandarizadas
+
+    caracteristicas es pares × dimensiones y puede tener NaN. Cada patrón de datos
+    faltantes tiene sus propios árboles KD, construidos al consultar sobre las
+    dimensiones observadas por el par y el objetivo: la distancia ignora las
+    dimensiones faltantes y se reescala por las observadas, igual que una búsqueda
+    exhaustiva. nombres (opcional) permite excluir a la propia empresa al consultar.
+    """
+    caracteristicas = np.asarray(caracteristicas, dtype=float)
+    media = np.nanmean(caracteristicas, axis=0)
+    desvio = np.nanstd(caracteristicas, axis=0)
+    desvio = np.where(desvio > 0, desvio, 1)
+    puntos = (caracteristicas - media) / desvio
+
+    observadas = ~np.isnan(puntos)
+    patrones, codigos = np.unique(observadas, axis=0, return_inverse=True)
+    return {
+        'media': media,
+        'desvio': desvio,
+        'puntos': puntos,
+        'patrones': patrones,
+        'posiciones': [np.flatnonzero(codigos.ravel() == p) for p in range(len(patrones))],
+        'nombres': None if nombres is None else pd.Series(nombres).to_numpy(),
+        'arboles': {}  # (patrón de pares, dimensiones) -> cKDTree
+    }
+
+
+def _arbol(indice, patron, dimensiones):
+    """Árbol KD de los pares de un patrón sobre ciertas dimensiones (se construye una vez)"""
+    clave = (patron, dimensiones.tobytes())
+    if clave not in indice['arboles']:
+        puntos = indice['puntos'][indice['posiciones'][patron]][:, dimensiones]
+        indice['arboles'][clave] = cKDTree(puntos)
+    return indice['arboles'][clave]
+
+
+def consultar_pares(indice, caracteristicas, k=K_PARES, nombres=None):
+    """Los k pares más cercanos de cada objetivo, en una consulta por lotes
+
+    Devuelve (indices, distancias) de forma objetivos × k, del más al menos cercano;
+    las posiciones sin par quedan en -1 con distancia infinita. Con nombres, un par
+    con el mismo nombre que el objetivo nunca es su vecino.
+    """
+    objetivos = (np.asarray(caracteristicas, dtype=float) - indice['media']) / indice['desvio']
+    n_dimensiones = objetivos.shape[1]
+    excluir = nombres is not None and indice['nombres'] is not None
+    # Vecinos de más por si el propio objetivo (o un homónimo) está entre los pares
+    extra = pd.Series(indice['nombres']).value_counts().max() if excluir else 0
+
+    observadas = ~np.isnan(objetivos)
+    patrones_obj, codigos_obj = np.unique(observadas, axis=0, return_inverse=True)
+    codigos_obj = codigos_obj.ravel()
+    indices = np.full((len(objetivos), k), -1)
+    distancias = np.full((len(objetivos), k), np.inf)
+
+    for patron_obj, observadas_obj in enumerate(patrones_obj):
+        filas = np.flatnonzero(codigos_obj == patron_obj)
+        candidatos, candidatos_dist = [], []
+        for patron, observadas_par in enumerate(indice['patrones']):
+            dimensiones = np.flatnonzero(observadas_obj & observadas_par)
+            posiciones = indice['posiciones'][patron]
+            if len(dimensiones) == 0:
+                continue
+            rangos = np.arange(1, min(k + extra, len(posiciones)) + 1)
+            distancia, vecinos = _arbol(indice, patron, dimensiones).query(
+                objetivos[filas][:, dimensiones], k=rangos, workers=-1)
+            # Distancia sobre las dimensiones observadas, reescalada al total
+            candidatos_dist.append(distancia * np.sqrt(n_dimensiones / len(dimensiones)))
+            candidatos.append(posiciones[np.minimum(vecinos, len(posiciones) - 1)])
+        if not candidatos:
+            continue
+
+        candidatos = np.concatenate(candidatos, axis=1)
+        candidatos_dist = np.concatenate(candidatos_dist, axis=1)
+        if excluir:
+            propios = indice['nombres'][candidatos] == np.asarray(nombres)[filas][:, None]
+            candidatos_dist[propios] = np.inf
+        orden = np.argsort(candidatos_dist, axis=1, kind='stable')[:, :k]
+        ancho = orden.shape[1]
+        distancias[filas, :ancho] = np.take_along_axis(candidatos_dist, orden, axis=1)
+        indices[filas, :ancho] = np.where(np.isfinite(distancias[filas, :ancho]),
+                                          np.take_along_axis(candidatos, orden, axis=1), -1)
+    return indices, distancias
+
+
+def caracteristicas_empresas(consolidado):
+    """Características de similitud por empresa desde el frame consolidado
+
+    Crecimiento, margen y tamaño (log10 del revenue en millones USD) salen de las
+    fuentes DCF o global (con prioridad DCF); beta solo de crear_datos_dcf_empresas y
+    la exposición a IA (1-5) solo de crear_datos_empresas_globales, así que pueden
+    faltar. Solo entran las empresas con datos DCF o globales, en el orden del frame
+    consolidado.
+    """
+    consolidado = consolidado[consolidado.filter(regex='_(dcf|global)$').notna().any(axis=1)]
+
+    df = consolidado[['Empresa']].copy()
+    df['Revenue_Growth_%'] = consolidado['Revenue_Growth_3Y_%_dcf'].combine_first(
+        consolidado['Revenue_Growth_3Y_%_global'])
+    df['EBITDA_Margin_%'] = consolidado['EBITDA_Margin_%_dcf'].combine_first(
+        consolidado['EBITDA_Margin_%_global'])
+    revenue = consolidado['Revenue_2024_M_dcf'].combine_first(consolidado['Revenue_2024_M_USD_global'])
+    df['Log_Revenue_M'] = np.log10(revenue.where(revenue > 0))
+    df['Beta'] = consolidado['Beta_dcf']
+    df['AI_Exposure_Score'] = consolidado['AI_Exposure_Score_global']
+    return df.reset_index()[['Ticker', 'Empresa'] + CARACTERISTICAS]
+
+
+def crear_pares_empresas(consolidado=None, k=K_PARES):
+    """Los k pares más similares de cada empresa del universo DCF + global (formato largo)
+
+    consolidado es el frame de registro_empresas.crear_frame_consolidado.
+    """
+    consolidado = crear_frame_consolidado() if consolidado is None else consolidado
+    df = caracteristicas_empresas(consolidado)
+    empresas = df['Empresa'].to_numpy()
+    indice = crear_indice_pares(df[CARACTERISTICAS].to_numpy(), empresas)
+    indices, distancias = consultar_pares(indice, df[CARACTERISTICAS].to_numpy(), k, empresas)
+
+    validos = indices >= 0
+    filas, rangos = np.nonzero(validos)
+    return pd.DataFrame({
+        'Empresa': empresas[filas],
+        'Rango': rangos + 1,
+        'Par': empresas[indices[validos]],
+        'Distancia': distancias[validos]
+    })
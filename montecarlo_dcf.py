@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Valoración DCF Monte Carlo - Empresas Tecnológicas
+Simulación por bloques vectorizados con percentiles en streaming y múltiples procesos
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from motor_dcf import proyectar_dcf_batch, TERMINAL_GROWTH, SPREAD_MINIMO
+
+# Desvíos de los shocks por trayectoria
+SHOCKS = {
+    'growth_factor': 0.25,  # Desvío relativo sobre el crecimiento base
+    'margin_factor': 0.10,  # Desvío relativo sobre la mejora de márgenes
+    'wacc': 0.01,  # Desvío absoluto del WACC
+    'terminal_growth': 0.005  # Desvío absoluto del crecimiento perpetuo
+}
+
+PERCENTILES = (5, 50, 95)
+PASO_DESCUENTO = 1e-5  # WACC cuantizado a 0.1 pb en la tabla de factores de descuento
+CELDAS_BLOQUE = 1_000_000  # Empresas × trayectorias por bloque: acota la memoria de cada tarea
+PATHS_PILOTO = 10_000  # Trayectorias del bloque piloto que fija el rango de los histogramas
+
+# Entradas por empresa y bordes de los histogramas, compartidos por los procesos
+# (ver _inicializar_worker): las tareas solo llevan rangos y semillas
+_ENTRADAS = {}
+
+
+def _inicializar_worker(entradas):
+    """Recibir una sola vez por proceso las entradas de crear_datos_wacc y los bordes"""
+    _ENTRADAS.update(entradas)
+
+
+def _simular_bloque(entradas, inicio, fin, n_paths, semilla):
+    """EV de n_paths trayectorias de las empresas [inicio, fin): arreglo (fin - inicio, n_paths)"""
+    rng = np.random.default_rng(semilla)
+    shocks = entradas['shocks']
+    forma = (fin - inicio, n_paths)
+
+    growth_factors = 1 + rng.normal(0, shocks['growth_factor'], forma)
+    margin_factors = np.maximum(1 + rng.normal(0, shocks['margin_factor'], forma), 0)
+    terminal_growth = TERMINAL_GROWTH + rng.normal(0, shocks['terminal_growth'], forma)
+    wacc = entradas['wacc'][inicio:fin, None] + rng.normal(0, shocks['wacc'], forma)
+    wacc = np.maximum(wacc, terminal_growth + SPREAD_MINIMO)
+
+    resultado = proyectar_dcf_batch(entradas['revenue'][inicio:fin],
+                                    entradas['growth_pct'][inicio:fin],
+                                    entradas['margin_pct'][inicio:fin], wacc, growth_factors,
+                                    margin_factors, terminal_growth=terminal_growth,
+                                    paso_descuento=PASO_DESCUENTO)
+    return resultado['Enterprise_Value_M']
+
+
+def _histograma_bloque(args):
+    """Simular un bloque de empresas × trayectorias y reducirlo a histograma por empresa"""
+    inicio, fin, n_paths, semilla = args
+    ev = _simular_bloque(_ENTRADAS, inicio, fin, n_paths, semilla)
+
+    bordes = _ENTRADAS['bordes'][inicio:fin]
+    n_emp, n_bins = bordes.shape[0], bordes.shape[1] - 1
+    ancho = (bordes[:, -1] - bordes[:, 0]) / n_bins
+    # Bin 0 = bajo rango, bin n_bins + 1 = sobre rango
+    indices = np.floor((ev - bordes[:, :1]) / ancho[:, None]).astype(np.int64) + 1
+    indices = np.clip(indices, 0, n_bins + 1)
+    planos = indices + (np.arange(n_emp) * (n_bins + 2))[:, None]
+    conteos = np.bincount(planos.ravel(), minlength=n_emp * (n_bins + 2))
+
+    return inicio, fin, conteos.reshape(n_emp, n_bins + 2), ev.sum(axis=1)
+
+
+def _percentiles_histograma(conteos, bordes, percentiles):
+    """Percentiles interpolados linealmente dentro de cada bin"""
+    n_emp, n_bins = bordes.shape[0], bordes.shape[1] - 1
+    acumulado = np.cumsum(conteos, axis=1)
+    total = acumulado[:, -1]
+    filas = np.arange(n_emp)
+
+    valores = {}
+    for q in percentiles:
+        objetivo = total * q / 100
+        idx = (acumulado < objetivo[:, None]).sum(axis=1)
+        regular = np.clip(idx - 1, 0, n_bins - 1)
+        previo = np.where(idx > 0, acumulado[filas, np.maximum(idx - 1, 0)], 0)
+        fraccion = (objetivo - previo) / np.maximum(conteos[filas, idx], 1)
+        lo, hi = bordes[filas, regular], bordes[filas, regular + 1]
+        valor = lo + fraccion * (hi - lo)
+        valor = np.where(idx == 0, bordes[:, 0], valor)
+        valor = np.where(idx == n_bins + 1, bordes[:, -1], valor)
+        valores[q] = valor
+    return valores
+
+
+def _rangos(total, tamano):
+    """Cortes [inicio, fin) de tamaño fijo (el último puede ser menor)"""
+    return [(inicio, min(inicio + tamano, total)) for inicio in range(0, total, tamano)]
+
+
+def simular_dcf_montecarlo(df_wacc=None, n_paths=1_000_000, tamano_bloque=20_000,
+                           n_workers=None, semilla=2024, shocks=None,
+                           percentiles=PERCENTILES, n_bins=4096, celdas_bloque=CELDAS_BLOQUE):
+    """Distribución del Enterprise Value por empresa vía Monte Carlo
+
+    Cada tarea valora un bloque de empresas × trayectorias de a lo sumo
+    celdas_bloque celdas (tamano_bloque acota además las trayectorias), así
+    la memoria por tarea no depende de n_paths ni del tamaño del universo.
+    Los bloques se reducen a histogramas de rango fijo en paralelo; cada
+    bloque tiene su propia semilla, por lo que el resultado no depende de
+    n_workers.
+    """
+    if df_wacc is None:
+        from analisis_dcf_riesgo_tech import crear_datos_wacc
+        df_wacc = crear_datos_wacc()
+
+    entradas = {
+        'revenue': df_wacc['Revenue_2024_M'].to_numpy(dtype=float),
+        'growth_pct': df_wacc['Revenue_Growth_3Y_%'].to_numpy(dtype=float),
+        'margin_pct': df_wacc['EBITDA_Margin_%'].to_numpy(dtype=float),
+        'wacc': df_wacc['WACC'].to_numpy(dtype=float),
+        'shocks': {**SHOCKS, **(shocks or {})}
+    }
+
+    n_emp = len(entradas['revenue'])
+
+    # Bloques de empresas × trayectorias dentro del presupuesto de celdas
+    paths_bloque = max(1, min(tamano_bloque, n_paths, celdas_bloque))
+    empresas_bloque = max(1, celdas_bloque // paths_bloque)
+    cortes_empresas = _rangos(n_emp, empresas_bloque)
+
+    # Semilla propia por (bloque de trayectorias, bloque de empresas); el 0 es el piloto
+    def semilla_bloque(bloque, corte):
+        return np.random.SeedSequence(semilla, spawn_key=(bloque, corte))
+
+    # Bloque piloto para fijar el rango de los histogramas, también por cortes de empresas
+    paths_piloto = max(1, min(tamano_bloque, PATHS_PILOTO, celdas_bloque))
+    empresas_piloto = max(1, celdas_bloque // paths_piloto)
+    bordes = np.empty((n_emp, n_bins + 1))
+    for corte, (inicio, fin) in enumerate(_rangos(n_emp, empresas_piloto)):
+        piloto = _simular_bloque(entradas, inicio, fin, paths_piloto, semilla_bloque(0, corte))
+        lo, hi = np.percentile(piloto, [0.1, 99.9], axis=1)
+        margen = np.maximum(hi - lo, np.abs(hi) * 1e-6 + 1e-9)
+        bordes[inicio:fin] = np.linspace(lo - margen, hi + margen, n_bins + 1, axis=1)
+    entradas['bordes'] = bordes
+
+    tareas = [(inicio, fin, fin_paths - inicio_paths, semilla_bloque(bloque, corte))
+              for bloque, (inicio_paths, fin_paths) in enumerate(_rangos(n_paths, paths_bloque), 1)
+              for corte, (inicio, fin) in enumerate(cortes_empresas)]
+
+    conteos = np.zeros((n_emp, n_bins + 2), dtype=np.int64)
+    suma_ev = np.zeros(n_emp)
+
+    n_workers = max(1, min(n_workers or os.cpu_count() or 1, len(tareas)))
+    if n_workers == 1:
+        _inicializar_worker(entradas)
+        for inicio, fin, conteo, suma in map(_histograma_bloque, tareas):
+            conteos[inicio:fin] += conteo
+            suma_ev[inicio:fin] += suma
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_inicializar_worker,
+                                 initargs=(entradas,)) as executor:
+            for inicio, fin, conteo, suma in executor.map(_histograma_bloque, tareas):
+                conteos[inicio:fin] += conteo
+                suma_ev[inicio:fin] += suma
+
+    valores = _percentiles_histograma(conteos, bordes, percentiles)
+
+    resumen = {'Empresa': df_wacc['Empresa'].to_numpy()}
+    for q in percentiles:
+        resumen[f'EV_P{q}_M'] = valores[q]
+    resumen['EV_Media_M'] = suma_ev / n_paths
+    resumen['Fuera_Rango_%'] = (conteos[:, 0] + conteos[:, -1]) / n_paths * 100
+    resumen['N_Paths'] = n_paths
+
+    return pd.DataFrame(resumen)
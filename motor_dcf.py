@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Motor DCF vectorizado - Empresas Tecnológicas
+Valoración por descuento de flujos de caja sobre arreglos empresas × escenarios × años
+"""
+
+import numpy as np
+
+# Supuestos del modelo DCF (ver crear_proyecciones_dcf)
+ANIOS_PROYECCION = 5
+DECAIMIENTO_CRECIMIENTO = 0.8  # Decrecimiento exponencial del crecimiento
+CONVERSION_FCF = 0.8  # FCF = 80% de EBITDA (simplificación)
+MARGEN_MAXIMO = 0.6  # Tope de margen EBITDA para empresas rentables
+MARGEN_MINIMO = -0.5  # Floor en -50%
+TERMINAL_GROWTH = 0.03  # Crecimiento perpetuo
+SPREAD_MINIMO = 0.01  # WACC - g mínimo para un valor terminal estable
+POLITICAS_TERMINAL = ('tope', 'mascara', 'marcar')
+
+
+def spread_terminal(wacc, terminal_growth, politica='marcar', spread_minimo=SPREAD_MINIMO):
+    """Spread WACC - g con forma fija según la política de valor terminal
+
+    Devuelve (spread, valido), donde valido marca las celdas con spread >= spread_minimo
+    (spread > 0, es decir WACC > g, cuando spread_minimo es 0). tope: el spread se
+    acota a spread_minimo (valores finitos en todas las celdas si es positivo);
+    mascara: NaN en las celdas inválidas; marcar: spread sin modificar, solo se marca.
+    """
+    if politica not in POLITICAS_TERMINAL:
+        raise ValueError(f"Política de valor terminal desconocida: {politica}")
+    spread = np.asarray(wacc, dtype=float) - terminal_growth
+    if spread_minimo > 0:
+        valido = spread >= spread_minimo - 1e-12  # Tolerancia para grillas con np.arange
+    else:
+        valido = spread > 0
+
+    if politica == 'tope':
+        spread = np.maximum(spread, spread_minimo)
+    elif politica == 'mascara':
+        spread = np.where(valido, spread, np.nan)
+    return spread, valido
+
+
+def tabla_descuento(wacc, anios=ANIOS_PROYECCION, paso=None):
+    """Tabla de factores de descuento (1 + WACC)^(t+1) indexada por (WACC, horizonte)
+
+    Exacta (paso=None): una fila por WACC distinto. Cuantizada: una fila por múltiplo
+    de paso entre el WACC mínimo y el máximo, indexada sin ordenar. Devuelve
+    (tabla, indices) con tabla (K, anios) e indices de la forma de wacc, de modo que
+    tabla[indices] son los factores de cada celda. Los WACC no finitos (NaN, inf)
+    apuntan a una última fila de NaN.
+    """
+    wacc = np.asarray(wacc, dtype=float)
+    if wacc.size == 0:
+        return np.empty((0, anios)), np.zeros(wacc.shape, dtype=np.intp)
+
+    finito = np.isfinite(wacc)
+    finitos = wacc[finito]
+    if paso is None:
+        valores, indices_finitos = np.unique(finitos, return_inverse=True)
+    elif finitos.size:
+        cuantos = np.rint(finitos / paso).astype(np.int64)
+        minimo = cuantos.min()
+        indices_finitos = cuantos - minimo
+        valores = (minimo + np.arange(indices_finitos.max() + 1)) * paso
+    else:
+        valores, indices_finitos = np.empty(0), np.empty(0, dtype=np.intp)
+
+    valores = np.r_[valores, np.nan]
+    indices = np.full(wacc.shape, len(valores) - 1, dtype=np.intp)
+    indices[finito] = indices_finitos.ravel()
+    tabla = (1 + valores)[:, None] ** (np.arange(anios) + 1)
+    return tabla, indices
+
+
+def proyectar_dcf_batch(revenue, growth_pct, margin_pct, wacc, growth_factors, margin_factors,
+                        terminal_growth=TERMINAL_GROWTH, anios=ANIOS_PROYECCION,
+                        decaimiento=DECAIMIENTO_CRECIMIENTO, conversion_fcf=CONVERSION_FCF,
+                        margen_maximo=MARGEN_MAXIMO, griegas=False, politica_terminal='marcar',
+                        spread_minimo=SPREAD_MINIMO, paso_descuento=None):
+    """Valoración DCF de todas las empresas y escenarios en operaciones de arreglos
+
+    revenue, growth_pct, margin_pct y wacc son vectores por empresa (N,);
+    growth_factors y margin_factors son vectores por escenario (S,).
+    terminal_growth, decaimiento, conversion_fcf y margen_maximo son escalares
+    o vectores por escenario (S,). wacc, terminal_growth y los factores también
+    aceptan arreglos (N, S) para que cada empresa tenga sus propios escenarios
+    (p.ej. Monte Carlo). Devuelve un dict de arreglos (N, S) más las
+    trayectorias (N, S, T); con griegas=True agrega las derivadas del EV
+    (ver _griegas_dcf) calculadas en la misma pasada. El valor terminal sigue
+    politica_terminal (ver spread_terminal); por defecto (marcar) no se altera
+    y Terminal_Valido solo marca las celdas con WACC - g >= spread_minimo. Los
+    factores de descuento salen de tabla_descuento (cuantizada si se indica
+    paso_descuento).
+    """
+    revenue = np.asarray(revenue, dtype=float)
+    growth_pct = np.asarray(growth_pct, dtype=float)
+    margin_pct = np.asarray(margin_pct, dtype=float)
+    wacc = np.asarray(wacc, dtype=float)
+    growth_factors = np.asarray(growth_factors, dtype=float)
+    margin_factors = np.asarray(margin_factors, dtype=float)
+    terminal_growth = np.asarray(terminal_growth, dtype=float)
+    decaimiento = np.asarray(decaimiento, dtype=float)
+    conversion_fcf = np.asarray(conversion_fcf, dtype=float)
+    margen_maximo = np.asarray(margen_maximo, dtype=float)
+
+    n_emp, n_esc = len(revenue), growth_factors.shape[-1]
+    periodos = np.arange(anios)
+
+    # Proyección de crecimiento decreciente: (N, S, T)
+    growth_base = (growth_pct / 100)[:, None] * growth_factors
+    growth_rates = growth_base[:, :, None] * (decaimiento[..., None] ** periodos)
+
+    # Proyección de ingresos
+    revenue_proj = revenue[:, None, None] * np.cumprod(1 + growth_rates, axis=-1)
+
+    # Proyección de márgenes (mejora gradual)
+    base_margin = np.maximum(margin_pct / 100, MARGEN_MINIMO)[:, None, None]
+    negativo = (margin_pct < 0)[:, None, None]
+    margin_improvement = np.where(negativo, 0.5, 0.1)
+    factor = margin_factors[..., None]
+    margen_negativo = base_margin + margin_improvement * (periodos + 1) * factor
+    margen_positivo = np.minimum(base_margin * (1 + margin_improvement * factor),
+                                 margen_maximo[..., None])
+    margins = np.where(negativo, margen_negativo,
+                       np.broadcast_to(margen_positivo, margen_negativo.shape))
+
+    # Derivada del margen proyectado respecto del margen base (lineal por tramos)
+    if griegas:
+        sin_tope = base_margin * (1 + margin_improvement * factor) < margen_maximo[..., None]
+        dmargen_positivo = np.where(sin_tope, 1 + margin_improvement * factor, 0.0)
+        dmargins = np.where(negativo, (margin_pct / 100 > MARGEN_MINIMO)[:, None, None] * 1.0,
+                            np.broadcast_to(dmargen_positivo, margen_negativo.shape))
+
+    # FCF proyectado
+    fcf = revenue_proj * margins * conversion_fcf[..., None]
+
+    # Valor terminal
+    wacc_2d = np.broadcast_to(wacc[:, None] if wacc.ndim == 1 else wacc, (n_emp, n_esc))
+    spread, valido = spread_terminal(wacc_2d, terminal_growth, politica_terminal, spread_minimo)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terminal_value = fcf[:, :, -1] * (1 + terminal_growth) / spread
+
+    # Valor presente: una búsqueda en la tabla (WACC, horizonte) por celda; con WACC
+    # por empresa los factores se comparten entre escenarios por broadcasting
+    tabla, indices = tabla_descuento(wacc, anios, paso_descuento)
+    factores_descuento = tabla[indices] if wacc.ndim == 2 else tabla[indices][:, None, :]
+    pv_fcf = (fcf / factores_descuento).sum(axis=-1)
+    pv_terminal = terminal_value / factores_descuento[:, :, -1]
+
+    resultado = {
+        'Enterprise_Value_M': pv_fcf + pv_terminal,
+        'WACC': wacc_2d,
+        'Terminal_Value_M': terminal_value,
+        'PV_FCF_5Y_M': pv_fcf,
+        'Revenue_CAGR_%': growth_rates.mean(axis=-1) * 100,
+        'Avg_EBITDA_Margin_%': margins.mean(axis=-1) * 100,
+        'Terminal_Valido': valido,
+        'revenue_proj': revenue_proj,
+        'margins': margins,
+        'fcf': fcf,
+    }
+    if griegas:
+        escalon = np.broadcast_to(growth_factors[..., None] * (decaimiento[..., None] ** periodos),
+                                  growth_rates.shape)
+        # Con tope el spread queda fijo en las celdas inválidas: no depende de WACC ni g
+        activo = valido if politica_terminal == 'tope' else np.ones_like(valido)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            resultado.update(_griegas_dcf(revenue_proj, growth_rates, escalon, margins, dmargins,
+                                          conversion_fcf[..., None], wacc_2d,
+                                          np.broadcast_to(terminal_growth, wacc_2d.shape),
+                                          spread, activo, fcf, factores_descuento,
+                                          pv_terminal, periodos))
+    return resultado
+
+
+def _griegas_dcf(revenue_proj, growth_rates, escalon, margins, dmargins, conversion,
+                 wacc, terminal_growth, spread, activo, fcf, factores_descuento,
+                 pv_terminal, periodos):
+    """Derivadas cerradas del EV (N, S) respecto de WACC, g terminal, crecimiento y margen base
+
+    Las tasas están en decimales: dEV_dWACC es el cambio del EV por unidad de WACC
+    (1.0 = 100%). El crecimiento base es Revenue_Growth_3Y_% / 100 y el margen base
+    EBITDA_Margin_% / 100. El EV es lineal por tramos en el margen, por lo que su
+    segunda derivada es cero y no se reporta. Donde activo es False el spread
+    está acotado y el valor terminal solo depende de WACC por el descuento.
+    """
+    anios = len(periodos)
+    uno_mas_wacc = 1 + wacc
+    activo = activo.astype(float)
+    pv_fcf_t = fcf / factores_descuento
+    pv_ultimo = pv_fcf_t[..., -1]
+
+    # WACC: flujos explícitos y valor terminal descontado
+    t = (periodos + 1).astype(float)
+    d_wacc = -(t * pv_fcf_t).sum(axis=-1) / uno_mas_wacc
+    d2_wacc = (t * (t + 1) * pv_fcf_t).sum(axis=-1) / uno_mas_wacc**2
+    elasticidad = -activo / spread - anios / uno_mas_wacc
+    d_wacc = d_wacc + pv_terminal * elasticidad
+    d2_wacc = d2_wacc + pv_terminal * (elasticidad**2 + activo / spread**2
+                                       + anios / uno_mas_wacc**2)
+
+    # Crecimiento terminal: solo afecta al valor terminal
+    d_terminal = pv_ultimo * (1 / spread + activo * (1 + terminal_growth) / spread**2)
+    d2_terminal = activo * 2 * pv_ultimo * uno_mas_wacc / spread**3
+    d2_wacc_terminal = (-anios / uno_mas_wacc * d_terminal
+                        + activo * pv_ultimo * (1 / spread**2 - 2 * uno_mas_wacc / spread**3))
+
+    # El EV es lineal en el FCF de cada año: EV = sum(peso_t * FCF_t)
+    pesos = np.array(np.broadcast_to(1 / factores_descuento, fcf.shape))
+    pesos[..., -1] *= 1 + (1 + terminal_growth) / spread
+
+    # Crecimiento base: derivadas de la trayectoria de ingresos (modo forward)
+    cociente = escalon / (1 + growth_rates)
+    s1 = np.cumsum(cociente, axis=-1)
+    s2 = np.cumsum(cociente**2, axis=-1)
+    flujo_unitario = pesos * margins * conversion
+    d_growth = (flujo_unitario * revenue_proj * s1).sum(axis=-1)
+    d2_growth = (flujo_unitario * revenue_proj * (s1**2 - s2)).sum(axis=-1)
+
+    # Margen base
+    d_margin = (pesos * revenue_proj * dmargins * conversion).sum(axis=-1)
+    d2_growth_margin = (pesos * revenue_proj * s1 * dmargins * conversion).sum(axis=-1)
+
+    return {
+        'dEV_dWACC': d_wacc,
+        'dEV_dTerminal_Growth': d_terminal,
+        'dEV_dGrowth': d_growth,
+        'dEV_dMargin': d_margin,
+        'd2EV_dWACC2': d2_wacc,
+        'd2EV_dTerminal_Growth2': d2_terminal,
+        'd2EV_dGrowth2': d2_growth,
+        'd2EV_dWACC_dTerminal_Growth': d2_wacc_terminal,
+        'd2EV_dGrowth_dMargin': d2_growth_margin,
+    }
+
+
+def superficie_sensibilidad(base_fcf, wacc_range, growth_range, politica='mascara',
+                            spread_minimo=0.0):
+    """Superficie completa FCF / (WACC - g) por broadcasting
+
+    Devuelve (ev, valido): ev es un arreglo denso (empresas, wacc, growth) de forma
+    fija y valido (wacc, growth) marca las celdas con WACC > g; las celdas válidas
+    conservan FCF / (WACC - g) sin acotar y las inválidas quedan en NaN. Un
+    spread_minimo positivo (p.ej. SPREAD_MINIMO) y otra politica son opcionales
+    (ver spread_terminal).
+    """
+    base_fcf = np.asarray(base_fcf, dtype=float)
+    wacc_range = np.asarray(wacc_range, dtype=float)
+    growth_range = np.asarray(growth_range, dtype=float)
+
+    spread, valido = spread_terminal(wacc_range[:, None], growth_range[None, :],
+                                     politica, spread_minimo)
+    with np.errstate(divide='ignore'):
+        inverso = 1 / spread
+
+    return base_fcf[:, None, None] * inverso[None, :, :], valido
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Orquestador de Análisis - Valoraciones Empresas Tecnológicas
+Grafo de dependencias entre datasets, CSV en datos/ y figuras en figuras/
+"""
+
+import os
+os.environ['MPLBACKEND'] = 'Agg'  # Los nodos de figuras nunca abren ventanas
+
+import argparse
+import importlib
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+
+from cache_build import (calcular_huellas, cargar_manifest, guardar_manifest,
+                         filtrar_obsoletos, registrar_salidas)
+from almacen_columnar import guardar_parquet, pyarrow_disponible
+
+VAL = 'analisis_valoraciones_tech'
+EMP = 'analisis_empresas_especificas'
+DCF = 'analisis_dcf_riesgo_tech'
+INT = 'analisis_internacional_proyecciones'
+CMP = 'comparables'
+PAR = 'indice_pares'
+REG = 'registro_empresas'
+ORQ = 'orquestador'
+
+# Nodos del grafo: función (módulo, nombre), dependencias {argumento: nodo},
+# parámetros fijos, constantes de módulo {argumento: (módulo, nombre)} y archivo
+# de salida (solo CSV y figuras)
+NODOS = {
+    # Datasets - Valoraciones
+    'multiplos_revenue': {'funcion': (VAL, 'crear_datos_multiplos_revenue')},
+    'historicos_saas': {'funcion': (VAL, 'crear_datos_historicos_saas')},
+    'venture_capital': {'funcion': (VAL, 'crear_datos_venture_capital')},
+    'intangibles': {'funcion': (VAL, 'crear_datos_intangibles')},
+    'tabla_comparativa': {'funcion': (VAL, 'crear_datos_tabla_comparativa'),
+                          'deps': {'df': 'multiplos_revenue'}},
+    'ventanas_saas': {'funcion': (VAL, 'crear_analisis_ventanas_saas'),
+                      'deps': {'df': 'historicos_saas'}},
+    # Datasets - Empresas específicas
+    'empresas_lideres': {'funcion': (EMP, 'crear_datos_empresas_lideres')},
+    'ai_impact': {'funcion': (EMP, 'crear_datos_ai_impact')},
+    'saas_vs_tradicional': {'funcion': (EMP, 'crear_datos_saas_vs_tradicional')},
+    # Datasets - DCF y riesgo
+    'empresas_dcf': {'funcion': (DCF, 'crear_datos_dcf_empresas')},
+    'wacc': {'funcion': (DCF, 'crear_datos_wacc'), 'deps': {'df_empresas': 'empresas_dcf'}},
+    # Proyecciones y griegas salen de una sola pasada del motor DCF
+    'valoracion_dcf': {'funcion': (DCF, 'crear_valoracion_dcf'), 'deps': {'df_wacc': 'wacc'}},
+    'proyecciones_dcf': {'funcion': (ORQ, 'extraer_elemento'), 'deps': {'valor': 'valoracion_dcf'},
+                         'params': {'elemento': 'proyecciones'}},
+    'griegas_dcf': {'funcion': (ORQ, 'extraer_elemento'), 'deps': {'valor': 'valoracion_dcf'},
+                    'params': {'elemento': 'griegas'}},
+    'superficie_sensibilidad': {'funcion': (DCF, 'crear_superficie_sensibilidad'),
+                                'deps': {'df_wacc': 'wacc'}},
+    'riesgo_sectorial': {'funcion': (DCF, 'crear_analisis_riesgo_sectorial'),
+                         'deps': {'df_wacc': 'wacc'}},
+    # Datasets - Entidades: fuentes por empresa unidas por ticker canónico
+    'consolidado': {'funcion': (REG, 'crear_frame_consolidado'),
+                    'deps': {'dcf': 'empresas_dcf', 'global': 'empresas_globales',
+                             'lideres': 'empresas_lideres', 'ai': 'ai_impact'}},
+    # Datasets - Comparables
+    'tabla_pares': {'funcion': (CMP, 'crear_tabla_pares'),
+                    'deps': {'df_multiplos': 'multiplos_revenue', 'consolidado': 'consolidado',
+                             'df_modelos': 'saas_vs_tradicional'}},
+    'comparables': {'funcion': (CMP, 'crear_valuacion_comparables'),
+                    'deps': {'df_wacc': 'wacc', 'df_pares': 'tabla_pares'}},
+    'pares_empresas': {'funcion': (PAR, 'crear_pares_empresas'),
+                       'deps': {'consolidado': 'consolidado'}},
+    # Datasets - Internacional
+    'empresas_globales': {'funcion': (INT, 'crear_datos_empresas_globales')},
+    'proyecciones_mercado': {'funcion': (INT, 'crear_proyecciones_mercado_2025_2030')},
+    'regional': {'funcion': (INT, 'crear_analisis_regional'),
+                 'deps': {'df_global': 'empresas_globales'}},
+    'regresion_regional': {'funcion': (INT, 'crear_regresion_multiplos_regional'),
+                           'deps': {'df_global': 'empresas_globales'}},
+    'sectorial_detallado': {'funcion': (INT, 'crear_analisis_sectorial_detallado'),
+                            'deps': {'df_proyecciones': 'proyecciones_mercado',
+                                     'df_global': 'empresas_globales'}},
+    'tendencias': {'funcion': (INT, 'crear_analisis_tendencias_futuras'),
+                   'deps': {'df_proyecciones': 'proyecciones_mercado'}},
+
+    # CSV en datos/
+    'csv_multiplos': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'tabla_comparativa'},
+                      'constantes': {'columnas': (VAL, 'COLUMNAS_TABLA_COMPARATIVA')},
+                      'salida': 'datos/multiplos_valoracion_tech_2024.csv'},
+    'csv_ventanas_saas': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'ventanas_saas'},
+                          'salida': 'datos/metricas_historicas_saas.csv'},
+    'csv_empresas_lideres': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'empresas_lideres'},
+                             'salida': 'datos/empresas_lideres_tech_2024.csv'},
+    'csv_ai_impact': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'ai_impact'},
+                      'salida': 'datos/impacto_ai_valoraciones.csv'},
+    'csv_modelos_negocio': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'saas_vs_tradicional'},
+                            'salida': 'datos/comparacion_modelos_negocio.csv'},
+    'csv_proyecciones_dcf': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'proyecciones_dcf'},
+                             'salida': 'datos/proyecciones_dcf_2024.csv'},
+    'csv_griegas_dcf': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'griegas_dcf'},
+                        'salida': 'datos/griegas_dcf_2024.csv'},
+    'csv_comparables': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'comparables'},
+                        'salida': 'datos/valuacion_comparables_2024.csv'},
+    'csv_pares_empresas': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'pares_empresas'},
+                           'salida': 'datos/pares_similitud_empresas.csv'},
+    'csv_wacc': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'wacc'},
+                 'salida': 'datos/analisis_wacc_empresas.csv'},
+    'csv_riesgo_sectorial': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'riesgo_sectorial'},
+                             'params': {'index': True},
+                             'salida': 'datos/riesgo_sectorial_tech.csv'},
+    'csv_empresas_globales': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'empresas_globales'},
+                              'salida': 'datos/empresas_globales_2024.csv'},
+    'csv_regional': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'regional'},
+                     'params': {'index': True},
+                     'salida': 'datos/analisis_regional.csv'},
+    'csv_regresion_regional': {'funcion': (ORQ, 'exportar_csv'),
+                               'deps': {'df': 'regresion_regional'}, 'params': {'index': True},
+                               'salida': 'datos/regresion_multiplos_regional.csv'},
+    'csv_tendencias': {'funcion': (ORQ, 'exportar_csv'), 'deps': {'df': 'tendencias'},
+                       'salida': 'datos/proyecciones_sectores_2030.csv'},
+    'csv_sectorial_detallado': {'funcion': (ORQ, 'exportar_csv'),
+                                'deps': {'df': 'sectorial_detallado'},
+                                'params': {'elemento': 0},
+                                'salida': 'datos/analisis_sectorial_detallado.csv'},
+
+    # Figuras en figuras/
+    'fig_multiplos_sector': {'funcion': (VAL, 'generar_grafico_multiplos_sector'),
+                             'deps': {'df': 'multiplos_revenue'},
+                             'salida': 'figuras/multiplos_por_sector.png'},
+    'fig_historico_saas': {'funcion': (VAL, 'generar_grafico_historico_saas'),
+                           'deps': {'df': 'historicos_saas'},
+                           'salida': 'figuras/evolucion_multiplos_saas.png'},
+    'fig_venture_capital': {'funcion': (VAL, 'generar_grafico_venture_capital'),
+                            'deps': {'df': 'venture_capital'},
+                            'salida': 'figuras/venture_capital_ai.png'},
+    'fig_intangibles': {'funcion': (VAL, 'generar_grafico_intangibles'),
+                        'deps': {'df': 'intangibles'},
+                        'salida': 'figuras/activos_intangibles.png'},
+    'fig_empresas_lideres': {'funcion': (EMP, 'generar_grafico_empresas_lideres'),
+                             'deps': {'df': 'empresas_lideres'},
+                             'salida': 'figuras/analisis_empresas_lideres.png'},
+    'fig_ai_impact': {'funcion': (EMP, 'generar_grafico_ai_impact'),
+                      'deps': {'df': 'ai_impact'},
+                      'salida': 'figuras/impacto_ai_valoraciones.png'},
+    'fig_modelos_negocio': {'funcion': (EMP, 'generar_grafico_modelos_negocio'),
+                            'deps': {'df': 'saas_vs_tradicional'},
+                            'salida': 'figuras/comparacion_modelos_negocio.png'},
+    'fig_dcf_valoraciones': {'funcion': (DCF, 'generar_grafico_dcf_valoraciones'),
+                             'deps': {'df': 'proyecciones_dcf', 'df_wacc': 'wacc'},
+                             'salida': 'figuras/analisis_dcf_valoraciones.png'},
+    'fig_sensibilidad': {'funcion': (DCF, 'generar_analisis_sensibilidad_visual'),
+                         'deps': {'superficie': 'superficie_sensibilidad'},
+                         'salida': 'figuras/sensibilidad_wacc_growth.png'},
+    'fig_dashboard_riesgo': {'funcion': (DCF, 'generar_dashboard_riesgo'),
+                             'deps': {'df_riesgo': 'riesgo_sectorial', 'df_base': 'wacc'},
+                             'salida': 'figuras/dashboard_analisis_riesgo.png'},
+    'fig_dashboard_internacional': {'funcion': (INT, 'generar_dashboard_internacional'),
+                                    'deps': {'df_global': 'empresas_globales',
+                                             'df_regional': 'regional',
+                                             'df_proyecciones': 'proyecciones_mercado'},
+                                    'salida': 'figuras/dashboard_internacional.png'},
+    'fig_proyecciones_futuras': {'funcion': (INT, 'generar_proyecciones_visuales'),
+                                 'deps': {'df_tendencias': 'tendencias'},
+                                 'salida': 'figuras/proyecciones_futuras.png'},
+}
+
+
+# Copias Parquet tipadas de los datasets de proyecciones, WACC, regiones y sectores
+if pyarrow_disponible():
+    NODOS.update({
+        'parquet_proyecciones_dcf': {'funcion': (ORQ, 'exportar_parquet'),
+                                     'deps': {'df': 'proyecciones_dcf'},
+                                     'salida': 'datos/proyecciones_dcf_2024.parquet'},
+        'parquet_wacc': {'funcion': (ORQ, 'exportar_parquet'), 'deps': {'df': 'wacc'},
+                         'salida': 'datos/analisis_wacc_empresas.parquet'},
+        'parquet_riesgo_sectorial': {'funcion': (ORQ, 'exportar_parquet'),
+                                     'deps': {'df': 'riesgo_sectorial'},
+                                     'salida': 'datos/riesgo_sectorial_tech.parquet'},
+        'parquet_regional': {'funcion': (ORQ, 'exportar_parquet'), 'deps': {'df': 'regional'},
+                             'salida': 'datos/analisis_regional.parquet'},
+        'parquet_sectorial_detallado': {'funcion': (ORQ, 'exportar_parquet'),
+                                        'deps': {'df': 'sectorial_detallado'},
+                                        'params': {'elemento': 0},
+                                        'salida': 'datos/analisis_sectorial_detallado.parquet'},
+    })
+
+
+def exportar_parquet(df, ruta, elemento=None):
+    """Escribir un dataset del grafo en datos/ como Parquet tipado"""
+    if elemento is not None:
+        df = df[elemento]
+    directorio, archivo = os.path.split(ruta)
+    guardar_parquet(df, os.path.splitext(archivo)[0], directorio)
+    return ruta
+
+
+def exportar_csv(df, ruta, index=False, columnas=None, elemento=None):
+    """Escribir un dataset del grafo en datos/"""
+    if elemento is not None:
+        df = df[elemento]
+    if columnas is not None:
+        df = df[columnas]
+    df.to_csv(ruta, index=index, encoding='utf-8')
+    return ruta
+
+
+def extraer_elemento(valor, elemento):
+    """Un elemento de un resultado compuesto (tupla o dict) como nodo del grafo"""
+    return valor[elemento]
+
+
+def _funcion(referencia):
+    """Resolver una referencia (módulo, nombre) a una función o constante de módulo"""
+    modulo, nombre = referencia
+    return getattr(importlib.import_module(modulo), nombre)
+
+
+def _ejecutar_nodo(nombre, nodo, kwargs):
+    """Ejecutar un nodo (en un proceso del pool o en el proceso actual)"""
+    from salida_figuras import activar_modo_headless
+    activar_modo_headless()
+    import matplotlib.pyplot as plt
+
+    kwargs = dict(kwargs, **nodo.get('params', {}),
+                  **{arg: _funcion(ref) for arg, ref in nodo.get('constantes', {}).items()})
+    if 'salida' in nodo and nodo['funcion'][0] == ORQ:
+        kwargs['ruta'] = nodo['salida']
+
+    inicio = time.perf_counter()
+    try:
+        resultado = _funcion(nodo['funcion'])(**kwargs)
+    finally:
+        plt.close('all')
+    # Los nodos con archivo de salida no necesitan devolver su resultado
+    if 'salida' in nodo:
+        resultado = nodo['salida']
+    return nombre, resultado, time.perf_counter() - inicio
+
+
+def _copiar(valor):
+    """Aislar los datasets compartidos cuando los nodos corren en el mismo proceso"""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return valor.copy()
+    if isinstance(valor, tuple):
+        return tuple(_copiar(v) for v in valor)
+    if isinstance(valor, dict):
+        return {k: _copiar(v) for k, v in valor.items()}
+    return valor
+
+
+def validar_grafo(nodos=None):
+    """Verificar dependencias existentes y ausencia de ciclos; devuelve orden topológico"""
+    nodos = NODOS if nodos is None else nodos
+    orden, estado = [], {}
+
+    def visitar(nombre, camino):
+        if nombre not in nodos:
+            raise KeyError(f"Nodo desconocido: {nombre} (desde {' -> '.join(camino)})")
+        if estado.get(nombre) == 'visitando':
+            raise ValueError(f"Ciclo en el grafo: {' -> '.join(camino + [nombre])}")
+        if estado.get(nombre) == 'listo':
+            return
+        estado[nombre] = 'visitando'
+        for dep in nodos[nombre].get('deps', {}).values():
+            visitar(dep, camino + [nombre])
+        estado[nombre] = 'listo'
+        orden.append(nombre)
+
+    for nombre in nodos:
+        visitar(nombre, [])
+    return orden
+
+
+def cerrar_dependencias(objetivos, nodos=None):
+    """Nodos objetivo más todos sus ancestros"""
+    nodos = NODOS if nodos is None else nodos
+    requeridos, pendientes = set(), list(objetivos)
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre not in requeridos:
+            requeridos.add(nombre)
+            pendientes.extend(nodos[nombre].get('deps', {}).values())
+    return requeridos
+
+
+def ejecutar_grafo(objetivos=None, n_workers=None, nodos=None, incremental=True):
+    """Ejecutar el grafo: nodos independientes en paralelo, cada nodo una sola vez
+
+    En modo incremental solo se regeneran las salidas cuya huella (código,
+    constantes, parámetros y dependencias) cambió respecto del manifiesto.
+    """
+    nodos = NODOS if nodos is None else nodos
+    orden = validar_grafo(nodos)
+    objetivos = [n for n in orden if 'salida' in nodos[n]] if objetivos is None else objetivos
+
+    # Las huellas se calculan siempre: también una construcción forzada deja manifiesto
+    huellas = calcular_huellas(nodos)
+    manifest = cargar_manifest()
+    if incremental:
+        obsoletos = filtrar_obsoletos(objetivos, nodos, huellas, manifest)
+        print(f"Salidas vigentes: {len(objetivos) - len(obsoletos)} | a regenerar: {len(obsoletos)}")
+        objetivos = obsoletos
+
+    requeridos = cerrar_dependencias(objetivos, nodos)
+
+    os.makedirs('datos', exist_ok=True)
+    os.makedirs('figuras', exist_ok=True)
+
+    # Consumidores pendientes de cada resultado, para liberar memoria al terminar
+    consumidores = {n: 0 for n in requeridos}
+    for n in requeridos:
+        for dep in nodos[n].get('deps', {}).values():
+            consumidores[dep] += 1
+
+    resultados, tiempos = {}, {}
+    pendientes = [n for n in orden if n in requeridos]
+    inicio_total = time.perf_counter()
+    n_workers = n_workers or os.cpu_count() or 1
+
+    def listos():
+        return [n for n in pendientes
+                if all(dep in resultados for dep in nodos[n].get('deps', {}).values())]
+
+    def registrar(nombre, resultado, segundos):
+        resultados[nombre] = resultado
+        tiempos[nombre] = segundos
+        for dep in nodos[nombre].get('deps', {}).values():
+            consumidores[dep] -= 1
+            if consumidores[dep] == 0 and dep not in objetivos:
+                resultados[dep] = None
+
+    def argumentos(nombre):
+        return {arg: resultados[dep] for arg, dep in nodos[nombre].get('deps', {}).items()}
+
+    if n_workers == 1:
+        for nombre in list(pendientes):
+            kwargs = {arg: _copiar(v) for arg, v in argumentos(nombre).items()}
+            registrar(*_ejecutar_nodo(nombre, nodos[nombre], kwargs))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            en_curso = {}
+            while pendientes or en_curso:
+                for nombre in listos():
+                    pendientes.remove(nombre)
+                    futuro = executor.submit(_ejecutar_nodo, nombre, nodos[nombre],
+                                             argumentos(nombre))
+                    en_curso[futuro] = nombre
+                terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    del en_curso[futuro]
+                    registrar(*futuro.result())
+
+    total = time.perf_counter() - inicio_total
+
+    guardar_manifest(registrar_salidas(manifest, nodos, huellas, tiempos))
+
+    print("\n" + "="*80)
+    print(f"ORQUESTADOR: {len(tiempos)} nodos ejecutados con {n_workers} procesos")
+    print("="*80)
+    for nombre in orden:
+        if nombre in tiempos:
+            salida = nodos[nombre].get('salida', '')
+            print(f"  {nombre:<30} {tiempos[nombre]:7.2f}s  {salida}")
+    print(f"Tiempo total: {total:.2f}s (suma nodos {sum(tiempos.values()):.2f}s)")
+
+    return {n: resultados[n] for n in objetivos}, tiempos
+
+
+def main():
+    """Reconstrucción completa de datos/ y figuras/"""
+    parser = argparse.ArgumentParser(description='Orquestador de análisis de valoraciones tech')
+    parser.add_argument('--workers', type=int, default=None, help='Procesos en paralelo')
+    parser.add_argument('--objetivos', nargs='*', default=None,
+                        help='Nodos a construir (por defecto todos los CSV y figuras)')
+    parser.add_argument('--listar', action='store_true', help='Listar nodos y dependencias')
+    parser.add_argument('--forzar', action='store_true',
+                        help='Regenerar todas las salidas ignorando el manifiesto')
+    args = parser.parse_args()
+
+    if args.listar:
+        for nombre in validar_grafo():
+            deps = ', '.join(NODOS[nombre].get('deps', {}).values())
+            print(f"{nombre:<30} <- {deps or '-'}")
+        return
+
+    ejecutar_grafo(args.objetivos, n_workers=args.workers, incremental=not args.forzar)
+
+
+if __name__ == "__main__":
+    main()
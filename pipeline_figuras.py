@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Pipeline de Renderizado de Figuras - Análisis de Valoraciones Tech
+Prepara los datos una vez y dibuja las figuras en paralelo con el backend Agg
+"""
+
+import os
+os.environ['MPLBACKEND'] = 'Agg'  # Antes de importar matplotlib en cualquier proceso
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from orquestador import NODOS, _ejecutar_nodo, cerrar_dependencias, validar_grafo
+
+
+def trabajos_figuras(nodos=None):
+    """Nodos de figura del grafo del orquestador (salida en figuras/), en orden topológico
+
+    El grafo es la única definición de cada figura: función de dibujo, datasets
+    que recibe y archivo de salida.
+    """
+    nodos = NODOS if nodos is None else nodos
+    return [n for n in validar_grafo(nodos) if nodos[n].get('salida', '').startswith('figuras/')]
+
+
+TRABAJOS_FIGURAS = trabajos_figuras()
+
+
+def _argumentos(nombre, datos, nodos):
+    """Datasets que recibe un nodo, tomados de los ya calculados"""
+    return {arg: datos[dep] for arg, dep in nodos[nombre].get('deps', {}).items()}
+
+
+def preparar_datos(trabajos, nodos=None):
+    """Calcular una sola vez, en orden topológico, cada dataset requerido por las figuras"""
+    nodos = NODOS if nodos is None else nodos
+    requeridos = cerrar_dependencias(trabajos, nodos) - set(trabajos)
+
+    datos, tiempos = {}, {}
+    for nombre in validar_grafo(nodos):
+        if nombre in requeridos:
+            _, datos[nombre], tiempos[nombre] = _ejecutar_nodo(nombre, nodos[nombre],
+                                                               _argumentos(nombre, datos, nodos))
+    return datos, tiempos
+
+
+def _dibujar(nombre, nodo, kwargs):
+    """Dibujar y guardar una figura en un proceso del pool"""
+    _, salida, segundos = _ejecutar_nodo(nombre, nodo, kwargs)
+    return salida, segundos, os.getpid()
+
+
+def renderizar_figuras(trabajos=None, n_workers=None, nodos=None):
+    """Renderizar figuras en paralelo y devolver los tiempos por figura"""
+    nodos = NODOS if nodos is None else nodos
+    trabajos = TRABAJOS_FIGURAS if trabajos is None else trabajos
+    os.makedirs('figuras', exist_ok=True)
+
+    inicio_total = time.perf_counter()
+    datos, tiempos_datos = preparar_datos(trabajos, nodos)
+
+    tiempos = []
+    n_workers = n_workers or min(len(trabajos), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futuros = {}
+        for nombre in trabajos:
+            futuro = executor.submit(_dibujar, nombre, nodos[nombre],
+                                     _argumentos(nombre, datos, nodos))
+            ancestros = cerrar_dependencias([nombre], nodos) - {nombre}
+            futuros[futuro] = sum(tiempos_datos.get(dep, 0) for dep in ancestros)
+        for futuro in as_completed(futuros):
+            salida, segundos, pid = futuro.result()
+            tiempos.append({'Figura': salida, 'Datos_s': futuros[futuro],
+                            'Render_s': segundos, 'PID': pid})
+
+    tiempos.sort(key=lambda t: t['Figura'])
+    total = time.perf_counter() - inicio_total
+
+    print("\n" + "="*80)
+    print(f"RENDERIZADO DE FIGURAS ({len(trabajos)} figuras, {n_workers} procesos)")
+    print("="*80)
+    for t in tiempos:
+        print(f"  {t['Figura']:<45} datos {t['Datos_s']:6.2f}s | render {t['Render_s']:6.2f}s")
+    print(f"Tiempo total: {total:.2f}s "
+          f"(suma render {sum(t['Render_s'] for t in tiempos):.2f}s)")
+
+    return tiempos
+
+
+def main():
+    """Reconstruir figuras/ en paralelo"""
+    parser = argparse.ArgumentParser(description='Renderizado paralelo de figuras')
+    parser.add_argument('--workers', type=int, default=None, help='Procesos de renderizado')
+    parser.add_argument('--solo', nargs='*', default=None,
+                        help='Nombres de figura a renderizar (p.ej. multiplos_por_sector)')
+    args = parser.parse_args()
+
+    trabajos = TRABAJOS_FIGURAS
+    if args.solo:
+        trabajos = [n for n in TRABAJOS_FIGURAS
+                    if os.path.splitext(os.path.basename(NODOS[n]['salida']))[0] in args.solo]
+
+    renderizar_figuras(trabajos, n_workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Registro de Empresas - Análisis de Valoraciones Tech
+Índice por empresa (nombre o ticker) con acceso O(1) a filas y columnas categóricas,
+tabla canónica de entidades con alias y frame consolidado de todas las fuentes
+"""
+
+import importlib
+
+import numpy as np
+import pandas as pd
+
+from cache_datos import memoizar
+
+# Ticker canónico de cada empresa usada en los análisis
+TICKERS = {
+    'Microsoft': 'MSFT', 'Apple': 'AAPL', 'NVIDIA': 'NVDA', 'Amazon': 'AMZN',
+    'Alphabet': 'GOOGL', 'Meta': 'META', 'Tesla': 'TSLA',
+    'Salesforce': 'CRM', 'Adobe': 'ADBE', 'Netflix': 'NFLX', 'Palantir': 'PLTR',
+    'Snowflake': 'SNOW', 'Zoom': 'ZM', 'ServiceNow': 'NOW', 'Datadog': 'DDOG',
+    'Oracle': 'ORCL', 'Broadcom': 'AVGO', 'ASML': 'ASML', 'IBM': 'IBM', 'Cisco': 'CSCO',
+    'Intel': 'INTC', 'Uber': 'UBER', 'Airbnb': 'ABNB', 'SAP': 'SAP', 'Spotify': 'SPOT',
+    'Adyen': 'ADYEN', 'Shopify': 'SHOP', 'TSMC': 'TSM', 'Samsung': '005930',
+    'Tencent': '0700', 'Alibaba': 'BABA', 'Toyota': 'TM', 'Sony': 'SONY'
+}
+
+# Nombres alternativos con que una empresa aparece en las fuentes -> nombre canónico
+ALIAS_EMPRESAS = {
+    'Alphabet (Google)': 'Alphabet', 'Google': 'Alphabet', 'Meta Platforms': 'Meta',
+    'Taiwan Semiconductor': 'TSMC', 'Samsung Electronics': 'Samsung'
+}
+
+# Etiquetas sectoriales de las fuentes -> sector canónico (taxonomía de las empresas
+# líderes); una etiqueta sin mapeo ya es canónica
+SECTORES_CANONICOS = {
+    'Enterprise Software': 'Software', 'Creative Software': 'Software',
+    'Cloud/Software': 'Software',
+    'Consumer Hardware': 'Hardware', 'Consumer Tech': 'Hardware',
+    'Consumer Electronics': 'Hardware',
+    'AI/Semiconductors': 'Semiconductors', 'Semiconductor Manufacturing': 'Semiconductors',
+    'Semiconductor Equip': 'Semiconductor Equipment',
+    'E-commerce/Cloud': 'E-commerce', 'E-commerce Platform': 'E-commerce',
+    'Internet/Search': 'Internet', 'Internet/AI': 'Internet', 'Gaming/Internet': 'Internet',
+    'Electric Vehicles': 'Automotive', 'EV/Energy': 'Automotive',
+    'SaaS/CRM': 'SaaS', 'Enterprise SaaS': 'SaaS', 'IT Automation': 'SaaS',
+    'DevOps/Monitoring': 'SaaS',
+    'Streaming Media': 'Streaming', 'Music Streaming': 'Streaming'
+}
+
+# Columnas que se guardan como categóricas (códigos enteros + categorías)
+COLUMNAS_CATEGORICAS = ('Sector_Detail', 'Region', 'Escenario')
+
+# Columnas clave de los datasets: empresa y clasificaciones sectoriales
+COLUMNA_EMPRESA = 'Empresa'
+COLUMNAS_SECTOR = ('Sector', 'Sector_Detail', 'Sector_Specific')
+
+# Columnas en billones (miles de millones) USD -> columna en millones USD
+UNIDADES_A_MILLONES = {
+    'Market_Cap_B': 'Market_Cap_M_USD',
+    'Market_Cap_B_USD': 'Market_Cap_M_USD',
+    'Valoracion_Pre_AI_2022_B': 'Valoracion_Pre_AI_2022_M_USD',
+    'Valoracion_Post_AI_2024_B': 'Valoracion_Post_AI_2024_M_USD'
+}
+
+# Fuentes por empresa que se consolidan: nombre -> (módulo, función)
+FUENTES_EMPRESAS = {
+    'dcf': ('analisis_dcf_riesgo_tech', 'crear_datos_dcf_empresas'),
+    'global': ('analisis_internacional_proyecciones', 'crear_datos_empresas_globales'),
+    'lideres': ('analisis_empresas_especificas', 'crear_datos_empresas_lideres'),
+    'ai': ('analisis_empresas_especificas', 'crear_datos_ai_impact')
+}
+
+
+def nombre_canonico(empresa):
+    """Nombre canónico de una empresa a partir de cualquiera de sus alias"""
+    return ALIAS_EMPRESAS.get(empresa, empresa)
+
+
+def ticker(empresa):
+    """Ticker canónico de una empresa (el propio nombre si no tiene ticker)"""
+    empresa = nombre_canonico(empresa)
+    return TICKERS.get(empresa, empresa)
+
+
+def sector_canonico(sectores):
+    """Sector canónico de cada etiqueta sectorial, como arreglo (mapeo por lotes)"""
+    sectores = pd.Series(sectores, dtype=object)
+    return sectores.map(SECTORES_CANONICOS).fillna(sectores).to_numpy()
+
+
+@memoizar
+def crear_tabla_entidades():
+    """Tabla canónica de entidades: ticker, nombre canónico y alias conocidos"""
+    alias = {}
+    for nombre, canonico in ALIAS_EMPRESAS.items():
+        alias.setdefault(canonico, []).append(nombre)
+
+    return pd.DataFrame({
+        'Ticker': list(TICKERS.values()),
+        'Empresa': list(TICKERS),
+        'Alias': [', '.join(alias.get(nombre, [])) for nombre in TICKERS]
+    }).set_index('Ticker')
+
+
+def _claves_entidades(entidades):
+    """Ticker de cada nombre, alias o ticker de la tabla de entidades"""
+    alias = entidades['Alias'].str.split(', ').explode()
+    claves = pd.concat([
+        pd.Series(entidades.index, index=entidades.index),
+        entidades['Empresa'],
+        alias[alias != '']
+    ])
+    claves = pd.Series(claves.index, index=claves.to_numpy())
+    return claves[~claves.index.duplicated()]  # Tickers iguales al nombre (IBM, ASML)
+
+
+def normalizar_entidades(df, columna=COLUMNA_EMPRESA):
+    """Copia de df con nombre canónico, columna Ticker y montos en millones USD
+
+    Los nombres se resuelven con un único hash join contra la tabla de entidades;
+    una empresa desconocida conserva su nombre y lo usa como ticker.
+    """
+    df = df.copy()
+    entidades = crear_tabla_entidades()
+    tickers = df[columna].map(_claves_entidades(entidades))
+    df[columna] = tickers.map(entidades['Empresa']).fillna(df[columna])
+    df.insert(0, 'Ticker', tickers.fillna(df[columna]))
+
+    for origen, destino in UNIDADES_A_MILLONES.items():
+        if origen in df.columns:
+            df[origen] = df[origen] * 1000
+            df = df.rename(columns={origen: destino})
+    return df
+
+
+def codificar_categoricas(df, columnas=COLUMNAS_CATEGORICAS):
+    """Convertir a categóricas las columnas de texto repetitivas presentes en df"""
+    for columna in columnas:
+        if columna in df.columns and not isinstance(df[columna].dtype, pd.CategoricalDtype):
+            df[columna] = pd.Categorical(df[columna])
+    return df
+
+
+def crear_registro(df, claves='Empresa'):
+    """Índice posicional de df por una clave (o tupla de claves, p.ej. Empresa y Escenario)
+
+    La primera clave acepta el nombre, cualquier alias o el ticker de la empresa.
+    """
+    claves = (claves,) if isinstance(claves, str) else tuple(claves)
+    valores = [df[c].to_numpy() for c in claves]
+
+    tuplas = list(zip(*valores)) if len(claves) > 1 else valores[0].tolist()
+
+    # Primera fila de cada clave, en una sola pasada
+    n = len(tuplas)
+    posicion = dict(zip(reversed(tuplas), range(n - 1, -1, -1)))
+
+    # Alias por nombre canónico y por ticker, solo en las filas de empresas conocidas
+    conocidas = pd.Series(valores[0], dtype=object).isin(list(ALIAS_EMPRESAS) + list(TICKERS))
+    for i in np.flatnonzero(conocidas.to_numpy()).tolist():
+        primera, resto = (tuplas[i][0], tuplas[i][1:]) if len(claves) > 1 else (tuplas[i], None)
+        for alias in (nombre_canonico(primera), ticker(primera)):
+            clave = alias if resto is None else (alias,) + resto
+            if posicion.get(clave, n) > i:
+                posicion[clave] = i
+
+    return {'df': df, 'claves': claves, 'posicion': posicion, 'columnas': {}}
+
+
+def posicion(registro, clave):
+    """Posición de una empresa en el DataFrame registrado (KeyError si no existe)"""
+    try:
+        return registro['posicion'][clave]
+    except KeyError:
+        raise KeyError(f"{clave!r} no está en el registro ({', '.join(registro['claves'])})") from None
+
+
+def contiene(registro, clave):
+    """Indica si la empresa (o clave compuesta) está registrada"""
+    return clave in registro['posicion']
+
+
+def fila(registro, clave):
+    """Fila completa de una empresa"""
+    return registro['df'].iloc[posicion(registro, clave)]
+
+
+def filas(registro, claves):
+    """Filas de varias empresas, en el orden pedido"""
+    return registro['df'].iloc[[posicion(registro, c) for c in claves]]
+
+
+def _columna(registro, columna):
+    """Columna como arreglo NumPy, convertida una sola vez por registro"""
+    if columna not in registro['columnas']:
+        registro['columnas'][columna] = registro['df'][columna].to_numpy()
+    return registro['columnas'][columna]
+
+
+def valor(registro, clave, columna):
+    """Valor de una columna para una empresa"""
+    return _columna(registro, columna)[posicion(registro, clave)]
+
+
+def valores(registro, claves, columna):
+    """Valores de una columna para varias empresas, como arreglo"""
+    indices = np.fromiter((posicion(registro, c) for c in claves), dtype=np.intp)
+    return _columna(registro, columna)[indices]
+
+
+def consolidar_fuentes(frames):
+    """Frame ancho por ticker a partir de {fuente: DataFrame}: columnas de cada fuente
+    (sufijo _fuente) unidas por hash join, en orden de aparición de las empresas
+
+    El nombre de cada empresa es el de la primera fuente que la trae. Si una fuente
+    repite un ticker (p.ej. un alias y el nombre canónico) se conserva su primera fila.
+    """
+    columnas, nombres = [], []
+    for fuente, df in frames.items():
+        df = normalizar_entidades(df).set_index('Ticker')
+        df = df[~df.index.duplicated()]
+        nombres.append(df.pop(COLUMNA_EMPRESA))
+        columnas.append(df.add_suffix(f'_{fuente}'))
+
+    consolidado = pd.concat(columnas, axis=1, join='outer', sort=False)
+    nombres = pd.concat(nombres)
+    consolidado.insert(0, COLUMNA_EMPRESA, nombres[~nombres.index.duplicated()])
+    return consolidado
+
+
+@memoizar
+def crear_frame_consolidado(fuentes=None, **frames):
+    """Frame consolidado (ver consolidar_fuentes) de las fuentes de FUENTES_EMPRESAS
+
+    Las fuentes ya calculadas se pasan por nombre (dcf=..., lideres=...); el resto de
+    las fuentes pedidas se construye con su función de FUENTES_EMPRESAS.
+    """
+    fuentes = list(FUENTES_EMPRESAS if fuentes is None else fuentes)
+    for fuente in fuentes:
+        if fuente not in frames:
+            modulo, funcion = FUENTES_EMPRESAS[fuente]
+            frames[fuente] = getattr(importlib.import_module(modulo), funcion)()
+    return consolidar_fuentes({fuente: frames[fuente] for fuente in fuentes})
+
+
+def presencia_fuentes(consolidado, fuentes=None):
+    """Empresas × fuentes: si cada fuente trae algún dato de la empresa"""
+    fuentes = list(FUENTES_EMPRESAS if fuentes is None else fuentes)
+    return pd.DataFrame({fuente: consolidado.filter(regex=f'_{fuente}$').notna().any(axis=1)
+                         for fuente in fuentes})
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Regresiones por Lotes - Análisis de Valoraciones Tech
+Mínimos cuadrados de miles de regresiones pequeñas a la vez (múltiplo vs crecimiento por
+sector, región, fecha o conjunto de pares) con coeficientes, R² y residuos
+"""
+
+import numpy as np
+import pandas as pd
+
+from agregaciones import indexar_grupos
+
+
+def minimos_cuadrados(x, y):
+    """Regresiones independientes y ~ a + x·b, una por fila, en una sola pasada
+
+    x es lotes × observaciones (un regresor) o lotes × observaciones × regresores;
+    y es lotes × observaciones. Las observaciones con NaN en x o y no participan, así
+    cada lote puede tener distinto tamaño. Se resuelven las ecuaciones normales sobre
+    datos centrados por lote; un lote sin observaciones suficientes o con regresores
+    colineales queda con valido=False y coeficientes NaN.
+    """
+    y = np.asarray(y, dtype=float)
+    x = np.asarray(x, dtype=float)
+    x = x[..., None] if x.ndim == y.ndim else x
+    p = x.shape[-1]
+
+    validos = ~np.isnan(y) & ~np.isnan(x).any(axis=-1)
+    n = validos.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media_x = np.where(validos[..., None], x, 0).sum(axis=1) / n[:, None]
+        media_y = np.where(validos, y, 0).sum(axis=1) / n
+        dx = np.where(validos[..., None], x - media_x[:, None, :], 0)
+        dy = np.where(validos, y - media_y[:, None], 0)
+
+        sxx = np.einsum('gnp,gnq->gpq', dx, dx)
+        sxy = np.einsum('gnp,gn->gp', dx, dy)
+        syy = (dy**2).sum(axis=1)
+        if p == 1:
+            rango = (sxx[:, 0, 0] > 0).astype(int)
+            pendientes = sxy / sxx[:, :, 0]
+        else:
+            rango = np.linalg.matrix_rank(sxx)
+            pendientes = np.einsum('gpq,gq->gp', np.linalg.pinv(sxx), sxy)
+
+        valido = (n > p) & (rango == p)
+        pendientes = np.where(valido[:, None], pendientes, np.nan)
+        ajustados = np.where(validos, media_y[:, None] + np.einsum('gnp,gp->gn', dx, pendientes),
+                             np.nan)
+        residuos = y - ajustados
+        r2 = np.where(valido, 1 - np.nansum(residuos**2, axis=1) / syy, np.nan)
+
+    return {
+        'n': n,
+        'valido': valido,
+        'intercepto': media_y - (media_x * pendientes).sum(axis=1),
+        'pendientes': pendientes,
+        'r2': r2,
+        'correlacion': np.sign(pendientes[:, 0]) * np.sqrt(np.maximum(r2, 0)) if p == 1 else None,
+        'ajustados': ajustados,
+        'residuos': residuos,
+        'media_x': media_x,
+        'media_y': media_y
+    }
+
+
+def predecir(ajuste, x):
+    """Valor ajustado de cada lote en x (un punto por lote, o lotes × puntos)"""
+    x = np.asarray(x, dtype=float)
+    pendientes, media_x = ajuste['pendientes'], ajuste['media_x']
+    if pendientes.shape[1] == 1:
+        x = x[..., None]
+    if x.ndim == 2:
+        return ajuste['media_y'] + ((x - media_x) * pendientes).sum(axis=1)
+    return ajuste['media_y'][:, None] + ((x - media_x[:, None, :]) * pendientes[:, None, :]).sum(axis=2)
+
+
+def ajustar_tendencia(x, y):
+    """Recta de tendencia de una sola serie (reemplazo de polyfit de grado 1 + corrcoef)
+
+    Devuelve pendiente, intercepto, r2, correlacion, valores ajustados y residuos de la
+    regresión y ~ a + b·x.
+    """
+    ajuste = minimos_cuadrados(np.asarray(x, dtype=float)[None, :], np.asarray(y, dtype=float)[None, :])
+    return {
+        'pendiente': ajuste['pendientes'][0, 0],
+        'intercepto': ajuste['intercepto'][0],
+        'r2': ajuste['r2'][0],
+        'correlacion': ajuste['correlacion'][0],
+        'ajustados': ajuste['ajustados'][0],
+        'residuos': ajuste['residuos'][0]
+    }
+
+
+def _posiciones_grupos(indice):
+    """(grupo, posición dentro del grupo) de cada fila en el orden de indice['orden']"""
+    conteos = np.asarray(indice['conteos'])
+    inicios = np.cumsum(conteos) - conteos
+    grupos = np.repeat(np.arange(len(conteos)), conteos)
+    return grupos, np.arange(len(indice['orden'])) - np.repeat(inicios, conteos)
+
+
+def _matriz_grupos(indice, valores):
+    """Valores de una columna como matriz grupos × máximo tamaño de grupo (relleno NaN)"""
+    valores = np.asarray(valores, dtype=float)
+    ancho = max(int(indice['conteos'].max(initial=0)), 1)
+    matriz = np.full((len(indice['grupos']), ancho) + valores.shape[1:], np.nan)
+    matriz[_posiciones_grupos(indice)] = valores[indice['orden']]
+    return matriz
+
+
+def regresion_por_grupo(df, clave, regresores, objetivo):
+    """Una regresión objetivo ~ regresores por valor de clave (sector, región, fecha...)
+
+    Devuelve (coeficientes, residuos): un DataFrame por grupo con observaciones,
+    intercepto, pendiente de cada regresor y R², y los residuos alineados con df
+    (NaN en las filas fuera de un ajuste válido).
+    """
+    regresores = [regresores] if isinstance(regresores, str) else list(regresores)
+    indice = indexar_grupos(df, clave)
+    ajuste = minimos_cuadrados(_matriz_grupos(indice, df[regresores].to_numpy(dtype=float)),
+                               _matriz_grupos(indice, df[objetivo].to_numpy(dtype=float)))
+
+    coeficientes = pd.DataFrame({'Observaciones': ajuste['n'], 'Intercepto': ajuste['intercepto']},
+                                index=indice['grupos'])
+    for j, regresor in enumerate(regresores):
+        coeficientes[f'Pendiente_{regresor}'] = ajuste['pendientes'][:, j]
+    coeficientes['R2'] = ajuste['r2']
+
+    # Residuos de vuelta al orden de las filas de df
+    residuos = np.full(len(df), np.nan)
+    residuos[indice['orden']] = ajuste['residuos'][_posiciones_grupos(indice)]
+    return coeficientes, pd.Series(residuos, index=df.index, name=f'Residuo_{objetivo}')
@@ -8,6 +8,10 @@ import os
 import pandas as pd
 from datetime import datetime
 
+from almacen_columnar import pyarrow_disponible, ruta_parquet, describir_parquet, leer_parquet
+from registro_empresas import (COLUMNA_EMPRESA, COLUMNAS_SECTOR, crear_frame_consolidado,
+                               crear_tabla_entidades, nombre_canonico, presencia_fuentes)
+
 def generar_inventario_archivos():
     """Generar inventario completo de archivos generados"""
     
@@ -90,19 +94,30 @@ def analizar_datos_consolidados():
     
     for csv_file in csvs:
         try:
-            df = pd.read_csv(os.path.join(datos_dir, csv_file))
+            nombre = os.path.splitext(csv_file)[0]
+            if pyarrow_disponible() and os.path.exists(ruta_parquet(nombre, datos_dir)):
+                # Parquet: filas y columnas desde metadatos, y solo se leen empresa/sector
+                n_filas, columnas = describir_parquet(nombre, datos_dir)
+                empresa_cols = [col for col in columnas if col == COLUMNA_EMPRESA]
+                sector_cols = [col for col in COLUMNAS_SECTOR if col in columnas]
+                df = leer_parquet(nombre, columnas=empresa_cols + sector_cols[:1],
+                                  directorio=datos_dir, con_indice=False)
+            else:
+                df = pd.read_csv(os.path.join(datos_dir, csv_file))
+                n_filas, columnas = len(df), list(df.columns)
+                empresa_cols = [col for col in columnas if col == COLUMNA_EMPRESA]
+                sector_cols = [col for col in COLUMNAS_SECTOR if col in columnas]
+            
             print(f"\n📋 {csv_file}:")
-            print(f"   Filas: {len(df)}, Columnas: {len(df.columns)}")
+            print(f"   Filas: {n_filas}, Columnas: {len(columnas)}")
             
-            # Buscar columnas de empresas
-            empresa_cols = [col for col in df.columns if 'empresa' in col.lower() or 'company' in col.lower()]
+            # Empresas por nombre canónico (los alias cuentan como una sola entidad)
             if empresa_cols:
-                empresas = df[empresa_cols[0]].dropna().unique()
+                empresas = df[empresa_cols[0]].dropna().map(nombre_canonico).unique()
                 total_empresas.update(empresas)
                 print(f"   Empresas: {len(empresas)}")
             
-            # Buscar columnas de sectores
-            sector_cols = [col for col in df.columns if 'sector' in col.lower()]
+            # Columnas de clasificación sectorial
             if sector_cols:
                 sectores = df[sector_cols[0]].dropna().unique()
                 total_sectores.update(sectores)
@@ -111,17 +126,23 @@ def analizar_datos_consolidados():
         except Exception as e:
             print(f"   ❌ Error al leer: {e}")
     
+    # Cobertura por entidad canónica: una fila por ticker con los datos de cada fuente
+    consolidado = crear_frame_consolidado()
+    presencia = presencia_fuentes(consolidado)
+    
     print(f"\n🏢 COBERTURA TOTAL:")
     print(f"   Empresas analizadas: {len(total_empresas)}")
+    print(f"   Entidades en el frame consolidado: {len(consolidado)} "
+          f"(en todas las fuentes: {presencia.all(axis=1).sum()})")
     print(f"   Sectores cubiertos: {len(total_sectores)}")
     
-    if total_empresas:
-        print(f"\n📈 PRINCIPALES EMPRESAS ANALIZADAS:")
-        # Mostrar algunas empresas principales
-        empresas_principales = [emp for emp in total_empresas if any(nombre in emp for nombre in 
-                               ['Microsoft', 'Apple', 'NVIDIA', 'Amazon', 'Google', 'Alphabet', 'Meta', 'Tesla'])]
-        for i, empresa in enumerate(sorted(empresas_principales)[:10], 1):
-            print(f"   {i:2d}. {empresa}")
+    print(f"\n📈 PRINCIPALES EMPRESAS ANALIZADAS:")
+    entidades = crear_tabla_entidades()
+    tickers_principales = ['AAPL', 'AMZN', 'GOOGL', 'META', 'MSFT', 'NVDA', 'TSLA']
+    for i, simbolo in enumerate(consolidado.index.intersection(tickers_principales, sort=False), 1):
+        alias = entidades.at[simbolo, 'Alias']
+        print(f"   {i:2d}. {consolidado.at[simbolo, COLUMNA_EMPRESA]} ({simbolo}"
+              f"{', alias: ' + alias if alias else ''}) - {presencia.loc[simbolo].sum()} fuentes")
 
 def calcular_metricas_investigacion():
     """Calcular métricas del trabajo de investigación realizado"""
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Ciclo de vida de figuras - Análisis de Valoraciones Tech
+Guardado, visualización opcional y liberación explícita de cada figura
+"""
+
+import argparse
+
+import matplotlib
+
+# Estado global del modo de salida
+MODO_SALIDA = {'headless': False}
+
+
+def activar_modo_headless():
+    """Forzar backend Agg: nunca se abre una ventana ni se bloquea en plt.show()"""
+    matplotlib.use('Agg', force=True)
+    MODO_SALIDA['headless'] = True
+
+
+def guardar_figura(fig, ruta, dpi=300):
+    """Guardar la figura, mostrarla solo en modo interactivo y liberarla"""
+    import matplotlib.pyplot as plt
+
+    fig.savefig(ruta, dpi=dpi, bbox_inches='tight')
+    if not MODO_SALIDA['headless']:
+        plt.show()
+    plt.close(fig)
+
+
+def parsear_argumentos(descripcion, parser=None):
+    """Parsear la CLI común de los scripts de análisis (--headless)"""
+    parser = parser or argparse.ArgumentParser(description=descripcion)
+    parser.add_argument('--headless', action='store_true',
+                        help='Modo batch: backend Agg, sin ventanas, figuras liberadas al guardar')
+    args = parser.parse_args()
+
+    if args.headless:
+        activar_modo_headless()
+    return args
@@ -0,0 +1,49 @@
+"""Pruebas del motor de agregación por grupos frente a groupby"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agregaciones import agregar, dividir, indexar_grupos
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(5)
+    n = 200
+    df = pd.DataFrame({'Region': rng.choice(['Asia', 'Europa', 'Norteamérica', None], n),
+                       'Market_Cap_B': rng.normal(100, 30, n),
+                       'Empleados': rng.integers(1, 1000, n)})
+    df.loc[::7, 'Market_Cap_B'] = np.nan
+    return df
+
+
+def test_agregar_igual_a_groupby(df):
+    especificacion = {'Market_Cap_B': ['sum', 'mean', 'std', 'count'], 'Empleados': ['sum', 'mean']}
+    resultado = agregar(indexar_grupos(df, 'Region'), df, especificacion)
+
+    esperado = df.groupby('Region').agg(especificacion)
+    esperado.columns = ['_'.join(c) for c in esperado.columns]
+    pd.testing.assert_frame_equal(resultado, esperado, check_dtype=False)
+    assert resultado['Empleados_sum'].dtype == np.int64
+
+
+def test_agregar_sin_sufijo_y_categorias(df):
+    df['Region'] = pd.Categorical(df['Region'], categories=['Norteamérica', 'Europa', 'Asia'])
+    resultado = agregar(indexar_grupos(df, 'Region'), df, {'Market_Cap_B': 'mean'})
+    esperado = df.groupby('Region', observed=False).agg({'Market_Cap_B': 'mean'})
+    assert resultado.index.astype(str).tolist() == esperado.index.astype(str).tolist()
+    np.testing.assert_allclose(resultado['Market_Cap_B'], esperado['Market_Cap_B'])
+
+    with pytest.raises(ValueError):
+        agregar(indexar_grupos(df, 'Region'), df, {'Market_Cap_B': 'median'})
+
+
+def test_dividir_y_primera_aparicion(df):
+    indice = indexar_grupos(df, 'Region')
+    partes = dividir(indice, df['Empleados'])
+    for grupo, parte in zip(indice['grupos'], partes):
+        np.testing.assert_array_equal(parte, df.loc[df['Region'] == grupo, 'Empleados'])
+
+    aparicion = indice['grupos'][indice['aparicion']].tolist()
+    assert aparicion == list(dict.fromkeys(df['Region'].dropna()))
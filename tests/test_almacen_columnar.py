@@ -0,0 +1,62 @@
+"""Pruebas del almacén columnar: ida y vuelta por Parquet con esquemas tipados"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from almacen_columnar import (abrir_escritor_parquet, describir_parquet, escribir_bloque_parquet,
+                              guardar_parquet, iterar_parquet, leer_parquet)
+from analisis_dcf_riesgo_tech import (crear_analisis_riesgo_sectorial, crear_datos_wacc,
+                                      crear_proyecciones_dcf)
+
+
+def _sin_categorias(df):
+    """Comparar valores: el esquema guarda el texto como diccionario (categórico)"""
+    return df.apply(lambda c: c.astype(object) if isinstance(c.dtype, pd.CategoricalDtype)
+                    or pd.api.types.is_string_dtype(c) else c)
+
+
+@pytest.mark.parametrize('nombre, crear', [
+    ('proyecciones_dcf_2024', crear_proyecciones_dcf),
+    ('analisis_wacc_empresas', crear_datos_wacc),
+    ('riesgo_sectorial_tech', crear_analisis_riesgo_sectorial),
+    ('sin_esquema', lambda: pd.DataFrame({'x': [1.5, np.nan], 'y': ['a', 'b']})),
+])
+def test_ida_y_vuelta(tmp_path, nombre, crear):
+    df = crear()
+    guardar_parquet(df, nombre, tmp_path)
+    leido = leer_parquet(nombre, directorio=tmp_path)
+
+    # El esquema fija el orden de las columnas
+    assert sorted(leido.columns) == sorted(df.columns)
+    pd.testing.assert_frame_equal(_sin_categorias(leido), _sin_categorias(df[leido.columns]),
+                                  check_dtype=False, check_index_type=False)
+    filas, columnas = describir_parquet(nombre, tmp_path)
+    assert filas == len(df) and set(leido.columns) <= set(columnas)
+
+
+def test_tipos_del_esquema(tmp_path):
+    guardar_parquet(crear_proyecciones_dcf(), 'proyecciones_dcf_2024', tmp_path)
+    leido = leer_parquet('proyecciones_dcf_2024', ['Escenario', 'Enterprise_Value_M',
+                                                   'Terminal_Valido'], tmp_path)
+    assert list(leido.columns) == ['Escenario', 'Enterprise_Value_M', 'Terminal_Valido']
+    assert isinstance(leido['Escenario'].dtype, pd.CategoricalDtype)
+    assert leido['Enterprise_Value_M'].dtype == np.float64
+    assert leido['Terminal_Valido'].dtype == bool
+
+
+def test_escritura_y_lectura_por_bloques(tmp_path):
+    df = crear_proyecciones_dcf()
+    bloques = [df.iloc[i:i + 10] for i in range(0, len(df), 10)]
+    escritor = abrir_escritor_parquet('proyecciones_dcf_2024', bloques[0], tmp_path)
+    for bloque in bloques[1:]:
+        escribir_bloque_parquet(escritor, bloque, 'proyecciones_dcf_2024')
+    escritor.close()
+
+    leidos = list(iterar_parquet('proyecciones_dcf_2024', 7, directorio=tmp_path))
+    # Los lotes no cruzan row groups: a lo sumo tamano_bloque filas cada uno
+    assert max(len(b) for b in leidos) <= 7
+    unido = pd.concat(leidos, ignore_index=True)
+    pd.testing.assert_frame_equal(_sin_categorias(unido), _sin_categorias(df), check_dtype=False)
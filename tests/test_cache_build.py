@@ -0,0 +1,76 @@
+"""Pruebas de las huellas de nodos y del manifiesto de construcción incremental"""
+
+from cache_build import (calcular_huellas, cargar_manifest, esta_actualizado, filtrar_obsoletos,
+                         guardar_manifest, registrar_salidas)
+from cache_datos import PARAMETROS_MERCADO
+from orquestador import ejecutar_grafo
+
+DCF = 'analisis_dcf_riesgo_tech'
+
+
+def _nodos():
+    return {
+        'empresas_dcf': {'funcion': (DCF, 'crear_datos_dcf_empresas')},
+        'wacc': {'funcion': (DCF, 'crear_datos_wacc'), 'deps': {'df_empresas': 'empresas_dcf'}},
+        'csv_wacc': {'funcion': ('orquestador', 'exportar_csv'), 'deps': {'df': 'wacc'},
+                     'salida': 'datos/analisis_wacc_empresas.csv'},
+        'csv_empresas': {'funcion': ('orquestador', 'exportar_csv'),
+                         'deps': {'df': 'empresas_dcf'}, 'salida': 'datos/empresas_dcf.csv'},
+    }
+
+
+def test_huellas_propagan_cambios_a_los_dependientes(monkeypatch):
+    nodos = _nodos()
+    base = calcular_huellas(nodos)
+    assert base == calcular_huellas(_nodos())
+
+    # Parámetros de un nodo: solo cambia ese nodo
+    nodos['csv_wacc']['params'] = {'index': True}
+    cambiadas = calcular_huellas(nodos)
+    assert {n for n in base if base[n] != cambiadas[n]} == {'csv_wacc'}
+
+    # Constante de módulo leída por crear_datos_wacc: cambia wacc y lo que depende de él
+    monkeypatch.setitem(PARAMETROS_MERCADO, 'tax_rate', 0.25)
+    mercado = calcular_huellas(_nodos())
+    assert {n for n in base if base[n] != mercado[n]} == {'wacc', 'csv_wacc'}
+
+
+def test_manifiesto_detecta_salidas_obsoletas(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    nodos = _nodos()
+    huellas = calcular_huellas(nodos)
+    objetivos = ['csv_wacc', 'csv_empresas']
+    assert filtrar_obsoletos(objetivos, nodos, huellas, cargar_manifest()) == objetivos
+
+    (tmp_path / 'datos').mkdir()
+    for nombre in objetivos:
+        (tmp_path / nodos[nombre]['salida']).write_text('a,b\n1,2\n', encoding='utf-8')
+    guardar_manifest(registrar_salidas({}, nodos, huellas, {n: 0.1 for n in objetivos}))
+    manifest = cargar_manifest()
+    assert filtrar_obsoletos(objetivos, nodos, huellas, manifest) == []
+
+    # Archivo modificado a mano
+    (tmp_path / nodos['csv_empresas']['salida']).write_text('a,b\n1,3\n', encoding='utf-8')
+    assert not esta_actualizado('csv_empresas', nodos['csv_empresas'], huellas, manifest)
+    # Huella distinta (código, constantes o parámetros)
+    assert not esta_actualizado('csv_wacc', nodos['csv_wacc'], dict(huellas, csv_wacc='x'),
+                                manifest)
+    # Salida borrada
+    (tmp_path / nodos['csv_wacc']['salida']).unlink()
+    assert not esta_actualizado('csv_wacc', nodos['csv_wacc'], huellas, manifest)
+
+
+def test_grafo_incremental_no_regenera_salidas_vigentes(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    _, tiempos = ejecutar_grafo(n_workers=1, nodos=_nodos())
+    assert {'csv_wacc', 'csv_empresas'} <= set(tiempos)
+    contenido = (tmp_path / 'datos' / 'analisis_wacc_empresas.csv').read_bytes()
+
+    _, tiempos = ejecutar_grafo(n_workers=1, nodos=_nodos())
+    assert tiempos == {}
+    assert 'a regenerar: 0' in capsys.readouterr().out
+
+    (tmp_path / 'datos' / 'empresas_dcf.csv').unlink()
+    _, tiempos = ejecutar_grafo(n_workers=1, nodos=_nodos())
+    assert set(tiempos) == {'empresas_dcf', 'csv_empresas'}
+    assert (tmp_path / 'datos' / 'analisis_wacc_empresas.csv').read_bytes() == contenido
@@ -0,0 +1,91 @@
+"""Pruebas de la memoización acotada de la capa de datos"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache_datos
+from cache_datos import (ESTADISTICAS, LIMITES_CACHE, PARAMETROS_MERCADO,
+                         configurar_parametros_mercado, limpiar_cache, memoizar)
+
+
+@pytest.fixture(autouse=True)
+def cache_limpia(monkeypatch):
+    monkeypatch.setitem(LIMITES_CACHE, 'entradas', LIMITES_CACHE['entradas'])
+    monkeypatch.setitem(LIMITES_CACHE, 'bytes', LIMITES_CACHE['bytes'])
+    limpiar_cache()
+    yield
+    limpiar_cache()
+
+
+def _contador():
+    llamadas = []
+
+    @memoizar
+    def crear(n, escala=1.0):
+        llamadas.append(n)
+        return pd.DataFrame({'x': np.arange(n) * escala})
+
+    return crear, llamadas
+
+
+def test_un_calculo_por_argumentos_y_parametros():
+    crear, llamadas = _contador()
+    crear(3)
+    crear(3)
+    crear(3, escala=2.0)
+    crear(4)
+    assert llamadas == [3, 3, 4]
+
+    riesgo = PARAMETROS_MERCADO['risk_free_rate']
+    try:
+        configurar_parametros_mercado(risk_free_rate=riesgo + 0.01)
+        crear(3)
+        assert llamadas == [3, 3, 4, 3]
+    finally:
+        configurar_parametros_mercado(risk_free_rate=riesgo)
+
+
+def test_resultado_aislado_del_cacheado():
+    crear, _ = _contador()
+    df = crear(3)
+    df.loc[0, 'x'] = 99.0
+    assert crear(3)['x'].tolist() == [0.0, 1.0, 2.0]
+
+    @memoizar
+    def arreglo():
+        return np.zeros(3)
+
+    with pytest.raises(ValueError):
+        arreglo()[0] = 1.0
+
+
+def test_lru_por_entradas():
+    LIMITES_CACHE['entradas'] = 2
+    crear, llamadas = _contador()
+    crear(1)
+    crear(2)
+    crear(1)  # 1 pasa a ser el más reciente
+    crear(3)  # Desaloja 2
+    crear(1)
+    crear(2)
+    assert llamadas == [1, 2, 3, 2]
+    assert len(cache_datos._CACHE) == 2
+    assert ESTADISTICAS['desalojos'] >= 2
+
+
+def test_presupuesto_de_bytes():
+    crear, llamadas = _contador()
+    LIMITES_CACHE['bytes'] = 2_000  # Entra uno de 100 o uno de 200 flotantes, no ambos
+    for n in (100, 100, 200, 100):
+        crear(n)
+    assert llamadas == [100, 200, 100]
+    assert 0 < ESTADISTICAS['bytes'] <= LIMITES_CACHE['bytes']
+
+    # Un resultado mayor que el presupuesto no se cachea
+    crear(10_000)
+    crear(10_000)
+    assert llamadas == [100, 200, 100, 10_000, 10_000]
+
+    limpiar_cache()
+    assert ESTADISTICAS['bytes'] == 0 and not cache_datos._CACHE
@@ -0,0 +1,78 @@
+"""Pruebas de la selección de pares de comparables"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analisis_dcf_riesgo_tech import crear_datos_wacc
+from analisis_empresas_especificas import crear_datos_saas_vs_tradicional
+from analisis_valoraciones_tech import crear_datos_multiplos_revenue
+from comparables import (CARACTERISTICAS, MODOS, MULTIPLOS, crear_tabla_pares, pares_sector,
+                         seleccionar_pares)
+from registro_empresas import crear_frame_consolidado, nombre_canonico, sector_canonico
+
+
+@pytest.fixture(scope='module')
+def universo():
+    tabla = crear_tabla_pares(crear_datos_multiplos_revenue(), crear_frame_consolidado(),
+                              crear_datos_saas_vs_tradicional())
+    return tabla, crear_datos_wacc()
+
+
+@pytest.mark.parametrize('modo', MODOS)
+@pytest.mark.parametrize('columna', MULTIPLOS.values())
+def test_objetivo_nunca_es_su_propio_par(universo, modo, columna):
+    tabla, df_wacc = universo
+    # Objetivo con alias: 'Alphabet (Google)' frente al par canónico 'Alphabet'
+    assert 'Alphabet' in set(tabla['Par'])
+    nombres = df_wacc['Empresa'].replace({'Alphabet': 'Alphabet (Google)'}).to_numpy()
+
+    # Con k = todos los pares, la propia empresa sería siempre candidata
+    caracteristicas = df_wacc[[CARACTERISTICAS[c] for c in CARACTERISTICAS]].to_numpy()
+    indices, _ = seleccionar_pares(tabla, nombres,
+                                   df_wacc['Sector_Detail'].to_numpy(), caracteristicas,
+                                   tabla[columna].notna().to_numpy(), modo, k=len(tabla))
+
+    pares = np.where(indices >= 0, tabla['Par'].map(nombre_canonico).to_numpy()[np.maximum(indices, 0)],
+                     None)
+    objetivos = pd.Series(nombres).map(nombre_canonico).to_numpy()[:, None]
+    assert (indices >= 0).any(axis=1).all()
+    assert not (pares == objetivos).any()
+
+
+@pytest.mark.parametrize('columna', MULTIPLOS.values())
+def test_pares_por_similitud_son_empresas(universo, columna):
+    tabla, df_wacc = universo
+    caracteristicas = df_wacc[[CARACTERISTICAS[c] for c in CARACTERISTICAS]].to_numpy()
+    indices, _ = seleccionar_pares(tabla, df_wacc['Empresa'].to_numpy(),
+                                   df_wacc['Sector_Detail'].to_numpy(), caracteristicas,
+                                   tabla[columna].notna().to_numpy(), 'similitud', k=len(tabla))
+
+    fuentes = tabla['Fuente'].to_numpy()[indices[indices >= 0]]
+    assert len(fuentes) and (fuentes == 'Empresa').all()
+
+
+def test_pares_sector_por_sector_canonico():
+    sectores_pares = np.array(['Semiconductors', 'Semiconductors', 'Software', 'Semiconductor Equip',
+                               'Semiconductors'])
+    validos = np.array([True, True, True, True, False])  # p.ej. una fila agregada
+    indices = pares_sector(sectores_pares, ['AI/Semiconductors', 'Enterprise Software', 'Biotech'],
+                           validos, np.array(['NVIDIA', 'Intel', 'Adobe', 'ASML', 'Semis']),
+                           np.array(['NVIDIA', 'Microsoft', 'Moderna']))
+    assert indices.tolist() == [[1, -1], [2, -1], [-1, -1]]
+
+
+@pytest.mark.parametrize('columna', MULTIPLOS.values())
+def test_pares_por_sector_son_empresas_del_mismo_sector(universo, columna):
+    tabla, df_wacc = universo
+    caracteristicas = df_wacc[[CARACTERISTICAS[c] for c in CARACTERISTICAS]].to_numpy()
+    indices, por_sector = seleccionar_pares(tabla, df_wacc['Empresa'].to_numpy(),
+                                            df_wacc['Sector_Detail'].to_numpy(), caracteristicas,
+                                            tabla[columna].notna().to_numpy(), 'sector',
+                                            minimo_pares=1)
+    assert por_sector.any()
+    filas, posiciones = np.nonzero((indices >= 0) & por_sector[:, None])
+    pares = indices[filas, posiciones]
+    assert (tabla['Fuente'].to_numpy()[pares] == 'Empresa').all()
+    assert (sector_canonico(tabla['Sector'].to_numpy()[pares]) ==
+            sector_canonico(df_wacc['Sector_Detail'].to_numpy()[filas])).all()
@@ -0,0 +1,68 @@
+"""Pruebas de la especificación de escenarios DCF"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analisis_dcf_riesgo_tech import ESCENARIOS_DCF, crear_datos_wacc, crear_proyecciones_dcf
+from escenarios_dcf import (PARAMETROS_ESCENARIO, cargar_escenarios, normalizar_escenarios,
+                            parametros_batch)
+
+ESCENARIOS = {'Estrés': {'growth_factor': 0.5, 'terminal_growth': 0.02},
+              'Base': {},
+              'Auge': {'growth_factor': 1.5, 'margen_maximo': 0.7}}
+
+
+def test_normalizar_completa_valores_por_defecto():
+    normalizados = normalizar_escenarios(ESCENARIOS)
+    assert list(normalizados) == ['Estrés', 'Base', 'Auge']
+    assert normalizados['Base'] == PARAMETROS_ESCENARIO
+    assert normalizados['Estrés']['terminal_growth'] == 0.02
+    assert normalizados['Estrés']['margin_factor'] == 1.0
+
+    # Lista de dicts con 'Escenario' (p.ej. filas de un CSV con celdas vacías)
+    filas = [{'Escenario': 'Estrés', 'growth_factor': 0.5, 'terminal_growth': 0.02},
+             {'Escenario': 'Base', 'growth_factor': np.nan}]
+    lista = normalizar_escenarios(filas)
+    assert lista['Estrés'] == normalizados['Estrés'] and lista['Base'] == PARAMETROS_ESCENARIO
+
+
+def test_normalizar_rechaza_escenarios_invalidos():
+    with pytest.raises(ValueError):
+        normalizar_escenarios({})
+    with pytest.raises(KeyError):
+        normalizar_escenarios({'X': {'crecimiento': 1.0}})
+
+
+def test_cargar_json_y_csv(tmp_path):
+    ruta_json = tmp_path / 'escenarios.json'
+    ruta_json.write_text(json.dumps(ESCENARIOS), encoding='utf-8')
+    ruta_csv = tmp_path / 'escenarios.csv'
+    pd.DataFrame([{'Escenario': k, **v} for k, v in ESCENARIOS.items()]).to_csv(ruta_csv, index=False)
+
+    esperado = normalizar_escenarios(ESCENARIOS)
+    assert cargar_escenarios(str(ruta_json)) == esperado
+    assert cargar_escenarios(str(ruta_csv)) == esperado
+    with pytest.raises(ValueError):
+        cargar_escenarios(str(tmp_path / 'escenarios.yaml'))
+
+
+def test_parametros_batch_y_eje_de_escenarios():
+    params = parametros_batch(ESCENARIOS)
+    assert set(params) == set(PARAMETROS_ESCENARIO)
+    np.testing.assert_array_equal(params['growth_factor'], [0.5, 1.0, 1.5])
+
+    # Evaluar los escenarios juntos o de a uno da lo mismo
+    df_wacc = crear_datos_wacc()
+    juntos = crear_proyecciones_dcf(df_wacc, ESCENARIOS)
+    for nombre, parametros in ESCENARIOS.items():
+        solo = crear_proyecciones_dcf(df_wacc, {nombre: parametros})
+        parte = juntos[juntos['Escenario'] == nombre].reset_index(drop=True)
+        pd.testing.assert_frame_equal(parte.drop(columns='Escenario'),
+                                      solo.drop(columns='Escenario'))
+
+    # Los escenarios por defecto reproducen ESCENARIOS_DCF
+    pd.testing.assert_frame_equal(crear_proyecciones_dcf(df_wacc, ESCENARIOS_DCF),
+                                  crear_proyecciones_dcf(df_wacc))
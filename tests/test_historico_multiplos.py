@@ -0,0 +1,53 @@
+"""Pruebas del histórico de múltiplos solo-agregar y sus vistas remuestreadas"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from historico_multiplos import (AGREGACIONES, FRECUENCIAS, agregar_observaciones,
+                                 crear_historico, rango, remuestrear)
+
+
+@pytest.fixture
+def historico():
+    rng = np.random.default_rng(11)
+    fechas = pd.date_range('2021-01-04', periods=400, freq='3D')
+    valores = {'SaaS': rng.normal(8, 2, 400), 'Semis': rng.normal(5, 1, 400)}
+    valores['Semis'][[10, 11, 200]] = np.nan
+    h = crear_historico(['SaaS'], capacidad=16)  # Fuerza varias duplicaciones de capacidad
+    agregar_observaciones(h, fechas[:150], {'SaaS': valores['SaaS'][:150]})
+    agregar_observaciones(h, fechas[150:], {k: v[150:] for k, v in valores.items()})
+    return h
+
+
+@pytest.mark.parametrize('frecuencia', FRECUENCIAS)
+@pytest.mark.parametrize('agregacion', AGREGACIONES)
+def test_remuestrear_igual_a_pandas(historico, frecuencia, agregacion):
+    vista = remuestrear(historico, frecuencia, agregacion, desde='2021-03-15', hasta='2023-08-01')
+
+    observaciones = rango(historico, '2021-03-15', '2023-08-01')
+    grupos = observaciones.groupby(observaciones.index.to_period(frecuencia))
+    # last toma la última fila del período (con su NaN), como reduceat
+    esperado = grupos.nth(-1).set_index(grupos.size().index) if agregacion == 'last' \
+        else grupos.agg(agregacion)
+    esperado.index.name = 'Periodo'
+
+    pd.testing.assert_frame_equal(vista, esperado, check_freq=False)
+
+
+@pytest.mark.parametrize('frecuencia', FRECUENCIAS)
+def test_remuestrear_sin_datos(historico, frecuencia):
+    for vista in (remuestrear(crear_historico(['a', 'b']), frecuencia),
+                  remuestrear(historico, frecuencia, desde='2030-01-01')):
+        assert vista.empty
+        assert isinstance(vista.index, pd.PeriodIndex) and vista.index.name == 'Periodo'
+        assert len(vista.columns) == 2
+
+
+def test_solo_agregar(historico):
+    with pytest.raises(ValueError):
+        agregar_observaciones(historico, ['2021-01-01'], {'SaaS': [1.0]})
+    with pytest.raises(ValueError):
+        agregar_observaciones(historico, ['2030-01-02', '2030-01-01'], {'SaaS': [1.0, 2.0]})
+    assert historico['n'] == 400
+    assert rango(historico, hasta='2021-01-31')['Semis'].isna().all()
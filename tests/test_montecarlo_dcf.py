@@ -0,0 +1,45 @@
+"""Pruebas de la simulación Monte Carlo del DCF"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analisis_dcf_riesgo_tech import crear_datos_wacc, crear_proyecciones_dcf
+from montecarlo_dcf import simular_dcf_montecarlo
+
+
+@pytest.fixture(scope='module')
+def df_wacc():
+    return crear_datos_wacc()
+
+
+def test_resultado_no_depende_de_los_procesos(df_wacc):
+    parametros = dict(n_paths=12_000, tamano_bloque=5_000, semilla=7, n_bins=512)
+    serial = simular_dcf_montecarlo(df_wacc, n_workers=1, **parametros)
+    paralelo = simular_dcf_montecarlo(df_wacc, n_workers=2, **parametros)
+    pd.testing.assert_frame_equal(serial, paralelo)
+
+    # Bloques de empresas × trayectorias más chicos: mismas semillas por bloque
+    acotado = simular_dcf_montecarlo(df_wacc, n_workers=1, celdas_bloque=20_000, **parametros)
+    acotado_paralelo = simular_dcf_montecarlo(df_wacc, n_workers=2, celdas_bloque=20_000,
+                                              **parametros)
+    pd.testing.assert_frame_equal(acotado, acotado_paralelo)
+
+
+def test_percentiles_ordenados_y_cerca_del_dcf_base(df_wacc):
+    resultado = simular_dcf_montecarlo(df_wacc, n_paths=20_000, tamano_bloque=20_000,
+                                       n_workers=1, n_bins=1024)
+    assert resultado['Empresa'].tolist() == df_wacc['Empresa'].tolist()
+    assert (resultado['N_Paths'] == 20_000).all()
+    assert (resultado['EV_P5_M'] <= resultado['EV_P50_M']).all()
+    assert (resultado['EV_P50_M'] <= resultado['EV_P95_M']).all()
+    assert (resultado['Fuera_Rango_%'] < 1).all()
+
+    # Shocks nulos: todas las trayectorias coinciden con el escenario base (salvo el
+    # WACC cuantizado de la tabla de descuento)
+    sin_shocks = simular_dcf_montecarlo(df_wacc, n_paths=1_000, n_workers=1,
+                                        shocks={k: 0.0 for k in ('growth_factor', 'margin_factor',
+                                                                 'wacc', 'terminal_growth')})
+    proyecciones = crear_proyecciones_dcf(df_wacc)
+    base = proyecciones.loc[proyecciones['Escenario'] == 'Base', 'Enterprise_Value_M'].to_numpy()
+    np.testing.assert_allclose(sin_shocks['EV_Media_M'], base, rtol=1e-3)
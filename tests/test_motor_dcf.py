@@ -0,0 +1,150 @@
+"""Pruebas del motor DCF vectorizado"""
+
+import numpy as np
+import pytest
+
+from analisis_dcf_riesgo_tech import (COLUMNAS_PROYECCION, ESCENARIOS_DCF, crear_datos_wacc,
+                                      crear_proyecciones_dcf, proyectar_escenarios)
+from escenarios_dcf import parametros_batch
+from motor_dcf import proyectar_dcf_batch, spread_terminal, tabla_descuento
+
+
+def _dcf_por_empresa(empresa_data, params, terminal_growth=0.03):
+    """Valoración escalar de una empresa y un escenario (implementación original por filas)"""
+    growth_base = empresa_data['Revenue_Growth_3Y_%'] / 100 * params['growth_factor']
+    growth_rates = [growth_base * (0.8 ** i) for i in range(5)]
+
+    revenue_proj = [empresa_data['Revenue_2024_M']]
+    for i in range(5):
+        revenue_proj.append(revenue_proj[-1] * (1 + growth_rates[i]))
+
+    margin_improvement = 0.5 if empresa_data['EBITDA_Margin_%'] < 0 else 0.1
+    base_margin = max(empresa_data['EBITDA_Margin_%'], -50) / 100
+    margins = []
+    for i in range(5):
+        if base_margin < 0:
+            margins.append(base_margin + margin_improvement * (i + 1) * params['margin_factor'])
+        else:
+            margins.append(min(base_margin * (1 + margin_improvement * params['margin_factor']), 0.6))
+
+    fcf_projections = [revenue_proj[i] * margins[i - 1] * 0.8 for i in range(1, 6)]
+    wacc = empresa_data['WACC']
+    terminal_value = fcf_projections[-1] * (1 + terminal_growth) / (wacc - terminal_growth)
+    pv_fcf = sum(fcf / (1 + wacc) ** (i + 1) for i, fcf in enumerate(fcf_projections))
+    return {
+        'Enterprise_Value_M': pv_fcf + terminal_value / (1 + wacc) ** 5,
+        'WACC': wacc,
+        'Terminal_Value_M': terminal_value,
+        'PV_FCF_5Y_M': pv_fcf,
+        'Revenue_CAGR_%': np.mean(growth_rates) * 100,
+        'Avg_EBITDA_Margin_%': np.mean(margins) * 100
+    }
+
+
+def _entradas(df):
+    return (df['Revenue_2024_M'].to_numpy(), df['Revenue_Growth_3Y_%'].to_numpy(),
+            df['EBITDA_Margin_%'].to_numpy(), df['WACC'].to_numpy())
+
+
+def test_batch_igual_a_la_valoracion_por_empresa():
+    df_wacc = crear_datos_wacc()
+    proyecciones = crear_proyecciones_dcf(df_wacc)
+    assert list(proyecciones.columns) == ['Empresa', 'Escenario'] + COLUMNAS_PROYECCION
+
+    esperado = [dict(_dcf_por_empresa(fila, params), Empresa=fila['Empresa'], Escenario=escenario)
+                for _, fila in df_wacc.iterrows() for escenario, params in ESCENARIOS_DCF.items()]
+    assert proyecciones['Empresa'].tolist() == [e['Empresa'] for e in esperado]
+    assert proyecciones['Escenario'].astype(str).tolist() == [e['Escenario'] for e in esperado]
+    for columna in COLUMNAS_PROYECCION[:-1]:
+        np.testing.assert_allclose(proyecciones[columna], [e[columna] for e in esperado],
+                                   rtol=1e-12, err_msg=columna)
+
+
+def test_politica_por_defecto_no_altera_el_valor_terminal():
+    # WACC - g = 0.5% queda bajo SPREAD_MINIMO: se marca pero el EV es el original
+    fila = {'Revenue_2024_M': 100.0, 'Revenue_Growth_3Y_%': 10.0, 'EBITDA_Margin_%': 20.0,
+            'WACC': 0.035}
+    resultado = proyectar_dcf_batch([100.0], [10.0], [20.0], [0.035], [1.0], [1.0])
+    assert not resultado['Terminal_Valido'][0, 0]
+    esperado = _dcf_por_empresa(fila, {'growth_factor': 1.0, 'margin_factor': 1.0})
+    assert resultado['Enterprise_Value_M'][0, 0] == pytest.approx(esperado['Enterprise_Value_M'],
+                                                                  rel=1e-12)
+
+    acotado = proyectar_dcf_batch([100.0], [10.0], [20.0], [0.035], [1.0], [1.0],
+                                  politica_terminal='tope')
+    assert acotado['Enterprise_Value_M'][0, 0] < resultado['Enterprise_Value_M'][0, 0]
+
+
+@pytest.mark.parametrize('politica', ['tope', 'mascara', 'marcar'])
+def test_spread_terminal_forma_fija(politica):
+    wacc = np.array([[0.02, 0.035], [0.05, 0.10]])
+    spread, valido = spread_terminal(wacc, 0.03, politica, 0.01)
+    assert spread.shape == valido.shape == wacc.shape
+    assert valido.tolist() == [[False, False], [True, True]]
+    np.testing.assert_allclose(spread[valido], (wacc - 0.03)[valido])
+
+
+@pytest.mark.parametrize('paso', [None, 1e-5])
+def test_tabla_descuento_wacc_no_finito(paso):
+    wacc = np.array([[0.10, np.nan], [np.inf, 0.12]])
+    tabla, indices = tabla_descuento(wacc, 5, paso)
+    factores = tabla[indices]
+    assert factores.shape == (2, 2, 5)
+    assert np.isnan(factores[0, 1]).all() and np.isnan(factores[1, 0]).all()
+    np.testing.assert_allclose(factores[0, 0], 1.10 ** np.arange(1, 6))
+    np.testing.assert_allclose(factores[1, 1], 1.12 ** np.arange(1, 6))
+
+
+def _ev(df, params, wacc=0.0, terminal=0.0, growth=0.0, margin=0.0):
+    """EV (N, S) con perturbaciones en decimales de WACC, g terminal, crecimiento y margen"""
+    revenue, growth_pct, margin_pct, wacc_base = _entradas(df)
+    return proyectar_dcf_batch(revenue, growth_pct + growth * 100, margin_pct + margin * 100,
+                               wacc_base + wacc, params['growth_factor'], params['margin_factor'],
+                               terminal_growth=params['terminal_growth'] + terminal,
+                               decaimiento=params['decaimiento'],
+                               conversion_fcf=params['conversion_fcf'],
+                               margen_maximo=params['margen_maximo'])['Enterprise_Value_M']
+
+
+PRIMER_ORDEN = {'dEV_dWACC': 'wacc', 'dEV_dTerminal_Growth': 'terminal',
+                'dEV_dGrowth': 'growth', 'dEV_dMargin': 'margin'}
+SEGUNDO_ORDEN = {'d2EV_dWACC2': ('wacc', 'wacc'),
+                 'd2EV_dTerminal_Growth2': ('terminal', 'terminal'),
+                 'd2EV_dGrowth2': ('growth', 'growth'),
+                 'd2EV_dWACC_dTerminal_Growth': ('wacc', 'terminal'),
+                 'd2EV_dGrowth_dMargin': ('growth', 'margin')}
+
+
+@pytest.fixture(scope='module')
+def griegas():
+    df = crear_datos_wacc()
+    resultado = proyectar_escenarios(*_entradas(df), griegas=True)
+    return df, parametros_batch(ESCENARIOS_DCF), resultado
+
+
+@pytest.mark.parametrize('columna', PRIMER_ORDEN)
+def test_griegas_primer_orden_vs_diferencias_finitas(griegas, columna):
+    df, params, resultado = griegas
+    h = 1e-6
+    variable = PRIMER_ORDEN[columna]
+    numerica = (_ev(df, params, **{variable: h}) - _ev(df, params, **{variable: -h})) / (2 * h)
+    np.testing.assert_allclose(resultado[columna], numerica, rtol=1e-6,
+                               atol=1e-6 * np.abs(resultado['Enterprise_Value_M']).max())
+
+
+@pytest.mark.parametrize('columna', SEGUNDO_ORDEN)
+def test_griegas_segundo_orden_vs_diferencias_finitas(griegas, columna):
+    df, params, resultado = griegas
+    h = 1e-4
+    a, b = SEGUNDO_ORDEN[columna]
+
+    def ev(da, db):
+        desplazamientos = {a: 0.0, b: 0.0}
+        desplazamientos[a] += da
+        desplazamientos[b] += db
+        return _ev(df, params, **desplazamientos)
+
+    # Error de truncamiento O(h²) relativo al spread WACC - g
+    numerica = (ev(h, h) - ev(h, -h) - ev(-h, h) + ev(-h, -h)) / (4 * h**2)
+    np.testing.assert_allclose(resultado[columna], numerica, rtol=1e-4,
+                               atol=1e-4 * np.abs(resultado['Enterprise_Value_M']).max())
@@ -0,0 +1,35 @@
+"""Pruebas de la resolución de entidades y el frame consolidado"""
+
+import pandas as pd
+
+from registro_empresas import consolidar_fuentes, crear_registro, normalizar_entidades, valor
+
+
+def test_normalizar_entidades_resuelve_alias_y_tickers():
+    df = pd.DataFrame({'Empresa': ['Alphabet (Google)', 'MSFT', 'Desconocida'],
+                       'Market_Cap_B': [1.0, 2.0, 3.0]})
+    normalizado = normalizar_entidades(df)
+    assert normalizado['Ticker'].tolist() == ['GOOGL', 'MSFT', 'Desconocida']
+    assert normalizado['Empresa'].tolist() == ['Alphabet', 'Microsoft', 'Desconocida']
+    assert normalizado['Market_Cap_M_USD'].tolist() == [1000.0, 2000.0, 3000.0]
+
+
+def test_consolidar_fuentes_con_ticker_repetido():
+    # 'Google' y 'Alphabet' son la misma entidad dentro de una fuente: queda la primera fila
+    lideres = pd.DataFrame({'Empresa': ['Google', 'Alphabet', 'Apple'], 'Beta': [1.1, 9.9, 1.2]})
+    ai = pd.DataFrame({'Empresa': ['Alphabet', 'NVIDIA'], 'AI_Exposure_Score': [4, 5]})
+    consolidado = consolidar_fuentes({'lideres': lideres, 'ai': ai})
+
+    assert consolidado.index.tolist() == ['GOOGL', 'AAPL', 'NVDA']
+    assert consolidado.loc['GOOGL', 'Beta_lideres'] == 1.1
+    assert consolidado.loc['GOOGL', 'AI_Exposure_Score_ai'] == 4
+    assert consolidado['Empresa'].tolist() == ['Alphabet', 'Apple', 'NVIDIA']
+
+
+def test_registro_por_alias_y_ticker():
+    df = pd.DataFrame({'Empresa': ['Alphabet (Google)', 'Apple', 'Alphabet'], 'Beta': [1.0, 2.0, 3.0]})
+    registro = crear_registro(df)
+    # Ante claves repetidas gana la primera fila
+    assert valor(registro, 'Alphabet', 'Beta') == 1.0
+    assert valor(registro, 'GOOGL', 'Beta') == 1.0
+    assert valor(registro, 'AAPL', 'Beta') == 2.0
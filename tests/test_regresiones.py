@@ -0,0 +1,22 @@
+"""Pruebas de las regresiones por grupo"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from regresiones import regresion_por_grupo
+
+
+@pytest.mark.parametrize('regresores', ['x', ['x', 'z']])
+def test_regresion_por_grupo_sin_filas(regresores):
+    df = pd.DataFrame({'g': ['a', 'b'], 'x': [1.0, 2.0], 'z': [0.0, 1.0], 'y': [1.0, 3.0]})
+    coeficientes, residuos = regresion_por_grupo(df.iloc[:0], 'g', regresores, 'y')
+    assert coeficientes.empty and 'R2' in coeficientes.columns
+    assert residuos.empty and residuos.name == 'Residuo_y'
+
+
+def test_regresion_por_grupo_sin_grupos_validos():
+    df = pd.DataFrame({'g': [np.nan, np.nan], 'x': [1.0, 2.0], 'y': [1.0, 3.0]})
+    coeficientes, residuos = regresion_por_grupo(df, 'g', 'x', 'y')
+    assert coeficientes.empty
+    assert residuos.index.equals(df.index) and residuos.isna().all()
@@ -0,0 +1,43 @@
+"""Pruebas de la valuación paralela por fragmentos"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analisis_dcf_riesgo_tech import (crear_datos_wacc, crear_proyecciones_dcf,
+                                      crear_superficie_sensibilidad)
+from valuacion_paralela import valuar_universo
+
+
+@pytest.fixture(scope='module')
+def df_wacc():
+    return crear_datos_wacc()
+
+
+def test_serial_igual_a_memoria_compartida(df_wacc):
+    serial = valuar_universo(df_wacc, n_workers=1, tamano_fragmento=4, progreso=False)
+    paralelo = valuar_universo(df_wacc, n_workers=2, tamano_fragmento=4, progreso=False)
+
+    pd.testing.assert_frame_equal(serial['proyecciones'], paralelo['proyecciones'])
+    for clave, valor in serial['superficie'].items():
+        np.testing.assert_array_equal(valor, paralelo['superficie'][clave], err_msg=clave)
+
+    # Los fragmentos se unen en el orden de df_wacc: igual a la valoración de una pasada
+    pd.testing.assert_frame_equal(serial['proyecciones'], crear_proyecciones_dcf(df_wacc))
+
+
+def test_superficie_igual_a_la_de_empresas_foco(df_wacc):
+    resultado = valuar_universo(df_wacc, n_workers=1, tamano_fragmento=6, progreso=False)
+    foco = crear_superficie_sensibilidad(df_wacc=df_wacc)
+    posiciones = [df_wacc['Empresa'].tolist().index(e) for e in foco['Empresa']]
+
+    np.testing.assert_array_equal(resultado['superficie']['Enterprise_Value_M'][posiciones],
+                                  foco['Enterprise_Value_M'])
+    np.testing.assert_array_equal(resultado['superficie']['Valido'], foco['Valido'])
+
+
+def test_universo_vacio(df_wacc):
+    resultado = valuar_universo(df_wacc.iloc[:0], n_workers=2, progreso=False)
+    assert resultado['proyecciones'].empty
+    assert 'Enterprise_Value_M' in resultado['proyecciones'].columns
+    assert resultado['superficie']['Enterprise_Value_M'].shape[0] == 0
@@ -0,0 +1,47 @@
+"""Pruebas de la analítica por ventanas incremental frente a la vectorizada"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analisis_valoraciones_tech import crear_datos_historicos_saas
+from ventanas_multiplos import (METRICAS, actualizar_estado, calcular_metricas_ventana,
+                                iniciar_estado)
+
+
+def _historico_con_faltantes():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({'Periodo': pd.period_range('2015Q1', periods=30, freq='Q'),
+                       'A': np.exp(rng.normal(2, 0.3, 30)),
+                       'B': np.exp(rng.normal(1, 0.1, 30))})
+    df.loc[[5, 17], 'A'] = np.nan
+    df.loc[9, 'B'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('historico', [crear_datos_historicos_saas, _historico_con_faltantes])
+@pytest.mark.parametrize('iniciales', [0, 1, 6])
+def test_incremental_igual_a_ventanas_completas(historico, iniciales):
+    df = historico()
+    completas = calcular_metricas_ventana(df)
+    series = [c for c in df.columns if c != 'Periodo' and pd.api.types.is_numeric_dtype(df[c])]
+
+    estado = iniciar_estado(df.iloc[:iniciales])
+    for i in range(iniciales, len(df)):
+        fila = df.iloc[i]
+        metricas = actualizar_estado(estado, fila['Periodo'], fila[series].to_numpy(dtype=float))
+        for serie in series:
+            for metrica in METRICAS:
+                esperado = completas[f'{serie}_{metrica}'].iloc[i]
+                np.testing.assert_allclose(metricas.loc[serie, metrica], esperado, rtol=1e-9,
+                                           atol=1e-12, err_msg=f'{i} {serie} {metrica}')
+    assert estado['periodo'] == df['Periodo'].iloc[-1]
+
+
+def test_actualizar_con_dict_omite_series():
+    df = _historico_con_faltantes()
+    estado = iniciar_estado(df)
+    metricas = actualizar_estado(estado, pd.Period('2022Q3', freq='Q'), {'A': 8.0})
+    assert np.isnan(metricas.loc['B', 'Drawdown'])
+    assert np.isnan(metricas.loc['B', 'Media_Movil'])
+    assert not np.isnan(metricas.loc['A', 'Drawdown'])
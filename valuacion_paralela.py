@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Valuación Paralela por Fragmentos - Análisis de Valoraciones Tech
+Reparte el universo de crear_datos_wacc entre procesos y une los resultados en orden
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+TAMANO_FRAGMENTO = 10_000  # Empresas por fragmento
+
+# Entradas numéricas de crear_datos_wacc que se publican en memoria compartida
+COLUMNAS_COMPARTIDAS = ['Revenue_2024_M', 'FCF_Actual_2024_M', 'EBITDA_Margin_%',
+                        'Revenue_Growth_3Y_%', 'Beta', 'Debt_to_Equity', 'WACC']
+
+# Estado por proceso: matriz de entradas (columnas × empresas) y grillas de sensibilidad
+_ENTRADAS = {}
+
+
+def publicar_entradas(df_wacc):
+    """Copiar una sola vez las columnas numéricas a un bloque de memoria compartida"""
+    forma = (len(COLUMNAS_COMPARTIDAS), len(df_wacc))
+    bloque = shared_memory.SharedMemory(create=True, size=max(int(np.prod(forma)) * 8, 1))
+    matriz = np.ndarray(forma, dtype=np.float64, buffer=bloque.buf)
+    for i, columna in enumerate(COLUMNAS_COMPARTIDAS):
+        matriz[i] = df_wacc[columna].to_numpy(dtype=np.float64)
+    return bloque, forma
+
+
+def _inicializar_worker(nombre_bloque, forma, wacc_range, growth_range, escenarios):
+    """Adjuntar el bloque compartido (sin copiar), las grillas y los escenarios"""
+    # Solo el proceso principal libera el bloque (unlink); el worker solo lo adjunta
+    bloque = shared_memory.SharedMemory(name=nombre_bloque)
+    _ENTRADAS.update({
+        'bloque': bloque,
+        'matriz': np.ndarray(forma, dtype=np.float64, buffer=bloque.buf),
+        'wacc_range': wacc_range,
+        'growth_range': growth_range,
+        'escenarios': escenarios
+    })
+
+
+def _valuar_fragmento(indice, inicio, fin, con_sensibilidad):
+    """Valuar las empresas [inicio, fin) leyendo la matriz compartida; devuelve solo arreglos"""
+    import analisis_dcf_riesgo_tech as dcf
+
+    entradas = dict(zip(COLUMNAS_COMPARTIDAS, _ENTRADAS['matriz'][:, inicio:fin]))
+    resultado = dcf.proyectar_escenarios(entradas['Revenue_2024_M'], entradas['Revenue_Growth_3Y_%'],
+                                         entradas['EBITDA_Margin_%'], entradas['WACC'],
+                                         _ENTRADAS['escenarios'])
+    # Copias: algunas salidas del motor son vistas de las entradas compartidas
+    proyecciones = {columna: np.array(resultado[columna]) for columna in dcf.COLUMNAS_PROYECCION}
+
+    superficie = None
+    if con_sensibilidad:
+        superficie = dcf.valuar_superficie(entradas['Revenue_2024_M'], entradas['FCF_Actual_2024_M'],
+                                           _ENTRADAS['wacc_range'], _ENTRADAS['growth_range'])
+    return indice, proyecciones, superficie
+
+
+def valuar_universo(df_wacc=None, n_workers=None, tamano_fragmento=TAMANO_FRAGMENTO,
+                    wacc_range=None, growth_range=None, sensibilidad=True, progreso=True,
+                    escenarios=None):
+    """Proyecciones DCF (y superficie de sensibilidad) del universo en paralelo
+
+    Las entradas numéricas viven en memoria compartida: cada tarea recibe solo su rango
+    de empresas y devuelve su porción de resultados. Los fragmentos se unen según su
+    posición en df_wacc, así el resultado no depende del número de procesos.
+    """
+    import analisis_dcf_riesgo_tech as dcf
+    from escenarios_dcf import normalizar_escenarios
+
+    df_wacc = dcf.crear_datos_wacc() if df_wacc is None else df_wacc
+    escenarios = normalizar_escenarios(dcf.ESCENARIOS_DCF if escenarios is None else escenarios)
+    wacc_range = np.asarray(dcf.WACC_RANGE if wacc_range is None else wacc_range, dtype=float)
+    growth_range = np.asarray(dcf.GROWTH_RANGE if growth_range is None else growth_range, dtype=float)
+
+    # Un universo vacío es un único fragmento vacío: resultados vacíos con sus columnas
+    tareas = [(i, inicio, min(inicio + tamano_fragmento, len(df_wacc)), sensibilidad)
+              for i, inicio in enumerate(range(0, max(len(df_wacc), 1), tamano_fragmento))]
+    n_workers = max(1, min(n_workers or os.cpu_count() or 1, len(tareas)))
+
+    resultados = [None] * len(tareas)
+    inicio_total = time.perf_counter()
+
+    def registrar(indice, proyecciones, superficie, completados):
+        resultados[indice] = (proyecciones, superficie)
+        if progreso:
+            _, inicio, fin, _ = tareas[indice]
+            print(f"  Fragmento {completados}/{len(tareas)} listo "
+                  f"({fin - inicio:,} empresas, {time.perf_counter() - inicio_total:.1f}s)")
+
+    bloque, forma = publicar_entradas(df_wacc)
+    try:
+        if n_workers == 1:
+            _ENTRADAS.update({'matriz': np.ndarray(forma, dtype=np.float64, buffer=bloque.buf),
+                              'wacc_range': wacc_range, 'growth_range': growth_range,
+                              'escenarios': escenarios})
+            for completados, tarea in enumerate(tareas, 1):
+                registrar(*_valuar_fragmento(*tarea), completados)
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_inicializar_worker,
+                                     initargs=(bloque.name, forma, wacc_range, growth_range,
+                                               escenarios)) as executor:
+                futuros = [executor.submit(_valuar_fragmento, *tarea) for tarea in tareas]
+                for completados, futuro in enumerate(as_completed(futuros), 1):
+                    registrar(*futuro.result(), completados)
+    finally:
+        _ENTRADAS.clear()  # Soltar las vistas antes de cerrar el bloque
+        bloque.close()
+        bloque.unlink()
+
+    # Unión determinística en el orden de los fragmentos
+    resultado = {columna: np.concatenate([r[0][columna] for r in resultados])
+                 for columna in dcf.COLUMNAS_PROYECCION}
+    proyecciones = dcf.proyecciones_a_dataframe(df_wacc['Empresa'].to_numpy(), resultado, escenarios)
+
+    superficie = None
+    if sensibilidad:
+        superficie = {
+            'Empresa': df_wacc['Empresa'].to_numpy(),
+            'WACC': wacc_range,
+            'Growth_Rate': growth_range,
+            'Enterprise_Value_M': np.concatenate([r[1][0] for r in resultados]),
+            'Multiple_Revenue': np.concatenate([r[1][1] for r in resultados]),
+            'Valido': resultados[0][1][2]
+        }
+
+    return {'proyecciones': proyecciones, 'superficie': superficie}
+
+
+def main():
+    """Valuar un universo de fundamentales en paralelo"""
+    parser = argparse.ArgumentParser(description='Valuación DCF paralela por fragmentos')
+    parser.add_argument('--fuente', default=None,
+                        help='CSV de fundamentales (esquema de crear_datos_dcf_empresas)')
+    parser.add_argument('--workers', type=int, default=None, help='Procesos en paralelo')
+    parser.add_argument('--fragmento', type=int, default=TAMANO_FRAGMENTO,
+                        help='Empresas por fragmento')
+    parser.add_argument('--sin-sensibilidad', action='store_true',
+                        help='Calcular solo las proyecciones DCF')
+    parser.add_argument('--escenarios', default=None,
+                        help='JSON o CSV de escenarios (por defecto los tres escenarios base)')
+    parser.add_argument('--salida', default=None,
+                        help='Nombre del dataset de proyecciones a exportar en datos/')
+    args = parser.parse_args()
+
+    import analisis_dcf_riesgo_tech as dcf
+    from almacen_columnar import exportar_dataset
+    from escenarios_dcf import cargar_escenarios
+
+    df_empresas = None if args.fuente is None else pd.read_csv(args.fuente)
+    df_wacc = dcf.crear_datos_wacc(df_empresas)
+    escenarios = None if args.escenarios is None else cargar_escenarios(args.escenarios)
+
+    inicio = time.perf_counter()
+    resultado = valuar_universo(df_wacc, n_workers=args.workers, tamano_fragmento=args.fragmento,
+                                sensibilidad=not args.sin_sensibilidad, escenarios=escenarios)
+    print(f"\n{len(df_wacc):,} empresas valuadas en {time.perf_counter() - inicio:.2f}s "
+          f"({len(resultado['proyecciones']):,} proyecciones)")
+
+    if args.salida:
+        for ruta in exportar_dataset(resultado['proyecciones'], args.salida):
+            print(f"  • {ruta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Analítica por Ventanas de Múltiplos - Análisis de Valoraciones Tech
+Medias móviles, volatilidad, drawdown desde el máximo y z-score sobre históricos con el
+esquema de crear_datos_historicos_saas, con actualización incremental O(1) por serie
+"""
+
+import numpy as np
+import pandas as pd
+
+VENTANA = 4  # Observaciones por ventana (4 trimestres = 1 año)
+
+# Métricas por serie: media móvil del nivel, volatilidad móvil de los cambios
+# logarítmicos, caída desde el máximo histórico y z-score contra toda la historia
+METRICAS = ('Media_Movil', 'Volatilidad', 'Drawdown', 'Z_Score')
+
+
+def _series(df, columna_fecha, series):
+    """Columnas numéricas del histórico (todas salvo la fecha si no se indican)"""
+    if series is not None:
+        return list(series)
+    return [c for c in df.columns if c != columna_fecha and pd.api.types.is_numeric_dtype(df[c])]
+
+
+def _aplanar(periodos, metricas, series, columna_fecha):
+    """DataFrame ancho: columna de fecha y una columna serie_métrica por combinación"""
+    columnas = {columna_fecha: periodos}
+    for serie_idx, serie in enumerate(series):
+        for metrica in METRICAS:
+            columnas[f'{serie}_{metrica}'] = metricas[metrica][:, serie_idx]
+    return pd.DataFrame(columnas)
+
+
+def calcular_metricas_ventana(df, ventana=VENTANA, columna_fecha='Periodo', series=None):
+    """Métricas por ventana de toda la historia, vectorizadas sobre todas las series
+
+    df sigue el esquema de crear_datos_historicos_saas (columna Periodo y una columna
+    por múltiplo o sector), o una vista de historico_multiplos.remuestrear con el
+    índice reseteado. Una ventana con observaciones faltantes da NaN.
+    """
+    series = _series(df, columna_fecha, series)
+    niveles = df[series].astype(float)
+    retornos = np.log(niveles).diff()
+    maximo = niveles.cummax()
+    expansiva = niveles.expanding()
+
+    metricas = {
+        'Media_Movil': niveles.rolling(ventana).mean().to_numpy(),
+        'Volatilidad': retornos.rolling(ventana).std().to_numpy(),
+        'Drawdown': (niveles / maximo - 1).to_numpy(),
+        'Z_Score': ((niveles - expansiva.mean()) / expansiva.std()).to_numpy()
+    }
+    return _aplanar(df[columna_fecha].to_numpy(), metricas, series, columna_fecha)
+
+
+def crear_estado_ventanas(series, ventana=VENTANA, columna_fecha='Periodo'):
+    """Estado incremental vacío: buffers circulares de la ventana y acumulados expansivos"""
+    k = len(series)
+    return {
+        'series': list(series),
+        'ventana': ventana,
+        'columna_fecha': columna_fecha,
+        'posicion': 0,  # Próxima celda a reemplazar en los buffers circulares
+        'niveles': np.full((ventana, k), np.nan),
+        'retornos': np.full((ventana, k), np.nan),
+        # Sumas de la ventana sin NaN y cantidad de NaN dentro de la ventana
+        'suma_nivel': np.zeros(k),
+        'nan_nivel': np.full(k, ventana),
+        'suma_retorno': np.zeros(k),
+        'suma2_retorno': np.zeros(k),
+        'nan_retorno': np.full(k, ventana),
+        'ultimo': np.full(k, np.nan),
+        # Acumulados expansivos (Welford) y máximo histórico, ignorando NaN
+        'conteo': np.zeros(k),
+        'media': np.zeros(k),
+        'm2': np.zeros(k),
+        'maximo': np.full(k, np.nan),
+        'periodo': None
+    }
+
+
+def _reemplazar(estado, buffer, suma, nan, valores, suma2=None):
+    """Sacar la observación más vieja de la ventana y sumar la nueva, sin recorrerla"""
+    viejo = estado[buffer][estado['posicion']]
+    sale, entra = ~np.isnan(viejo), ~np.isnan(valores)
+    estado[suma] += np.where(entra, valores, 0) - np.where(sale, viejo, 0)
+    if suma2 is not None:
+        estado[suma2] += np.where(entra, valores, 0)**2 - np.where(sale, viejo, 0)**2
+    estado[nan] += (~entra).astype(int) - (~sale).astype(int)
+    estado[buffer][estado['posicion']] = valores
+
+
+def actualizar_estado(estado, periodo, valores):
+    """Incorporar una observación (un valor por serie) en O(1) por serie
+
+    valores es un arreglo en el orden de estado['series'] o un dict {serie: valor}
+    (las series omitidas cuentan como faltantes). Devuelve las métricas del período
+    con una fila por serie y una columna por métrica.
+    """
+    if isinstance(valores, dict):
+        valores = [valores.get(serie, np.nan) for serie in estado['series']]
+    valores = np.asarray(valores, dtype=float)
+    ventana = estado['ventana']
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        retornos = np.log(valores) - np.log(estado['ultimo'])
+        _reemplazar(estado, 'niveles', 'suma_nivel', 'nan_nivel', valores)
+        _reemplazar(estado, 'retornos', 'suma_retorno', 'nan_retorno', retornos, 'suma2_retorno')
+        estado['posicion'] = (estado['posicion'] + 1) % ventana
+        estado['ultimo'] = valores
+
+        # Welford y máximo solo sobre las series observadas
+        observado = ~np.isnan(valores)
+        estado['conteo'] += observado
+        delta = np.where(observado, valores - estado['media'], 0)
+        estado['media'] += np.where(observado, delta / np.maximum(estado['conteo'], 1), 0)
+        estado['m2'] += np.where(observado, delta * (valores - estado['media']), 0)
+        estado['maximo'] = np.fmax(estado['maximo'], valores)
+        estado['periodo'] = periodo
+
+        completa_nivel = estado['nan_nivel'] == 0
+        completa_retorno = estado['nan_retorno'] == 0
+        varianza = ((estado['suma2_retorno'] - estado['suma_retorno']**2 / ventana)
+                    / (ventana - 1))
+        desvio = np.sqrt(estado['m2'] / (estado['conteo'] - 1))
+        metricas = {
+            'Media_Movil': np.where(completa_nivel, estado['suma_nivel'] / ventana, np.nan),
+            'Volatilidad': np.where(completa_retorno, np.sqrt(np.maximum(varianza, 0)), np.nan),
+            'Drawdown': valores / estado['maximo'] - 1,
+            'Z_Score': np.where(estado['conteo'] > 1, (valores - estado['media']) / desvio, np.nan)
+        }
+
+    return pd.DataFrame(metricas, index=pd.Index(estado['series'], name='Serie'))
+
+
+def iniciar_estado(df, ventana=VENTANA, columna_fecha='Periodo', series=None):
+    """Estado incremental a partir de la historia guardada, en una pasada vectorizada"""
+    series = _series(df, columna_fecha, series)
+    estado = crear_estado_ventanas(series, ventana, columna_fecha)
+    if len(df) == 0:
+        return estado
+    niveles = df[series].to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        retornos = np.diff(np.log(niveles), axis=0, prepend=np.nan)
+
+    # Últimas observaciones en orden cronológico: la más vieja queda en la posición 0
+    for buffer, suma, nan, historia in (('niveles', 'suma_nivel', 'nan_nivel', niveles),
+                                        ('retornos', 'suma_retorno', 'nan_retorno', retornos)):
+        cola = historia[-ventana:]
+        estado[buffer][ventana - len(cola):] = cola
+        estado[suma] = np.nansum(estado[buffer], axis=0)
+        estado[nan] = np.isnan(estado[buffer]).sum(axis=0)
+    estado['suma2_retorno'] = np.nansum(estado['retornos']**2, axis=0)
+    estado['ultimo'] = niveles[-1].copy()
+
+    observados = ~np.isnan(niveles)
+    estado['conteo'] = observados.sum(axis=0).astype(float)
+    estado['media'] = np.where(estado['conteo'] > 0, np.nansum(niveles, axis=0)
+                               / np.maximum(estado['conteo'], 1), 0)
+    estado['m2'] = np.nansum((niveles - estado['media'])**2, axis=0)
+    estado['maximo'] = np.fmax.reduce(niveles, axis=0)
+    estado['periodo'] = df[columna_fecha].iloc[-1]
+    return estado